@@ -1,16 +1,9 @@
-import subprocess
-import sys
-import logging
-import random
-import string
 import os
-import time
-
-import time
+import shutil
 import subprocess
+import threading
+import time
 import logging
-from NetworkManager import NetworkManager
-from langiot import generate_tts
 
 # Configuration
 ADHOC_NETWORK_INTERFACE = "wlan0"
@@ -18,6 +11,20 @@ ADHOC_NETWORK_IP = "192.168.42.1"
 ADHOC_NETWORK_SSID = "LangClient-Setup"
 ADHOC_NETWORK_PASS = "langclient"
 ADHOC_NETWORK_TIMEOUT = 60  # Timeout in seconds before switching to ad-hoc network
+POLL_INTERVAL = 1  # Used only when NetworkManager signals are unavailable
+
+# Spoken prompt, rendered once with the piper CLI and replayed with aplay, so this
+# service never has to import the main application
+PROMPT_TEXT = f"No Wi-Fi network found, starting ad-hoc network {ADHOC_NETWORK_SSID}"
+PROMPT_DIR = os.path.join(os.path.expanduser("~"), ".langiot", "prompts")
+PROMPT_CLIP = os.path.join(PROMPT_DIR, "adhoc_fallback.wav")
+PIPER_MODEL_NAME = "en_US-lessac-medium"
+PIPER_DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), ".piper", "downloads")
+
+# NetworkManager states that count as connected (NM_STATE_CONNECTED_LOCAL and above)
+NM_STATE_CONNECTED_LOCAL = 50
+
+prompt_lock = threading.Lock()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,12 +32,11 @@ logger = logging.getLogger(__name__)
 
 def start_adhoc_network():
     try:
-        subprocess.run(["systemctl", "stop", "hostapd"])
-        subprocess.run(["systemctl", "stop", "dnsmasq"])
+        # One systemctl call per step lets systemd run both unit jobs in parallel
+        subprocess.run(["systemctl", "stop", "hostapd", "dnsmasq"])
         configure_adhoc_network()
-        subprocess.run(["systemctl", "start", "hostapd"])
-        subprocess.run(["systemctl", "start", "dnsmasq"])
         subprocess.run(["ifconfig", ADHOC_NETWORK_INTERFACE, ADHOC_NETWORK_IP])
+        subprocess.run(["systemctl", "start", "hostapd", "dnsmasq"])
         logger.info(f"Ad-hoc network '{ADHOC_NETWORK_SSID}' started with password '{ADHOC_NETWORK_PASS}'")
     except subprocess.CalledProcessError as e:
         logger.error(f"Error starting ad-hoc network: {e}")
@@ -64,17 +70,113 @@ def configure_adhoc_network():
     except Exception as e:
         logger.error(f"Error configuring ad-hoc network: {e}")
 
-if __name__ == "__main__":
-    nm = NetworkManager()
-    start_time = time.time()
-
-    while time.time() - start_time < ADHOC_NETWORK_TIMEOUT:
-        state = nm.state()
-        if state == NetworkManager.State.CONNECTED:
-            logger.info("Connected to a network. Ad-hoc network not needed.")
-            break
-        time.sleep(1)
+def render_prompt_clip():
+    # Only needed the first time; later boots reuse the cached WAV
+    with prompt_lock:
+        return _render_prompt_clip()
+
+def _render_prompt_clip():
+    if os.path.exists(PROMPT_CLIP):
+        return True
+    piper = shutil.which("piper")
+    if piper is None:
+        logger.warning("piper CLI not found; ad-hoc prompt will not be spoken")
+        return False
+    os.makedirs(PROMPT_DIR, exist_ok=True)
+    tmp_clip = f"{PROMPT_CLIP}.tmp"
+    result = subprocess.run([piper, "--model", PIPER_MODEL_NAME, "--data-dir", PIPER_DOWNLOAD_DIR,
+                             "--download-dir", PIPER_DOWNLOAD_DIR, "--output_file", tmp_clip],
+                            input=PROMPT_TEXT, capture_output=True, text=True)
+    if result.returncode != 0 or not os.path.exists(tmp_clip):
+        logger.error(f"Failed to render ad-hoc prompt: {result.stderr}")
+        return False
+    os.replace(tmp_clip, PROMPT_CLIP)
+    return True
+
+def play_prompt():
+    try:
+        if render_prompt_clip():
+            subprocess.run(["aplay", "-q", PROMPT_CLIP])
+    except Exception as e:
+        logger.error(f"Error playing ad-hoc prompt: {e}")
+
+def fall_back_to_adhoc(reason):
+    logger.info(f"{reason} Starting ad-hoc network.")
+    prompt_thread = threading.Thread(target=play_prompt)
+    prompt_thread.start()
+    start_adhoc_network()
+    prompt_thread.join()
+
+def has_saved_wifi_connections(nm):
+    try:
+        for connection in nm.Settings.ListConnections():
+            if connection.GetSettings()['connection']['type'] == '802-11-wireless':
+                return True
+        return False
+    except Exception as e:
+        logger.error(f"Error listing saved connections: {e}")
+        return True  # Assume configured and wait for the normal timeout
+
+def wait_with_signals(nm, GLib):
+    # Returns True if a connection came up before the timeout
+    loop = GLib.MainLoop()
+    outcome = {"connected": False}
+
+    def on_state_changed(*args, **kwargs):
+        state = args[-1]
+        logger.info(f"NetworkManager state changed: {state}")
+        if state >= NM_STATE_CONNECTED_LOCAL:
+            outcome["connected"] = True
+            loop.quit()
+
+    def on_timeout():
+        loop.quit()
+        return False
+
+    nm.NetworkManager.OnStateChanged(on_state_changed)
+    # The state may have changed between the initial check and subscribing
+    if nm.NetworkManager.State >= NM_STATE_CONNECTED_LOCAL:
+        return True
+    GLib.timeout_add_seconds(ADHOC_NETWORK_TIMEOUT, on_timeout)
+    loop.run()
+    return outcome["connected"]
+
+def wait_with_polling(nm):
+    deadline = time.monotonic() + ADHOC_NETWORK_TIMEOUT
+    while time.monotonic() < deadline:
+        if nm.NetworkManager.State >= NM_STATE_CONNECTED_LOCAL:
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
+
+def main():
+    try:
+        import dbus.mainloop.glib
+        from gi.repository import GLib
+        # Must be installed before NetworkManager opens its bus connection
+        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+    except ImportError as e:
+        logger.warning(f"NetworkManager signals unavailable ({e}); polling instead.")
+        GLib = None
+    import NetworkManager as nm  # apt install python3-networkmanager
+
+    if nm.NetworkManager.State >= NM_STATE_CONNECTED_LOCAL:
+        logger.info("Connected to a network. Ad-hoc network not needed.")
+        return
+
+    # Fast boot path: with no saved Wi-Fi networks there is nothing to wait for
+    if not has_saved_wifi_connections(nm):
+        fall_back_to_adhoc("No saved Wi-Fi networks.")
+        return
+
+    # Pre-render the prompt while we wait so the fallback itself is quick
+    threading.Thread(target=render_prompt_clip, daemon=True).start()
+    connected = wait_with_signals(nm, GLib) if GLib else wait_with_polling(nm)
+
+    if connected:
+        logger.info("Connected to a network. Ad-hoc network not needed.")
     else:
-        logger.info(f"No network connection found within {ADHOC_NETWORK_TIMEOUT} seconds. Starting ad-hoc network.")
-        generate_tts(f"No Wi-Fi network found, starting ad-hoc network {ADHOC_NETWORK_SSID}", "en")
-        start_adhoc_network()
+        fall_back_to_adhoc(f"No network connection found within {ADHOC_NETWORK_TIMEOUT} seconds.")
+
+if __name__ == "__main__":
+    main()
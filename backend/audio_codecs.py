@@ -0,0 +1,150 @@
+import io
+import logging
+import threading
+import time
+import wave
+import numpy as np
+from pydub import AudioSegment
+
+try:
+    import soundfile  # pip install soundfile (libsndfile >= 1.0.29 decodes Ogg/Opus)
+except (ImportError, OSError):
+    soundfile = None
+
+logger = logging.getLogger(__name__)
+
+# codec name -> (media type sent in Accept, file extension)
+CODECS = {
+    'opus': ('audio/ogg; codecs=opus', 'ogg'),
+    'ogg': ('audio/ogg', 'ogg'),
+    'wav': ('audio/wav', 'wav'),
+    'pcm': ('audio/L16', 'pcm'),
+    'mp3': ('audio/mpeg', 'mp3'),
+    'm4a': ('audio/mp4', 'm4a'),
+}
+DEFAULT_CODECS = ['opus', 'wav', 'mp3']
+PCM_DEFAULT_RATE = 22050
+PCM_DEFAULT_CHANNELS = 1
+
+_preferred_codecs = list(DEFAULT_CODECS)
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def opus_supported():
+    try:
+        return soundfile is not None and 'OPUS' in soundfile.available_subtypes('OGG')
+    except Exception:
+        return False
+
+
+def configure(config, version=None):
+    global _preferred_codecs
+    names = config.get('Audio', 'PreferredCodecs', fallback=', '.join(DEFAULT_CODECS))
+    codecs = [name.strip().lower() for name in names.split(',') if name.strip().lower() in DEFAULT_CODECS + ['pcm']]
+    if 'opus' in codecs and not opus_supported():
+        logger.info("Opus decoding unavailable (soundfile/libsndfile missing); not advertising opus.")
+        codecs.remove('opus')
+    if 'mp3' not in codecs:
+        codecs.append('mp3')  # Always accept the server's default
+    _preferred_codecs = codecs
+
+
+def accept_header(containerized_only=False):
+    codecs = [c for c in _preferred_codecs if not (containerized_only and c == 'pcm')]
+    parts = []
+    for index, codec in enumerate(codecs):
+        media_type = CODECS[codec][0]
+        if codec == 'pcm':
+            media_type = f"{media_type}; rate={PCM_DEFAULT_RATE}; channels={PCM_DEFAULT_CHANNELS}"
+        quality = max(0.1, round(1.0 - 0.1 * index, 1))
+        parts.append(media_type if index == 0 else f"{media_type}; q={quality}")
+    return ', '.join(parts)
+
+
+def _content_type_params(content_type):
+    media_type, *params = [p.strip() for p in (content_type or '').split(';')]
+    values = {}
+    for param in params:
+        key, _, value = param.partition('=')
+        values[key.strip().lower()] = value.strip().strip('"')
+    return media_type.lower(), values
+
+
+def detect_codec(data, content_type=None):
+    media_type, _ = _content_type_params(content_type)
+    if media_type in ('audio/l16', 'audio/pcm'):
+        return 'pcm'
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return 'wav'
+    if data[:4] == b'OggS':
+        return 'opus' if b'OpusHead' in data[:64] else 'ogg'
+    if data[4:8] == b'ftyp':
+        return 'm4a'
+    if media_type in ('audio/wav', 'audio/x-wav', 'audio/wave'):
+        return 'wav'
+    if media_type == 'audio/ogg':
+        return 'opus'
+    return 'mp3'
+
+
+def _segment_from_pcm(samples, frame_rate, channels):
+    return AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=frame_rate, channels=channels)
+
+
+def _decode(data, codec, content_type):
+    if codec == 'wav':
+        try:
+            with wave.open(io.BytesIO(data), 'rb') as wav:
+                return AudioSegment(data=wav.readframes(wav.getnframes()), sample_width=wav.getsampwidth(),
+                                    frame_rate=wav.getframerate(), channels=wav.getnchannels())
+        except (wave.Error, EOFError):
+            pass  # e.g. float or compressed WAV; let ffmpeg handle it
+    if codec == 'pcm':
+        _, params = _content_type_params(content_type)
+        samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype='>i2').astype('<i2')
+        return _segment_from_pcm(samples, int(params.get('rate', PCM_DEFAULT_RATE)),
+                                 int(params.get('channels', PCM_DEFAULT_CHANNELS)))
+    if codec in ('opus', 'ogg') and soundfile is not None:
+        samples, frame_rate = soundfile.read(io.BytesIO(data), dtype='int16')
+        return _segment_from_pcm(samples, frame_rate, 1 if samples.ndim == 1 else samples.shape[1])
+    # Falls back to ffmpeg through pydub
+    ffmpeg_formats = {'opus': 'ogg', 'm4a': 'mp4'}
+    return AudioSegment.from_file(io.BytesIO(data), format=ffmpeg_formats.get(codec, codec))
+
+
+def decode_audio(data, content_type=None):
+    codec = detect_codec(data, content_type)
+    start = time.perf_counter()
+    segment = _decode(data, codec, content_type)
+    record_decode(codec, time.perf_counter() - start)
+    return segment, codec
+
+
+def _codec_stats(codec):
+    return _stats.setdefault(codec, {"responses": 0, "bytes": 0, "decodes": 0, "decode_seconds": 0.0})
+
+
+def record_transfer(codec, nbytes):
+    with _stats_lock:
+        stats = _codec_stats(codec)
+        stats["responses"] += 1
+        stats["bytes"] += nbytes
+
+
+def record_decode(codec, seconds):
+    with _stats_lock:
+        stats = _codec_stats(codec)
+        stats["decodes"] += 1
+        stats["decode_seconds"] += seconds
+
+
+def get_codec_stats():
+    with _stats_lock:
+        result = {}
+        for codec, stats in _stats.items():
+            entry = dict(stats)
+            entry["avg_bytes"] = stats["bytes"] / stats["responses"] if stats["responses"] else 0
+            entry["avg_decode_ms"] = 1000 * stats["decode_seconds"] / stats["decodes"] if stats["decodes"] else 0
+            result[codec] = entry
+        return {"preferred": list(_preferred_codecs), "codecs": result}
@@ -0,0 +1,160 @@
+import logging
+import os
+import struct
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+AudioInfo = namedtuple('AudioInfo', ['codec', 'duration', 'sample_rate', 'channels'])
+
+HEADER_READ_BYTES = 64 * 1024  # Read after any ID3v2 tag; enough for RIFF and Ogg headers
+TAIL_READ_BYTES = 64 * 1024    # Last Ogg page is searched for in this window
+
+# MPEG audio frame header tables, indexed by version bits
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MP3_BITRATES = {
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),   # MPEG1 Layer III
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),  # MPEG1 Layer II
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (2, 1): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),        # MPEG2/2.5 Layer II/III
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+}
+
+
+def _parse_mp3_frame(header):
+    # Returns (frame_length, sample_rate, channels, samples_per_frame, bitrate) or None
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03   # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = (header[1] >> 1) & 0x03     # 1 = Layer III, 2 = Layer II, 3 = Layer I
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[(3 if version == 3 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    channels = 1 if (header[3] >> 6) == 3 else 2
+    if layer == 3:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if (layer == 2 or version == 3) else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return frame_length, sample_rate, channels, samples_per_frame, bitrate
+
+
+def _id3_size(head):
+    # Length of a leading ID3v2 tag (header, syncsafe body size and optional footer), or 0
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    return 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+
+def _probe_mp3(head, file_size):
+    # head starts after any ID3 tag; file_size excludes it
+    offset = 0
+
+    # Find two consecutive frame headers so random bytes are not mistaken for audio
+    end = min(len(head) - 4, offset + 8192)
+    while offset < end:
+        frame = _parse_mp3_frame(head[offset:offset + 4])
+        if frame:
+            following = _parse_mp3_frame(head[offset + frame[0]:offset + frame[0] + 4])
+            if following or offset + frame[0] >= len(head):
+                break
+        offset += 1
+    else:
+        return None
+
+    frame_length, sample_rate, channels, samples_per_frame, bitrate = frame
+    frame_data = head[offset:offset + frame_length]
+
+    # VBR files carry a frame count in a Xing/Info or VBRI header inside the first frame
+    for marker in (b'Xing', b'Info'):
+        position = frame_data.find(marker)
+        if position != -1 and len(frame_data) >= position + 12:
+            flags = struct.unpack('>I', frame_data[position + 4:position + 8])[0]
+            if flags & 0x01:
+                frames = struct.unpack('>I', frame_data[position + 8:position + 12])[0]
+                return AudioInfo('mp3', frames * samples_per_frame / sample_rate, sample_rate, channels)
+    position = frame_data.find(b'VBRI')
+    if position != -1 and len(frame_data) >= position + 18:
+        frames = struct.unpack('>I', frame_data[position + 14:position + 18])[0]
+        return AudioInfo('mp3', frames * samples_per_frame / sample_rate, sample_rate, channels)
+
+    return AudioInfo('mp3', (file_size - offset) * 8 / bitrate, sample_rate, channels)
+
+
+def _probe_wav(head):
+    if len(head) < 12 or head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+        return None
+    offset = 12
+    channels = sample_rate = byte_rate = None
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        chunk_size = struct.unpack('<I', head[offset + 4:offset + 8])[0]
+        if chunk_id == b'fmt ' and offset + 24 <= len(head):
+            _, channels, sample_rate, byte_rate = struct.unpack('<HHII', head[offset + 8:offset + 20])
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            return AudioInfo('wav', chunk_size / byte_rate, sample_rate, channels)
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _probe_ogg(head, tail):
+    if head[:4] != b'OggS' or len(head) < 28:
+        return None
+    segments = head[26]
+    packet = head[27 + segments:]
+    if packet[:8] == b'OpusHead' and len(packet) >= 19:
+        channels = packet[9]
+        pre_skip, input_rate = struct.unpack('<HI', packet[10:16])
+        codec, rate, granule_rate = 'opus', input_rate or 48000, 48000
+    elif packet[:7] == b'\x01vorbis' and len(packet) >= 16:
+        channels = packet[11]
+        rate = struct.unpack('<I', packet[12:16])[0]
+        codec, pre_skip, granule_rate = 'ogg', 0, rate
+    else:
+        return None
+
+    last_page = tail.rfind(b'OggS')
+    if last_page == -1 or len(tail) < last_page + 14:
+        return AudioInfo(codec, None, rate, channels)
+    granule = struct.unpack('<q', tail[last_page + 6:last_page + 14])[0]
+    return AudioInfo(codec, max(0, granule - pre_skip) / granule_rate, rate, channels)
+
+
+def probe_audio(source):
+    # source: a file path or bytes. Reads only the header (and the tail for Ogg); never decodes.
+    # An ID3 tag with cover art can be far larger than the header window, so skip it first
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            skip = _id3_size(source[:10])
+            head, tail = bytes(source[skip:skip + HEADER_READ_BYTES]), bytes(source[-TAIL_READ_BYTES:])
+            file_size = len(source) - skip
+        else:
+            file_size = os.path.getsize(source)
+            with open(source, 'rb') as f:
+                skip = _id3_size(f.read(10))
+                f.seek(skip)
+                head = f.read(HEADER_READ_BYTES)
+                f.seek(max(0, file_size - TAIL_READ_BYTES))
+                tail = f.read()
+            file_size -= skip
+    except OSError as e:
+        logger.error(f"Error reading audio file {source}: {e}")
+        return None
+
+    if head[:4] == b'RIFF':
+        return _probe_wav(head)
+    if head[:4] == b'OggS':
+        return _probe_ogg(head, tail)
+    if head[4:8] == b'ftyp':
+        return AudioInfo('m4a', None, None, None)
+    return _probe_mp3(head, file_size)
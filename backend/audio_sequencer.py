@@ -0,0 +1,221 @@
+import concurrent.futures
+import logging
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+from pydub import AudioSegment
+from pydub.playback import play
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAYBACK_RATE = 44100   # Every clip is converted to 16-bit stereo at this rate
+DEFAULT_LEAD_IN_MS = 100        # Silence before the first clip while the device opens
+DEFAULT_CLIP_GAP_MS = 150       # Silence between clips of one playlist
+DEFAULT_MAX_QUEUED = 4          # Playlists waiting behind the current one before uploads are refused
+CLIP_TIMEOUT = 60               # Longest wait for a pending clip (TTS job, download)
+STALL_CHUNK_MS = 50             # Silence fed to the device while the next clip is still decoding
+WRITE_CHUNK_FRAMES = 4096
+
+
+class Clip:
+    # One item of a playlist: raw audio bytes, or a loader returning (bytes, content_type) or None
+    def __init__(self, data=None, content_type=None, loader=None, label=None):
+        self.data = data
+        self.content_type = content_type
+        self.loader = loader
+        self.label = label
+
+    @classmethod
+    def from_future(cls, future, content_type=None, label=None):
+        # For results that are still being produced, e.g. a queued TTS job
+        return cls(loader=lambda: (future.result(timeout=CLIP_TIMEOUT), content_type), label=label)
+
+    def load(self):
+        return self.loader() if self.loader else (self.data, self.content_type)
+
+
+class PlaylistSequencer:
+    # Plays each playlist as one continuous PCM stream through a single aplay process. Clips are
+    # decoded and converted on a prefetch thread one ahead of the clip being played.
+    def __init__(self, decode, publish=None, player=None):
+        self.decode = decode  # (data, content_type) -> (AudioSegment, codec)
+        self.publish = publish or (lambda event_type, data=None: None)
+        self.player = player if player is not None else shutil.which('aplay')
+        self.playback_rate = DEFAULT_PLAYBACK_RATE
+        self.lead_in_ms = DEFAULT_LEAD_IN_MS
+        self.clip_gap_ms = DEFAULT_CLIP_GAP_MS
+        self.max_queued = DEFAULT_MAX_QUEUED
+        self.playlists = queue.Queue()
+        self.prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio-prefetch')
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {"playlists": 0, "clips": 0, "skipped": 0, "streams": 0, "stalls": 0,
+                      "stall_seconds": 0.0, "prepare_seconds": 0.0, "rejected": 0}
+
+    def configure(self, config, version=None):
+        self.playback_rate = config.getint('Audio', 'PlaybackRate', fallback=DEFAULT_PLAYBACK_RATE)
+        self.lead_in_ms = config.getint('Audio', 'LeadInMs', fallback=DEFAULT_LEAD_IN_MS)
+        self.clip_gap_ms = config.getint('Audio', 'ClipGapMs', fallback=DEFAULT_CLIP_GAP_MS)
+        self.max_queued = config.getint('Audio', 'MaxQueuedPlaylists', fallback=DEFAULT_MAX_QUEUED)
+
+    def _record(self, **counts):
+        # Updated from the sequencer, prefetch and request threads
+        with self.stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def note_rejected(self):
+        # An upload refused because of the backlog
+        self._record(rejected=1)
+
+    def queue_depth(self):
+        return self.playlists.qsize()
+
+    def backlog_full(self):
+        # Only external uploads check this; scan responses are always queued
+        return self.playlists.qsize() >= self.max_queued
+
+    def play(self, clips, volume_change_dB=-5):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True, name='audio-sequencer')
+                self.thread.start()
+        self.playlists.put((list(clips), volume_change_dB))
+
+    def _prepare(self, clip, volume_change_dB):
+        # Runs on the prefetch thread; returns (pcm bytes, info) or None for a clip to skip
+        try:
+            started = time.perf_counter()
+            loaded = clip.load()
+            if not loaded or not loaded[0]:
+                return None
+            audio, codec = self.decode(*loaded)
+            if volume_change_dB:
+                audio = audio.apply_gain(volume_change_dB)
+            audio = audio.set_frame_rate(self.playback_rate).set_channels(2).set_sample_width(2)
+            self._record(prepare_seconds=time.perf_counter() - started)
+            return audio.raw_data, {"codec": codec, "duration": audio.duration_seconds, "label": clip.label}
+        except Exception as e:
+            logger.error(f"Error preparing audio clip {clip.label or ''}: {e}")
+            self.publish('playback', {"status": "error", "error": str(e)})
+            return None
+
+    def _silence(self, milliseconds):
+        return bytes(int(self.playback_rate * milliseconds / 1000) * 4)
+
+    def _run(self):
+        while True:
+            playlist = self.playlists.get()
+            stream = None
+            try:
+                stream = self._open_stream()
+                # Playlists queued behind this one continue on the same stream
+                while playlist:
+                    self._play_playlist(stream, *playlist)
+                    self.playlists.task_done()
+                    try:
+                        playlist = self.playlists.get_nowait()
+                    except queue.Empty:
+                        playlist = None
+            except Exception as e:
+                logger.error(f"Error playing audio: {e}")
+                self.publish('playback', {"status": "error", "error": str(e)})
+                if playlist:
+                    self.playlists.task_done()
+            finally:
+                if stream:
+                    stream.close()
+
+    def _open_stream(self):
+        self._record(streams=1)
+        if self.player:
+            return AplayStream(self.player, self.playback_rate)
+        return BufferedStream(self.playback_rate)
+
+    def _play_playlist(self, stream, clips, volume_change_dB):
+        self._record(playlists=1)
+        pending = self.prefetcher.submit(self._prepare, clips[0], volume_change_dB) if clips else None
+        gap = self._silence(self.lead_in_ms if stream.empty else self.clip_gap_ms)
+        for index in range(len(clips)):
+            # Start converting the next clip before this one is written out
+            current = pending
+            pending = self.prefetcher.submit(self._prepare, clips[index + 1], volume_change_dB) \
+                if index + 1 < len(clips) else None
+
+            stall_started = time.monotonic()
+            stalled = False
+            while True:
+                try:
+                    prepared = current.result(timeout=STALL_CHUNK_MS / 1000)
+                    break
+                except concurrent.futures.TimeoutError:
+                    # Keep the device fed so a slow decode is a longer pause rather than an underrun
+                    stalled = True
+                    stream.write(self._silence(STALL_CHUNK_MS))
+            if stalled:
+                self._record(stalls=1, stall_seconds=time.monotonic() - stall_started)
+
+            if prepared is None:
+                self._record(skipped=1)
+                continue
+            pcm, info = prepared
+            stream.write(gap)
+            self.publish('playback', dict(info, status="started"))
+            stream.write(pcm)
+            self._record(clips=1)
+            self.publish('playback', {"status": "finished", "label": info["label"], "queued": self.playlists.qsize()})
+            gap = self._silence(self.clip_gap_ms)
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            "queued": self.playlists.qsize(),
+            "max_queued": self.max_queued,
+            "player": self.player or "pydub",
+            "playback_rate": self.playback_rate,
+            "clip_gap_ms": self.clip_gap_ms,
+            "avg_prepare_ms": round(1000 * stats["prepare_seconds"] / (stats["clips"] or 1), 1),
+        })
+        return stats
+
+
+class AplayStream:
+    # Raw 16-bit stereo PCM piped to one aplay process; writes block at the device's pace
+    def __init__(self, player, rate):
+        self.process = subprocess.Popen([player, '-q', '-t', 'raw', '-f', 'S16_LE', '-c', '2', '-r', str(rate)],
+                                        stdin=subprocess.PIPE)
+        self.empty = True
+
+    def write(self, pcm):
+        self.empty = False
+        chunk = WRITE_CHUNK_FRAMES * 4
+        for offset in range(0, len(pcm), chunk):
+            self.process.stdin.write(pcm[offset:offset + chunk])
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=CLIP_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class BufferedStream:
+    # Without aplay: collect the stream and play it in one pydub call, still without gaps
+    def __init__(self, rate):
+        self.rate = rate
+        self.buffer = bytearray()
+        self.empty = True
+
+    def write(self, pcm):
+        self.empty = False
+        self.buffer += pcm
+
+    def close(self):
+        if self.buffer:
+            play(AudioSegment(data=bytes(self.buffer), sample_width=2, frame_rate=self.rate, channels=2))
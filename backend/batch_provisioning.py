@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ProvisioningSession:
+    # Writes a list of payloads onto whichever new tags are presented, one payload per UID.
+    # Payloads are encoded up front; tags that already hold a pending payload are skipped.
+    def __init__(self, payloads, encode):
+        self.id = uuid.uuid4().hex
+        self.payloads = list(payloads)
+        self.bodies = [payload.encode() for payload in self.payloads]
+        self.encoded = [encode(payload) for payload in self.payloads]
+        self.pending = list(range(len(self.payloads)))
+        self.results = []
+        self.seen_uids = set()
+        self.started = time.time()
+        self.finished = None
+        self.lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.finished is None
+
+    def handle_tag(self, uid, read_body, write_bytes):
+        # read_body() -> current tag body (bytes) or None; write_bytes(data) writes and verifies
+        uid_hex = bytes(uid).hex() if isinstance(uid, (bytes, bytearray)) else str(uid)
+        with self.lock:
+            if not self.active or uid_hex in self.seen_uids or not self.pending:
+                return None
+            self.seen_uids.add(uid_hex)
+
+            start = time.monotonic()
+            current = read_body()
+            current = bytes(current) if current is not None else None
+            matching = [i for i in self.pending if self.bodies[i] == current]
+            if matching:
+                index, status, error = matching[0], 'skipped', None
+            else:
+                index = self.pending[0]
+                try:
+                    write_bytes(self.encoded[index])
+                    status, error = 'written', None
+                except Exception as e:
+                    status, error = 'failed', str(e)
+                    logger.error(f"Provisioning write to {uid_hex} failed: {e}")
+
+            if status != 'failed':
+                self.pending.remove(index)
+            else:
+                self.seen_uids.discard(uid_hex)  # Allow the same tag to be retried
+
+            result = {
+                "uid": uid_hex,
+                "index": index,
+                "status": status,
+                "error": error,
+                "duration": time.monotonic() - start,
+            }
+            self.results.append(result)
+            if not self.pending:
+                self.finished = time.time()
+                logger.info(f"Provisioning session {self.id} complete: {self.summary()}")
+            return result
+
+    def stop(self):
+        with self.lock:
+            if self.finished is None:
+                self.finished = time.time()
+
+    def summary(self):
+        elapsed = (self.finished or time.time()) - self.started
+        done = len(self.payloads) - len(self.pending)
+        return {
+            "id": self.id,
+            "active": self.active,
+            "total": len(self.payloads),
+            "done": done,
+            "pending": len(self.pending),
+            "written": sum(1 for r in self.results if r["status"] == 'written'),
+            "skipped": sum(1 for r in self.results if r["status"] == 'skipped'),
+            "failed": sum(1 for r in self.results if r["status"] == 'failed'),
+            "elapsed": elapsed,
+            "tags_per_minute": 60.0 * done / elapsed if elapsed > 0 else 0.0,
+            "last_result": self.results[-1] if self.results else None,
+        }
@@ -0,0 +1,257 @@
+import json
+import time
+
+from adafruit_pn532.i2c import PN532_I2C
+from adafruit_pn532.spi import PN532_SPI, reverse_bit
+from adafruit_pn532.uart import PN532_UART
+
+from nfc_transport import FastPN532_I2C, FastPN532_SPI, FastPN532_UART
+from tag_layout import encode_tag_layout, read_tag_layout
+
+# Transport benchmark: a full tag read (detect + read_tag_memory) through the real driver code
+# against a simulated PN532 whose bus and RF timings follow the datasheet figures below.
+# Run from the backend directory: python bench_nfc_transport.py
+
+ROUNDS = 20
+SYSCALL_OVERHEAD = 60e-6    # Per bus transaction on Linux (ioctl / read / write)
+ACK_DELAY = 0.5e-3          # Frame received -> ACK ready
+COMMAND_TIME = {            # ACK read -> response ready, with a tag in the field
+    0x02: 0.2e-3,           # GetFirmwareVersion
+    0x14: 0.2e-3,           # SAMConfiguration
+    0x4A: 3.0e-3,           # InListPassiveTarget
+    0x40: 1.5e-3,           # InDataExchange (NTAG READ of 4 pages)
+}
+
+SAMPLE_TAG = json.dumps({
+    "text": "Good morning, how are you today?",
+    "language": "en",
+    "translations": ["zh-TW", "es", "fr", "ja"],
+    "soundFileUrl": "https://example.com/audio/good-morning.mp3",
+}).encode()
+
+
+class Clock:
+    # Sleeps off simulated bus time in batches; time.sleep is too coarse for single bytes
+    def __init__(self):
+        self.owed = 0.0
+
+    def spend(self, seconds):
+        self.owed += seconds
+        if self.owed > 0.5e-3:
+            start = time.perf_counter()
+            while time.perf_counter() - start < self.owed:
+                pass
+            self.owed = 0.0
+
+
+class SimulatedChip:
+    # Answers the handful of commands the app uses, backed by NTAG215-sized memory
+    def __init__(self, clock, memory):
+        self.clock = clock
+        self.memory = bytearray(memory)
+        self.output = b''
+        self.ready_at = 0.0
+        self.pending = None
+
+    @property
+    def ready(self):
+        return bool(self.output) and time.perf_counter() >= self.ready_at
+
+    def receive(self, data):
+        start = data.find(b'\x00\x00\xff')
+        if start == -1:
+            return  # Wakeup preamble
+        length = data[start + 3]
+        body = data[start + 5:start + 5 + length]
+        command, params = body[1], body[2:]
+        if command == 0x02:
+            response = bytes([0x32, 0x01, 0x06, 0x07])
+        elif command == 0x14:
+            response = b''
+        elif command == 0x4A:
+            response = bytes([0x01, 0x01, 0x00, 0x44, 0x00, 0x07, 0x04, 0x12, 0x34, 0x56, 0x78, 0x9a, 0xbc])
+        elif command == 0x40 and params[1] == 0x30:
+            page = params[2]
+            response = b'\x00' + bytes(self.memory[page * 4:page * 4 + 16]).ljust(16, b'\x00')
+        else:
+            response = b'\x00'
+        self.pending = (self._frame(bytes([0xD5, command + 1]) + response), COMMAND_TIME.get(command, 1e-3))
+        self._emit(b'\x00\x00\xff\x00\xff\x00', ACK_DELAY)
+
+    def _frame(self, data):
+        checksum = (~sum(data) + 1) & 0xFF
+        return b'\x00\x00\xff' + bytes([len(data), (~len(data) + 1) & 0xFF]) + data + bytes([checksum, 0x00])
+
+    def _emit(self, output, delay):
+        self.output = output
+        self.ready_at = time.perf_counter() + delay
+
+    def consume(self):
+        self.output = b''
+        if self.pending:
+            frame, delay = self.pending
+            self.pending = None
+            self._emit(frame, delay)
+
+
+class SimulatedI2C:
+    # busio.I2C stand-in: 9 clocks per byte plus the address byte
+    def __init__(self, chip, frequency):
+        self.chip = chip
+        self.frequency = frequency
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def _transfer(self, count):
+        self.chip.clock.spend(SYSCALL_OVERHEAD + (count + 1) * 9 / self.frequency)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        self._transfer(len(data))
+        if data:
+            self.chip.receive(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        self._transfer(end - start)
+        if not self.chip.ready:
+            buffer[start:end] = bytes(end - start)
+            return
+        # Status byte, then the pending frame from its first byte
+        output = b'\x01' + self.chip.output
+        buffer[start:end] = output[:end - start].ljust(end - start, b'\x00')
+        if end - start >= len(output):
+            self.chip.consume()
+
+
+class SimulatedSPI:
+    # busio.SPI stand-in: LSB-first PN532 framing with a leading operation byte
+    def __init__(self, chip):
+        self.chip = chip
+        self.baudrate = 100000
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def configure(self, baudrate=100000, polarity=0, phase=0):
+        self.baudrate = baudrate
+
+    def _transfer(self, count):
+        self.chip.clock.spend(SYSCALL_OVERHEAD + count * 8 / self.baudrate)
+
+    def write(self, buffer):
+        self._transfer(len(buffer))
+        data = bytes(reverse_bit(b) for b in buffer)
+        if data[0] == 0x01:
+            self.chip.receive(data[1:])
+
+    def write_readinto(self, out_buffer, in_buffer):
+        self._transfer(len(out_buffer))
+        operation = reverse_bit(out_buffer[0])
+        if operation == 0x02:
+            in_buffer[1] = reverse_bit(0x01 if self.chip.ready else 0x00)
+        elif operation == 0x03:
+            output = self.chip.output.ljust(len(in_buffer) - 1, b'\x00')
+            in_buffer[1:] = bytes(reverse_bit(b) for b in output[:len(in_buffer) - 1])
+            self.chip.consume()
+
+
+class SimulatedPin:
+    value = True
+
+    def switch_to_output(self, value=False):
+        self.value = value
+
+
+class SimulatedSerial:
+    # pyserial stand-in: 10 bits per byte, bytes arrive as they are clocked out
+    def __init__(self, chip, baudrate, timeout=0.1):
+        self.chip = chip
+        self.baudrate = baudrate
+        self.timeout = timeout
+
+    @property
+    def in_waiting(self):
+        if not self.chip.ready:
+            return 0
+        elapsed = time.perf_counter() - self.chip.ready_at
+        return min(len(self.chip.output), int(elapsed * self.baudrate / 10))
+
+    def reset_input_buffer(self):
+        pass
+
+    def write(self, data):
+        self.chip.clock.spend(SYSCALL_OVERHEAD + len(data) * 10 / self.baudrate)
+        self.chip.receive(bytes(data))
+
+    def read(self, count):
+        self.chip.clock.spend(SYSCALL_OVERHEAD)
+        deadline = time.perf_counter() + self.timeout
+        while not self.chip.ready and time.perf_counter() < deadline:
+            pass
+        if not self.chip.ready:
+            return b''
+        # Wait for the bytes to arrive, or for the serial timeout if fewer are coming
+        available = min(count, len(self.chip.output))
+        wait = available * 10 / self.baudrate if available == count else self.timeout
+        self.chip.clock.spend(max(0.0, wait - (time.perf_counter() - self.chip.ready_at)))
+        data = self.chip.output[:count]
+        self.chip.output = self.chip.output[count:]
+        if not self.chip.output:
+            self.chip.consume()
+        return data
+
+
+def tag_memory():
+    return bytes(16) + encode_tag_layout(SAMPLE_TAG).ljust(540 - 16, b'\x00')
+
+
+def read_tag(pn532, start_page=4):
+    # Same access pattern as langiot.read_tag_memory
+    uid = pn532.read_passive_target(timeout=0.5)
+    assert uid is not None
+    return read_tag_layout(pn532.mifare_classic_read_block, start_page).body
+
+
+def make_reader(name):
+    chip = SimulatedChip(Clock(), tag_memory())
+    cs_pin = SimulatedPin()
+    readers = {
+        'i2c 100k (stock)': lambda: PN532_I2C(SimulatedI2C(chip, 100000)),
+        'i2c 100k': lambda: FastPN532_I2C(SimulatedI2C(chip, 100000)),
+        'i2c 400k': lambda: FastPN532_I2C(SimulatedI2C(chip, 400000)),
+        'spi 100k (stock)': lambda: PN532_SPI(SimulatedSPI(chip), cs_pin),
+        'spi 1M': lambda: FastPN532_SPI(SimulatedSPI(chip), cs_pin, baudrate=1000000),
+        'spi 5M': lambda: FastPN532_SPI(SimulatedSPI(chip), cs_pin, baudrate=5000000),
+        'uart 115200 (stock)': lambda: PN532_UART(SimulatedSerial(chip, 115200)),
+        'uart 115200': lambda: FastPN532_UART(SimulatedSerial(chip, 115200)),
+        'uart 921600': lambda: FastPN532_UART(SimulatedSerial(chip, 921600)),
+    }
+    return readers[name]()
+
+
+def main():
+    names = ['i2c 100k (stock)', 'i2c 100k', 'i2c 400k', 'spi 100k (stock)', 'spi 1M', 'spi 5M',
+             'uart 115200 (stock)', 'uart 115200', 'uart 921600']
+    print(f"Tag payload: {len(SAMPLE_TAG)} bytes, {ROUNDS} reads per transport")
+    baseline = None
+    for name in names:
+        pn532 = make_reader(name)
+        assert read_tag(pn532) == SAMPLE_TAG
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            read_tag(pn532)
+        per_read = (time.perf_counter() - start) / ROUNDS
+        baseline = baseline or per_read
+        print(f"{name:<20} {per_read * 1000:8.1f} ms/tag ({baseline / per_read:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import configparser
+import json
+import os
+import timeit
+
+from tag_payload import SchemaValidators, decode_tag_payload
+
+# Micro-benchmark: previous tag decode chain vs the single-pass decoder.
+# Run from the backend directory: python bench_tag_payload.py
+
+CONFIG_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+ITERATIONS = 20000
+
+SAMPLE_TAG = json.dumps({
+    "text": "Good morning, how are you today?",
+    "language": "en",
+    "translations": ["zh-TW", "es", "fr", "ja"],
+    "soundFileUrl": "https://example.com/audio/good-morning.mp3",
+}).encode() + b'\x00\x00'
+
+
+def legacy_is_valid_schema(config, data, schema_section):
+    if not config.has_section(schema_section):
+        return False
+    if not isinstance(data, dict):
+        return False
+    # Only the section's own keys, so the legacy chain can succeed at all
+    for key, value_type in config._sections[schema_section].items():
+        if key not in data:
+            return False
+        if not hasattr(__builtins__, value_type):
+            return False
+        if not isinstance(data[key], getattr(__builtins__, value_type)):
+            return False
+    return True
+
+
+def legacy_chain(config, tag_data):
+    # read_loop -> parse_tag_data -> validate_json_data -> perform_http_request
+    text = tag_data.decode('utf-8').rstrip('\x00')
+    data_hex = ''.join(['{:02x}'.format(x) for x in text.encode()])
+    parsed = {"memory_data": data_hex}
+    data = json.loads(bytes.fromhex(parsed['memory_data']).decode('utf-8'))
+    if not (legacy_is_valid_schema(config, data, 'Schema_Localization') or
+            legacy_is_valid_schema(config, data, 'Schema_Translation')):
+        return None
+    return json.loads(bytes.fromhex(parsed['memory_data']).decode('utf-8'))
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE_PATH)
+    validators = SchemaValidators()
+    validators.compile(config)
+    tag_data = bytearray(SAMPLE_TAG)
+
+    assert legacy_chain(config, tag_data) == decode_tag_payload(tag_data, validators).data
+
+    legacy = min(timeit.repeat(lambda: legacy_chain(config, tag_data), number=ITERATIONS, repeat=3))
+    single = min(timeit.repeat(lambda: decode_tag_payload(tag_data, validators), number=ITERATIONS, repeat=3))
+
+    print(f"Payload size: {len(tag_data)} bytes, {ITERATIONS} iterations")
+    print(f"Legacy chain:        {legacy / ITERATIONS * 1e6:8.2f} us/tag")
+    print(f"Single-pass decoder: {single / ITERATIONS * 1e6:8.2f} us/tag ({legacy / single:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
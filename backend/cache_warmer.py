@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARM_START_DELAY = float(os.getenv('WARM_START_DELAY', 30))      # Let boot and the first scans settle first
+WARM_IDLE_SECONDS = float(os.getenv('WARM_IDLE_SECONDS', 120))   # No scans for this long counts as idle
+WARM_INTERVAL = float(os.getenv('WARM_INTERVAL', 3600))          # Minimum time between idle passes
+WARM_TOP_TAGS = int(os.getenv('WARM_TOP_TAGS', 50))
+WARM_HISTORY_DAYS = float(os.getenv('WARM_HISTORY_DAYS', 14))
+WARM_MAX_BYTES = int(os.getenv('WARM_MAX_BYTES', 20 * 1024 * 1024))        # Download budget per pass
+WARM_BYTES_PER_SECOND = int(os.getenv('WARM_BYTES_PER_SECOND', 256 * 1024))  # Leaves bandwidth for real scans
+CHECK_INTERVAL = 5
+
+
+class CacheWarmer:
+    # Preloads audio for the most scanned tags at boot and whenever the device is idle.
+    # top_tags(limit, since) -> [{"uid", "payload"}], most popular first (ScanHistory.top_tags).
+    # warm_tag(payload) -> bytes fetched (sound files, server speech), 0 when all was cached.
+    # warm_speech() runs once per pass for locally synthesized prompts.
+    def __init__(self, top_tags, warm_tag, warm_speech=None):
+        self.top_tags = top_tags
+        self.warm_tag = warm_tag
+        self.warm_speech = warm_speech
+        self.last_scan = 0.0
+        self.last_pass = None
+        self.next_pass = 0.0
+        self.scan_arrived = threading.Event()
+        self.warmed_uids = set()
+        self.lock = threading.Lock()
+        self.stats = {"passes": 0, "interrupted": 0, "tags_checked": 0, "tags_fetched": 0, "bytes": 0,
+                      "failures": 0, "scans": 0, "warm_scans": 0, "lookups": 0, "hits": 0}
+        self.thread = threading.Thread(target=self._run, daemon=True, name='cache-warmer')
+
+    def start(self):
+        self.thread.start()
+
+    def _record(self, **counts):
+        # The warming thread, the scan loop and /cache/warming_stats all touch stats
+        with self.lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def note_scan(self, uid):
+        # Called from the scan loop: pauses any pass in progress and counts warm hits
+        self.last_scan = time.monotonic()
+        self.scan_arrived.set()
+        with self.lock:
+            self.stats["scans"] += 1
+            if uid in self.warmed_uids:
+                self.stats["warm_scans"] += 1
+
+    def note_lookup(self, hit):
+        # Whether a scan's cacheable audio was already local, warmed or not
+        self._record(lookups=1, hits=1 if hit else 0)
+
+    def is_idle(self):
+        return time.monotonic() - self.last_scan >= WARM_IDLE_SECONDS
+
+    def _run(self):
+        time.sleep(WARM_START_DELAY)
+        self._warm(reason='boot')
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            if self.is_idle() and time.monotonic() >= self.next_pass:
+                self._warm(reason='idle')
+
+    def _warm(self, reason):
+        self.last_pass = time.monotonic()
+        self.next_pass = self.last_pass + WARM_INTERVAL
+        self.scan_arrived.clear()
+        self._record(passes=1)
+        started, fetched_bytes, fetched_tags = time.monotonic(), 0, 0
+        try:
+            tags = self.top_tags(WARM_TOP_TAGS, time.time() - WARM_HISTORY_DAYS * 86400)
+            if self.warm_speech:
+                self.warm_speech()
+        except Exception as e:
+            logger.error(f"Cache warming could not start: {e}")
+            return
+
+        for tag in tags:
+            if self.scan_arrived.is_set():
+                # A scan needs the network and CPU now; the next idle pass picks up the rest
+                self._record(interrupted=1)
+                self.next_pass = time.monotonic()  # Resume at the next idle period
+                logger.info(f"Cache warming interrupted by a scan after {fetched_tags} tags")
+                return
+            if fetched_bytes >= WARM_MAX_BYTES:
+                logger.info(f"Cache warming stopped at its {WARM_MAX_BYTES} byte budget")
+                break
+            if not tag.get("payload"):
+                continue
+            try:
+                nbytes = self.warm_tag(tag["payload"])
+            except Exception as e:
+                self._record(failures=1)
+                logger.warning(f"Failed to warm tag {tag['uid']}: {e}")
+                continue
+            with self.lock:
+                self.stats["tags_checked"] += 1
+                self.warmed_uids.add(tag["uid"])
+            if nbytes:
+                fetched_tags += 1
+                fetched_bytes += nbytes
+                self._record(tags_fetched=1, bytes=nbytes)
+                # Throttle to the bandwidth budget, waking early if a scan arrives
+                self.scan_arrived.wait(nbytes / WARM_BYTES_PER_SECOND)
+        logger.info(f"Cache warming ({reason}): {len(tags)} tags checked, {fetched_tags} fetched "
+                    f"({fetched_bytes} bytes) in {time.monotonic() - started:.1f}s")
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["warmed_tags"] = len(self.warmed_uids)
+        stats["warm_scan_rate"] = round(stats["warm_scans"] / stats["scans"], 3) if stats["scans"] else None
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None
+        stats["last_pass_age"] = round(time.monotonic() - self.last_pass, 1) if self.last_pass else None
+        return stats
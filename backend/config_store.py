@@ -0,0 +1,99 @@
+import configparser
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigStore:
+    # Caches the parsed config file and reloads it only when the file on disk changes.
+    # The version is the file's mtime in nanoseconds, so every process sharing the file
+    # (e.g. gunicorn workers) agrees on it without any extra coordination.
+    def __init__(self, path):
+        self.path = path
+        self.config = configparser.ConfigParser()
+        self.version = 0
+        self._signature = None
+        self._subscribers = []
+        self._lock = threading.RLock()
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self):
+        signature = self._stat_signature()
+        if signature != self._signature:
+            with self._lock:
+                if self._stat_signature() != self._signature:
+                    self._reload()
+        return self.config
+
+    def _reload(self):
+        signature = self._stat_signature()
+        new_config = configparser.ConfigParser()
+        if signature is not None:
+            new_config.read(self.path)
+        self.config = new_config
+        self._signature = signature
+        self.version = signature[2] if signature else 0
+        logger.info(f"Configuration loaded from {self.path} (version {self.version})")
+
+        for callback in list(self._subscribers):
+            try:
+                callback(new_config, self.version)
+            except Exception as e:
+                logger.error(f"Config subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def subscribe(self, callback):
+        # callback(config, version) runs on every reload, and once immediately
+        with self._lock:
+            config, version = self.get(), self.version
+            self._subscribers.append(callback)
+        callback(config, version)
+
+    @contextmanager
+    def _file_lock(self):
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, changes):
+        # changes: {section: {key: value}}; re-read under an exclusive lock so
+        # concurrent writers in other processes don't lose each other's edits
+        with self._lock, self._file_lock():
+            updated = configparser.ConfigParser()
+            updated.read(self.path)
+            for section, values in changes.items():
+                if section != configparser.DEFAULTSECT and not updated.has_section(section):
+                    updated.add_section(section)
+                for key, value in values.items():
+                    updated[section][key] = str(value)
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.config-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as tmp_file:
+                    updated.write(tmp_file)
+                    tmp_file.flush()
+                    os.fsync(tmp_file.fileno())
+                if os.path.exists(self.path):
+                    os.chmod(tmp_path, os.stat(self.path).st_mode & 0o777)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._reload()
+        return self.version
@@ -0,0 +1,293 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import requests
+
+logger = logging.getLogger(__name__)
+
+AUDIO_STORE_DIR = os.getenv('AUDIO_STORE_DIR', os.path.join(os.path.expanduser("~"), ".langiot", "audio"))
+MAX_DOWNLOAD_BYTES = 50 * 1024 * 1024   # Refuse sound files larger than this
+MAX_STORE_BYTES = 200 * 1024 * 1024     # Least recently used objects are evicted above this
+REVALIDATE_INTERVAL = 3600              # Seconds before a cached URL is re-checked with the server
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 10
+
+
+class AudioStore:
+    # Content-addressed store: objects/<sha256> holds the bytes, index.json maps
+    # URL -> object plus the validators used for conditional and resumed requests.
+    # index.json may be shared by several processes: it is re-read under a file lock
+    # before every write and reloaded for reads when another process changed it.
+    def __init__(self, root=AUDIO_STORE_DIR, max_bytes=MAX_STORE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, 'objects')
+        self.partial_dir = os.path.join(root, 'partial')
+        self.index_path = os.path.join(root, 'index.json')
+        self.index_lock_path = os.path.join(root, 'index.lock')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.index_mtime = None
+        self.index = self._load_index()
+        self.index_lock = threading.Lock()
+        self.url_locks = {}  # url -> [lock, holders]; only URLs being downloaded have an entry
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='audio-download')
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                self.index_mtime = os.fstat(f.fileno()).st_mtime_ns
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+            self.index_mtime = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_path, self.index_path)
+
+    def _current_index(self):
+        # Called with index_lock held; only a stat() unless another process rewrote the index
+        try:
+            if os.stat(self.index_path).st_mtime_ns != self.index_mtime:
+                self.index = self._load_index()
+        except OSError:
+            pass
+        return self.index
+
+    def _modify_index(self, change):
+        # Merges with the on-disk index so entries written by other processes are kept
+        with self.index_lock, open(self.index_lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.index = self._load_index()
+            change(self.index)
+            self._save_index()
+
+    @contextmanager
+    def _url_lock(self, url):
+        # One download per URL at a time; the lock is dropped when its last holder leaves
+        with self.index_lock:
+            holder = self.url_locks.setdefault(url, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self.index_lock:
+                holder[1] -= 1
+                if not holder[1]:
+                    del self.url_locks[url]
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def cached_path(self, url):
+        with self.index_lock:
+            entry = self._current_index().get(url)
+        if entry and os.path.exists(self.object_path(entry['sha256'])):
+            return self.object_path(entry['sha256'])
+        return None
+
+    def fetch(self, url):
+        # Returns a local path for url; cached copies are returned at once and revalidated in the background
+        entry = self.entry(url)
+        path = self.cached_path(url)
+        if path and entry and self._touch(path):
+            if time.time() - entry.get('checked', 0) > REVALIDATE_INTERVAL:
+                self.executor.submit(self._download, url)
+            return path
+        return self._download(url)
+
+    def _touch(self, path):
+        # Tracks recency for eviction; False if the object was evicted since it was looked up
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _size(self, digest):
+        try:
+            return os.path.getsize(self.object_path(digest))
+        except OSError:
+            return 0
+
+    def fetch_async(self, url):
+        return self.executor.submit(self.fetch, url)
+
+    def entry(self, key):
+        with self.index_lock:
+            entry = self._current_index().get(key)
+            return dict(entry) if entry else None
+
+    def put(self, key, data, **fields):
+        # Stores bytes the caller fetched itself (e.g. phrase segments) under a non-URL key.
+        # Threads may store the same bytes at once, so each writes its own temporary file.
+        digest = hashlib.sha256(data).hexdigest()
+        fd, part_path = tempfile.mkstemp(dir=self.partial_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(part_path, self.object_path(digest))
+        except OSError:
+            os.remove(part_path)
+            raise
+        self._update_entry(key, sha256=digest, size=len(data), checked=time.time(), **fields)
+        self._evict(keep=digest)
+        return self.object_path(digest)
+
+    def _download(self, url):
+        with self._url_lock(url):
+            # Another thread may have finished this URL while we waited
+            entry = self.entry(url)
+            headers = {}
+            cached = self.cached_path(url) if entry else None
+            if cached and time.time() - entry.get('checked', 0) < REVALIDATE_INTERVAL:
+                return cached
+            if cached:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+
+            part_path = os.path.join(self.partial_dir, hashlib.sha1(url.encode()).hexdigest())
+            part_meta = self._read_part_meta(part_path)
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) and part_meta else 0
+            if offset and not cached:
+                headers['Range'] = f"bytes={offset}-"
+                validator = part_meta.get('etag') or part_meta.get('last_modified')
+                if validator:
+                    headers['If-Range'] = validator
+
+            try:
+                with self.session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                    if response.status_code == 304 and cached:
+                        self._update_entry(url, checked=time.time())
+                        logger.info(f"Sound file not modified, using cached copy: {url}")
+                        return cached
+                    if response.status_code == 416:
+                        # Our partial file no longer matches the resource; start over next time
+                        os.remove(part_path)
+                        self._remove_part_meta(part_path)
+                    response.raise_for_status()
+                    return self._store_response(url, response, part_path, offset)
+            except (requests.RequestException, OSError) as e:
+                logger.error(f"Error downloading sound file {url}: {e}")
+                return cached
+
+    def _store_response(self, url, response, part_path, offset):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        digest = hashlib.sha256()
+        if response.status_code == 206 and offset:
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            mode, size = 'ab', offset
+            logger.info(f"Resuming sound file download at byte {offset}: {url}")
+        else:
+            mode, size = 'wb', 0
+
+        self._write_part_meta(part_path, etag, last_modified)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_DOWNLOAD_BYTES:
+                    f.close()
+                    os.remove(part_path)
+                    self._remove_part_meta(part_path)
+                    raise OSError(f"Sound file exceeds {MAX_DOWNLOAD_BYTES} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+
+        object_path = self.object_path(digest.hexdigest())
+        os.replace(part_path, object_path)
+        self._remove_part_meta(part_path)
+        self._update_entry(url, sha256=digest.hexdigest(), etag=etag, last_modified=last_modified,
+                           size=size, checked=time.time())
+        logger.info(f"Stored sound file {url} ({size} bytes) as {digest.hexdigest()[:12]}")
+        self._evict(keep=digest.hexdigest())
+        return object_path
+
+    def _read_part_meta(self, part_path):
+        try:
+            with open(f"{part_path}.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_part_meta(self, part_path, etag, last_modified):
+        with open(f"{part_path}.json", 'w') as f:
+            json.dump({"etag": etag, "last_modified": last_modified}, f)
+
+    def _remove_part_meta(self, part_path):
+        try:
+            os.remove(f"{part_path}.json")
+        except OSError:
+            pass
+
+    def _update_entry(self, url, **fields):
+        self._modify_index(lambda index: index.setdefault(url, {}).update(fields))
+
+    def _evict(self, keep=None):
+        # keep is the object just stored, whose path is about to be returned to the caller.
+        # Older paths handed out earlier can still disappear; readers treat that as a miss.
+        objects = []
+        for name in os.listdir(self.objects_dir):
+            if name == keep:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.objects_dir, name))
+            except FileNotFoundError:
+                continue
+            objects.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in objects)
+        if keep:
+            total += self._size(keep)
+        if total <= self.max_bytes:
+            return
+
+        def remove_objects(index):
+            nonlocal total
+            for _, size, name in sorted(objects):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self.object_path(name))
+                except FileNotFoundError:
+                    pass  # Already evicted by another process
+                total -= size
+                for url in [u for u, e in index.items() if e.get('sha256') == name]:
+                    del index[url]
+        self._modify_index(remove_objects)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AudioStore()
+        return _store
+
+
+def get_downloaded_audio_data(file_path):
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        logger.error(f"Error reading downloaded audio file {file_path}: {e}")
+        return None
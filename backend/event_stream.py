@@ -0,0 +1,89 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_BUFFER_SIZE = 100  # Events buffered per client before the oldest are dropped
+KEEPALIVE_INTERVAL = 15       # Seconds between SSE comments on an idle stream
+# Each open stream holds a gunicorn thread for as long as the client stays connected; keep this
+# well below the thread count (gunicorn.conf.py) so ordinary requests are always served
+MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', 4))
+
+
+class Subscriber:
+    def __init__(self, buffer_size):
+        self.events = queue.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def put(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                # Slow client: drop its oldest event rather than block the publisher
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class EventBroker:
+    # Fans events out to the /events clients of this process only; events published in
+    # another worker never reach them, hence the single gunicorn worker (gunicorn.conf.py)
+    def __init__(self, buffer_size=SUBSCRIBER_BUFFER_SIZE, max_subscribers=MAX_SUBSCRIBERS):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.rejected = 0
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def publish(self, event_type, data=None):
+        event = {"id": next(self.ids), "type": event_type, "time": time.time(), "data": data or {}}
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def subscribe(self):
+        # None when max_subscribers streams are already open
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            subscriber = Subscriber(self.buffer_size)
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def stream(self, subscriber, keepalive=KEEPALIVE_INTERVAL):
+        # Generator for a text/event-stream response; unsubscribes when the client goes away
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = subscriber.events.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscriber.dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'count': subscriber.dropped})}\n\n"
+                    subscriber.dropped = 0
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self.lock:
+            return {"subscribers": len(self.subscribers), "max_subscribers": self.max_subscribers,
+                    "rejected": self.rejected}
@@ -0,0 +1,17 @@
+import os
+
+# langiot owns the NFC reader and keeps write jobs, live events and the playback queue in
+# process memory, so it must run in exactly one worker. Threads serve concurrent requests;
+# long-lived event streams are capped (event_stream.MAX_SUBSCRIBERS, write_jobs.MAX_STREAMS)
+# well below the thread count so they can never take every thread.
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+
+def on_starting(server):
+    # A --workers/-w override would start a second read loop on the same reader and
+    # answer job and event requests from a process that never saw the job
+    if server.num_workers != 1:
+        server.log.warning(f"langiot must run in a single worker, ignoring workers={server.num_workers}")
+        server.num_workers = 1
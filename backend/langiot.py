@@ -1,38 +1,42 @@
-from pathlib import Path
-from io import BytesIO
 import requests
 import time
 from pydub import AudioSegment
-from pydub.playback import play
 import numpy as np
 import json
-import re
+import hashlib
 import io
 import os
 import signal
 import sys
-import wave
-import board
-import busio
 import logging
 import configparser
 import threading
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-from digitalio import DigitalInOut
-from adafruit_pn532.i2c import PN532_I2C  # pip install adafruit-blinka adafruit-circuitpython-pn532
-import subprocess
-import queue
-from piper import PiperVoice
-from piper.download import ensure_voice_exists, get_voices, find_voice
-from piper import PiperVoice
-from piper.download import ensure_voice_exists, get_voices, find_voice
-
-audio_queue = queue.Queue()
-audio_thread = None
+from log_pipeline import setup_logging, get_recent_logs, get_logging_stats, Lazy
+from static_assets import precompress_assets, send_asset
+from config_store import ConfigStore
+from tag_payload import SchemaValidators, decode_tag_payload
+from tag_layout import encode_tag_layout, read_tag_layout, get_tag_read_stats
+import audio_codecs
+from write_jobs import WriteJobQueue
+from audio_probe import probe_audio
+from batch_provisioning import ProvisioningSession
+from event_stream import EventBroker
+from reader_supervisor import ReaderSupervisor
+from nfc_transport import reader_settings, open_reader  # pip install adafruit-blinka adafruit-circuitpython-pn532
+from wifi_manager import WifiManager, WifiError, ERROR_STATUS
+from tts_worker import TTSWorker, TTS_TIMEOUT, PRIORITY_LOW
+from audio_sequencer import PlaylistSequencer, Clip, CLIP_TIMEOUT
+from languages import SUPPORTED_LANGUAGES
+from upload_spool import spool_upload, UploadError, MAX_UPLOAD_BYTES
+from scan_history import ScanHistory, payload_hash
+from cache_warmer import CacheWarmer
+from telemetry import TelemetrySpool
 
 # Configure the paths
-PIPER_MODEL_NAME = "en_US-lessac-medium"
+PIPER_VOICE = os.getenv('PIPER_VOICE', 'en_US-lessac')  # Quality is chosen by on-device calibration
+PIPER_MODEL_NAME = os.getenv('PIPER_MODEL_NAME', '')      # e.g. en_US-lessac-medium to skip calibration
 PIPER_DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), ".piper", "downloads")
 PIPER_DATA_DIRS = [PIPER_DOWNLOAD_DIR]  # No data directories specified
 
@@ -61,33 +65,25 @@ CONNECTED_TO_SERVER = False
 # Use environment variables if they are set, otherwise use the default values
 CONFIG_FILE_PATH = os.getenv('CONFIG_FILE_PATH', DEFAULT_CONFIG_PATH)
 WEB_APP_PATH = os.getenv('WEB_APP_PATH', DEFAULT_WEB_APP_PATH)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_RING_LEVEL = os.getenv('LOG_RING_LEVEL', 'INFO').upper()
+LOG_RING_SIZE = int(os.getenv('LOG_RING_SIZE', '500'))
 
 
-# Configure the paths
-PIPER_MODEL_NAME = "en_US-lessac-medium"
-PIPER_DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), ".piper", "downloads")
-PIPER_DATA_DIRS = [PIPER_DOWNLOAD_DIR]  # No data directories specified
-
-# Set synthesis parameters
-PIPER_SYNTHESIS_ARGS = {
-    "speaker_id": 0,
-    "length_scale": 1.0,
-    "noise_scale": 0.667,
-    "noise_w": 0.8,
-    "sentence_silence": 0.0,
-}
-
 # Declare read_thread as a global variable
 read_thread = None
 config = configparser.ConfigParser()
+config_store = ConfigStore(CONFIG_FILE_PATH)
+schema_validators = SchemaValidators()
 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger()
+# Configure logging: records are queued and written by a background thread
+logger = setup_logging(level=getattr(logging, LOG_LEVEL, logging.INFO),
+                       ring_level=getattr(logging, LOG_RING_LEVEL, logging.INFO),
+                       ring_size=LOG_RING_SIZE)
 
 # Flask application setup
-app = Flask(__name__, static_folder=os.path.join(WEB_APP_PATH, 'static'))
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
 logger.info(f"Config File: {CONFIG_FILE_PATH}")
@@ -95,6 +91,15 @@ logger.info(f"Web App Path: {WEB_APP_PATH}")
 
 # Define threading event
 read_pause_event = threading.Event()
+# Serializes access to the PN532 between the read loop and write jobs
+pn532_lock = threading.Lock()
+WRITE_TAG_TIMEOUT = 10  # Seconds a write job waits for a tag to be presented
+provisioning_session = None
+# Live scan/playback/write events for the admin UI
+events = EventBroker()
+scan_history = ScanHistory()
+# Persistent NetworkManager D-Bus client for the Wi-Fi endpoints
+wifi_manager = WifiManager()
 
 class MockPN532:
     def __init__(self):
@@ -110,20 +115,23 @@ class MockPN532:
 def init_nfc_reader():
     if os.environ['TESTMODE'] == 'True':
       logger.info("Initializing NFC Reader (Mock Implementation)")
-      return MockPN532()
+      return ReaderSupervisor(MockPN532(), on_recovery=on_reader_recovery)
 
-    logger.info("Initializing NFC Reader")
-    i2c = busio.I2C(board.SCL, board.SDA)
-    reset_pin = DigitalInOut(board.D6)  # Adjust as per your connection
-    pn532 = PN532_I2C(i2c, reset=reset_pin)
-    pn532.SAM_configuration()
-    return pn532
+    # Transport, bus speed and pins come from the [Reader] section; changes need a restart
+    settings = reader_settings(config_store.get())
+    logger.info(f"Initializing NFC Reader over {settings['transport']}")
+    pn532, reset_pin = open_reader(settings)
+    # The supervisor resets the chip through reset_pin when it stalls or keeps failing
+    return ReaderSupervisor(pn532, reset_pin=reset_pin, on_recovery=on_reader_recovery)
+
+def on_reader_recovery(recovery):
+    events.publish('reader_recovered', recovery)
 
 pn532 = init_nfc_reader()
 
 @app.before_request
 def log_request_info():
-    logger.info(f"Request URL: {request.url}")
+    logger.debug("Request: %s %s", request.method, request.path)
 
 
 # Flask Endpoints
@@ -135,57 +143,248 @@ def health_check():
         app.logger.error(f"Health check failed: {e}")
         return jsonify({"status": "unhealthy", "details": str(e)}), 500
 
+@app.route('/events', methods=['GET'])
+def event_stream():
+    subscriber = events.subscribe()
+    if subscriber is None:
+        return jsonify({"error": "Too many open event streams"}), 503, {"Retry-After": "10"}
+    response = Response(events.stream(subscriber), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Also runs if the client leaves before the stream starts
+    response.call_on_close(lambda: events.unsubscribe(subscriber))
+    return response
+
+@app.route('/debug/logs', methods=['GET'])
+def debug_logs():
+    limit = request.args.get('limit', default=100, type=int)
+    level = getattr(logging, request.args.get('level', 'NOTSET').upper(), logging.NOTSET)
+    return jsonify({"logs": get_recent_logs(limit, level), "stats": get_logging_stats()}), 200
+
 # Route for static files
 react_build_directory = os.path.abspath(WEB_APP_PATH)
 
+# Build .gz/.br variants in the background so startup isn't delayed
+threading.Thread(target=precompress_assets, args=(react_build_directory,), daemon=True).start()
+
+@app.route('/static/<path:filename>')
+def serve_admin_static(filename):
+    return send_asset(react_build_directory, f"static/{filename}")
+
 @app.route('/<filename>')
 def serve_admin_root_files(filename):
     if filename in ['manifest.json', 'favicon.ico', 'logo192.png', 'logo512.png']:
-        return send_from_directory(react_build_directory, filename)
+        return send_asset(react_build_directory, filename)
     # Forward to the catch-all route for other paths
     return serve_admin(filename)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_admin(path):
-    return send_from_directory(react_build_directory, 'index.html')
+    return send_asset(react_build_directory, 'index.html')
 
 @app.route('/perform_http_request', methods=['POST'])
 def perform_http_request_endpoint():
     data = request.json
-    result = perform_http_request(data)
+    # The browser plays this response itself, so only ask for containerized formats
+    result, content_type = request_audio(data, "generate-speech", containerized_only=True)
+    if result is None:
+        return jsonify({"error": "Failed to get audio from server"}), 502
+    codec = audio_codecs.detect_codec(result, content_type)
+    mimetype, extension = audio_codecs.CODECS.get(codec, audio_codecs.CODECS['mp3'])
     return send_file(
         io.BytesIO(result),
-        mimetype="audio/mpeg",
+        mimetype=mimetype,
         as_attachment=True,
-        attachment_filename="audio.mp3"
+        download_name=f"audio.{extension}"
     )
 
+@app.route('/reader/stats', methods=['GET'])
+def reader_stats():
+    return jsonify(dict(pn532.stats(), tag_reads=get_tag_read_stats())), 200
+
+@app.route('/tts/stats', methods=['GET'])
+def tts_stats():
+    return jsonify(tts_worker.get_stats()), 200
+
+@app.route('/audio/codec_stats', methods=['GET'])
+def codec_stats():
+    return jsonify(audio_codecs.get_codec_stats()), 200
+
+@app.route('/audio/playback_stats', methods=['GET'])
+def playback_stats():
+    return jsonify(audio_sequencer.get_stats()), 200
+
+@app.route('/audio/phrase_stats', methods=['GET'])
+def phrase_stats():
+    return jsonify(phrase_audio.get_stats()), 200
+
+PLAY_AUDIO_MAX_UPLOADS = int(os.getenv('PLAY_AUDIO_MAX_UPLOADS', 2))  # Concurrent uploads being spooled
+PLAY_AUDIO_RETRY_AFTER = 2
+play_audio_uploads = threading.BoundedSemaphore(PLAY_AUDIO_MAX_UPLOADS)
+
+def playback_queue_headers():
+    return {"X-Playback-Queue-Depth": str(audio_sequencer.queue_depth()),
+            "X-Playback-Queue-Limit": str(audio_sequencer.max_queued)}
+
+def play_audio_refused(status, message):
+    audio_sequencer.note_rejected()
+    headers = dict(playback_queue_headers(), **{"Retry-After": str(PLAY_AUDIO_RETRY_AFTER)})
+    return jsonify({"error": message}), status, headers
+
+@app.route('/history/top_tags', methods=['GET'])
+def history_top_tags():
+    limit = request.args.get('limit', default=10, type=int)
+    days = request.args.get('days', default=30, type=float)
+    return jsonify(scan_history.top_tags(limit, time.time() - days * 86400)), 200
+
+@app.route('/history/failures', methods=['GET'])
+def history_failures():
+    return jsonify(scan_history.recent_failures(request.args.get('limit', default=20, type=int))), 200
+
+@app.route('/history/latency', methods=['GET'])
+def history_latency():
+    days = request.args.get('days', default=7, type=float)
+    return jsonify(scan_history.latency_percentiles(time.time() - days * 86400)), 200
+
+@app.route('/history/stats', methods=['GET'])
+def history_stats():
+    return jsonify(scan_history.get_stats()), 200
+
+@app.route('/cache/warming_stats', methods=['GET'])
+def warming_stats():
+    return jsonify(cache_warmer.get_stats()), 200
+
+@app.route('/telemetry/stats', methods=['GET'])
+def telemetry_stats():
+    return jsonify(telemetry.get_stats()), 200
+
 @app.route('/play_audio', methods=['POST'])
 def play_audio_endpoint():
-    audio_file = request.files.get('audioData')
-    if audio_file:
-        play_audio(audio_file.read())
-        return jsonify({"message": "Audio playback initiated"}), 200
-    else:
-        return jsonify({"error": "No audio data received"}), 400
+    # Refuse before reading the body so a full backlog costs the device nothing
+    if audio_sequencer.backlog_full():
+        return play_audio_refused(429, "Playback queue is full")
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({"error": f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"}), 413
+    if not play_audio_uploads.acquire(blocking=False):
+        return play_audio_refused(503, "Too many uploads in progress")
+
+    try:
+        # Streams the multipart body into a spool: memory first, disk past the threshold
+        spool, content_type, size = spool_upload(request.stream, request.headers.get('Content-Type', ''), 'audioData')
+    except UploadError as e:
+        return jsonify({"error": e.message}), e.status
+    except OSError as e:
+        logger.error(f"Failed to spool audio upload: {e}")
+        return play_audio_refused(503, "No space to buffer the upload")
+    except ValueError as e:
+        return jsonify({"error": f"Malformed upload: {e}"}), 400
+    finally:
+        play_audio_uploads.release()
+
+    def load():
+        with spool:
+            return spool.read(), content_type
+    logger.info(f"Spooled {size} bytes of uploaded audio ({content_type})")
+    audio_sequencer.play([Clip(loader=load, label='upload')])
+    return jsonify({"message": "Audio playback initiated"}), 200, playback_queue_headers()
 
 
 @app.route('/handle_write', methods=['POST'])
 def handle_write_endpoint():
     json_str = request.json.get('json_str')
-    handle_write_request(json_str)
-    return jsonify({"message": "Write to NFC tag initiated"}), 200
+    if not json_str or not is_valid_json(json_str):
+        return jsonify({"error": "A valid json_str is required"}), 400
+    job = write_jobs.submit(json_str)
+    return jsonify({"message": "Write to NFC tag initiated", "job_id": job.id, "job": job.to_dict()}), 202
+
+@app.route('/write_jobs/<job_id>', methods=['GET'])
+def get_write_job(job_id):
+    job = write_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown write job"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/write_jobs/<job_id>/events', methods=['GET'])
+def stream_write_job(job_id):
+    if write_jobs.get(job_id) is None:
+        return jsonify({"error": "Unknown write job"}), 404
+    if not write_jobs.open_stream():
+        return jsonify({"error": "Too many open job streams, poll /write_jobs/<id> instead"}), 503, {"Retry-After": "2"}
+    response = Response(write_jobs.stream(job_id), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(write_jobs.close_stream)
+    return response
+
+@app.route('/provisioning', methods=['POST'])
+def start_provisioning():
+    global provisioning_session
+    payloads = request.json.get('payloads') if request.json else None
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({"error": "A non-empty list of payloads is required"}), 400
+    payloads = [p if isinstance(p, str) else json.dumps(p) for p in payloads]
+    invalid = [i for i, p in enumerate(payloads) if not is_valid_json(p)]
+    if invalid:
+        return jsonify({"error": "Invalid JSON payloads", "indexes": invalid}), 400
+    if provisioning_session and provisioning_session.active:
+        return jsonify({"error": "A provisioning session is already running"}), 409
+
+    provisioning_session = ProvisioningSession(payloads, encode_tag_data)
+    logger.info(f"Provisioning session {provisioning_session.id} started with {len(payloads)} payloads")
+    events.publish('provisioning', provisioning_session.summary())
+    return jsonify(provisioning_session.summary()), 201
+
+@app.route('/provisioning', methods=['GET'])
+def get_provisioning():
+    if provisioning_session is None:
+        return jsonify({"error": "No provisioning session"}), 404
+    return jsonify(provisioning_session.summary()), 200
+
+@app.route('/provisioning', methods=['DELETE'])
+def stop_provisioning():
+    if provisioning_session is None:
+        return jsonify({"error": "No provisioning session"}), 404
+    provisioning_session.stop()
+    events.publish('provisioning', provisioning_session.summary())
+    return jsonify(provisioning_session.summary()), 200
 
 @app.route('/get_config', methods=['GET'])
 def get_config():
-    load_configuration()
+    current = load_configuration()
     current_config = {
-        'ServerName': config['DEFAULT'].get('ServerName', ''),
-        'ApiToken': config['DEFAULT'].get('ApiToken', '')
+        'ServerName': current['DEFAULT'].get('ServerName', ''),
+        'ApiToken': current['DEFAULT'].get('ApiToken', '')
     }
     return jsonify(current_config), 200
 
+@app.route('/bootstrap', methods=['GET'])
+def bootstrap():
+    # Everything the admin UI needs at load; cheap to rebuild, and a 304 when the ETag still matches
+    current = load_configuration()
+    try:
+        networks, networks_error = wifi_manager.cached_networks(), None
+    except WifiError as e:
+        networks, networks_error = [], e.to_dict()
+    body = {
+        "config": {
+            'ServerName': current['DEFAULT'].get('ServerName', ''),
+            'ApiToken': current['DEFAULT'].get('ApiToken', ''),
+        },
+        "networks": networks,
+        "networksError": networks_error,
+        "status": {
+            "connectedToServer": CONNECTED_TO_SERVER,
+            "readerReady": not pn532.needs_recovery,
+            "ttsVoice": tts_worker.voice,
+            "provisioning": bool(provisioning_session and provisioning_session.active),
+        },
+        "languages": SUPPORTED_LANGUAGES,
+    }
+    payload = json.dumps(body, sort_keys=True)
+    response = app.response_class(payload, mimetype='application/json')
+    response.set_etag(hashlib.sha1(payload.encode()).hexdigest()[:20])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/update_config', methods=['POST'])
 def update_config():
     new_config = request.json
@@ -195,83 +394,56 @@ def update_config():
 @app.route('/wifi-networks', methods=['GET'])
 def list_networks():
     try:
-        networks = get_networks()
-        return jsonify(networks)
+        return jsonify(get_networks())
+    except WifiError as e:
+        return jsonify(e.to_dict()), ERROR_STATUS[e.code]
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/wifi-networks', methods=['POST'])
 def add_network():
     try:
-        ssid = request.json.get('ssid')
-        psk = request.json.get('psk')
-        key_mgmt = request.json.get('key_mgmt', 'WPA-PSK')
-
-        if not ssid or not psk:
-            logging.warning("Attempt to add a network without providing both SSID and PSK.")
-            return jsonify({"error": "SSID and PSK are required"}), 400
-
-        result = subprocess.run(['sudo', './networkadd.sh', ssid, psk, key_mgmt], capture_output=True, text=True)
-
-        if result.returncode != 0:
-            logging.error(f"Script error when adding network {ssid}: {result.stderr}")
-            return jsonify({"error": "Failed to add network, please check system logs"}), 500
-
-        logging.info(f"Successfully added network: {ssid}")
+        data = request.json or {}
+        # A list of {ssid, psk, key_mgmt} adds several networks in one request
+        if isinstance(data.get('networks'), list):
+            results = wifi_manager.add_networks(data['networks'])
+            failed = any(r['status'] == 'failed' for r in results)
+            return jsonify({"results": results}), 207 if failed else 201
+
+        wifi_manager.add_network(data.get('ssid'), data.get('psk'), data.get('key_mgmt', 'WPA-PSK'))
         return jsonify({"message": "Network added"}), 201
+    except WifiError as e:
+        logger.warning(f"Failed to add Wi-Fi network: {e.message}")
+        return jsonify(e.to_dict()), ERROR_STATUS[e.code]
     except Exception as e:
-        logging.exception(f"Unexpected error adding Wi-Fi network: {e}")
+        logger.exception(f"Unexpected error adding Wi-Fi network: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/wifi-networks', methods=['DELETE'])
 def delete_network():
     try:
-        ssid_to_delete = request.json.get('ssid')
-        if not ssid_to_delete:
-            logging.warning("Attempt to delete a network without specifying SSID.")
-            return jsonify({"error": "SSID is required for deletion"}), 400
-
-        result = subprocess.run(['sudo', './networkdelete.sh', ssid_to_delete], capture_output=True, text=True)
+        data = request.json or {}
+        if isinstance(data.get('ssids'), list):
+            results = wifi_manager.delete_networks(data['ssids'])
+            failed = any(r['status'] == 'failed' for r in results)
+            return jsonify({"results": results}), 207 if failed else 200
 
-        if result.returncode != 0:
-            logging.error(f"Script error when deleting network {ssid_to_delete}: {result.stderr}")
-            return jsonify({"error": "Failed to delete network, please check system logs"}), 500
-
-        logging.info(f"Successfully deleted network: {ssid_to_delete}")
+        wifi_manager.delete_network(data.get('ssid'))
         return jsonify({"message": "Network deleted"}), 200
+    except WifiError as e:
+        logger.warning(f"Failed to delete Wi-Fi network: {e.message}")
+        return jsonify(e.to_dict()), ERROR_STATUS[e.code]
     except Exception as e:
-        logging.exception(f"Unexpected error deleting Wi-Fi network: {e}")
+        logger.exception(f"Unexpected error deleting Wi-Fi network: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 
 
-def get_active_network():
-    try:
-        # Using 'nmcli' to get the current network SSID
-        cmd = "nmcli device show wlan0 | grep GENERAL.CONNECTION | awk -F' ' '{print $2}'"
-        ssid = subprocess.check_output(cmd, shell=True).strip()
-        if ssid:
-            ssid_str = ssid.decode('utf-8')
-            generate_tts(f"Successfully connected to Wi-Fi network {ssid_str}", "en")
-        return ssid_str if ssid else None
-    except Exception as e:
-        logging.error(f"Error getting active network: {e}")
-        return None
-
 def get_networks():
     try:
-        networks = []
-        # Using 'nmcli' to get all Wi-Fi networks
-        cmd = "nmcli --terse --fields TYPE,NAME con show | awk -F: '$1 == \"802-11-wireless\" {print $2}'"
-        for network in subprocess.check_output(cmd, shell=True).decode('utf-8').split('\n'):
-            if network:
-                networks.append({"ssid": network})
-        active_ssid = get_active_network()
-        return [{"ssid": network.get('ssid', ''),
-                 "isConnected": (network.get('ssid', '') == active_ssid)}
-                for network in networks]
-    except Exception as e:
-        logging.error(f"Error reading Wi-Fi configurations: {e}")
+        return wifi_manager.list_networks()
+    except WifiError as e:
+        logger.error(f"Error reading Wi-Fi configurations: {e.message}")
         raise
 
 
@@ -300,10 +472,13 @@ def parse_wpa_supplicant_conf(file_path):
 
 
 def load_configuration():
-    global SERVER_NAME, API_TOKEN, HEADERS
+    # Cheap when unchanged: only a stat() unless the file was modified (by any process)
+    return config_store.get()
 
-    config.read(CONFIG_FILE_PATH)
+def apply_configuration(new_config, version):
+    global config, SERVER_NAME, API_TOKEN, HEADERS
 
+    config = new_config
     SERVER_NAME = config['DEFAULT'].get('ServerName', '')
     API_TOKEN = config['DEFAULT'].get('ApiToken', '')
     HEADERS = {
@@ -314,83 +489,53 @@ def load_configuration():
 def update_configuration(new_config):
     try:
         # Update with new values
+        changes = {}
         if 'ServerName' in new_config:
-            config['DEFAULT']['ServerName'] = new_config['ServerName']
+            changes['ServerName'] = new_config['ServerName']
         if 'ApiToken' in new_config:
-            config['DEFAULT']['ApiToken'] = new_config['ApiToken']
-
-        # Write changes back to the config file
-        with open(CONFIG_FILE_PATH, 'w') as configfile:
-            config.write(configfile)
+            changes['ApiToken'] = new_config['ApiToken']
 
-        # Reload configuration
-        load_configuration()
+        # Write atomically; subscribers are notified of the new version
+        version = config_store.update({'DEFAULT': changes})
 
-        return {"message": "Configuration updated successfully"}
+        return {"message": "Configuration updated successfully", "version": version}
     except Exception as e:
         logger.error(f"Failed to update configuration: {e}")
         return {"error": str(e)}
 
 
-def handle_write_request(json_str):
-    read_pause_event.set()  # Pause the read loop
-    time.sleep(1)  # Allow time for read loop to pause
-    write_nfc(pn532, json_str)  # Perform the write operation
-    beep_sound = generate_beep(frequency=1000, duration=0.1, volume=0.1)
-    play(beep_sound)
-    read_pause_event.clear()  # Resume the read loop
-
+def handle_write_request(job, progress):
+    # Runs on the write-job worker; the read loop is paused while we hold the reader
+    read_pause_event.set()
+    try:
+        with pn532_lock:
+            progress(status='waiting_for_tag')
+            deadline = time.monotonic() + WRITE_TAG_TIMEOUT
+            while check_for_nfc_tag(pn532) is None:
+                if time.monotonic() > deadline:
+                    raise Exception("No NFC tag presented")
 
+            progress(status='writing')
+            pages = write_nfc(pn532, job.payload,
+                              progress=lambda written, total: progress(pages_written=written, pages_total=total))
+            verified = verify_nfc_write(pn532, job.payload)
+        progress(verified=verified)
+        if not verified:
+            raise Exception(f"Verification failed after writing {pages} pages")
+    finally:
+        read_pause_event.clear()  # Resume the read loop
 
+    beep()
 
-def play_audio(audio_data, volume_change_dB=-5):
-    global audio_queue, audio_thread
+write_jobs = WriteJobQueue(handle_write_request)
+write_jobs.add_listener(lambda job: events.publish('write_job', job))
 
-    def audio_playback_worker():
-        while True:
-            try:
-                audio_data = audio_queue.get(block=True)
-                logger.info("Loading audio data into stream.")
-                audio_stream = io.BytesIO(audio_data)
-
-                # Determine the audio format
-                try:
-                    with wave.open(audio_stream, 'r') as wav:
-                        audio_format = 'wav'
-                except wave.Error:
-                    audio_stream.seek(0)
-                    audio_format = 'mp3'
-
-                audio_stream.seek(0)
-                audio = AudioSegment.from_file(audio_stream, format=audio_format)
-                silence = AudioSegment.silent(duration=100)  # 100 milliseconds of silence
-                audio = silence + audio
-
-                # Adjust volume
-                if volume_change_dB < 0:
-                    logger.info(f"Reducing volume by {-volume_change_dB} dB.")
-                    audio = audio - (-volume_change_dB)
-                elif volume_change_dB > 0:
-                    logger.info(f"Increasing volume by {volume_change_dB} dB.")
-                    audio = audio.apply_gain(volume_change_dB)
-
-                audio = audio.set_channels(2)
-                if audio_format == 'wav':
-                    audio = audio.set_frame_rate(22050)
-
-                logger.info("Audio data loaded, starting playback.")
-                play(audio)
-                logger.info("Audio playback finished.")
-                audio_queue.task_done()
-            except Exception as e:
-                logger.error(f"Error playing audio: {e}")
-                audio_queue.task_done()
 
-    if audio_thread is None or not audio_thread.is_alive():
-        audio_thread = threading.Thread(target=audio_playback_worker, daemon=True)
-        audio_thread.start()
+# Scan responses are played as one gapless playlist; see audio_sequencer
+audio_sequencer = PlaylistSequencer(audio_codecs.decode_audio, events.publish)
 
-    audio_queue.put(audio_data)
+def play_audio(audio_data, volume_change_dB=-5, content_type=None):
+    audio_sequencer.play([Clip(audio_data, content_type)], volume_change_dB)
 
 def generate_beep(frequency=1000, duration=0.2, volume=0.1, sample_rate=44100):
     # Generate a sine wave
@@ -416,61 +561,17 @@ def generate_beep(frequency=1000, duration=0.2, volume=0.1, sample_rate=44100):
 
     return beep_sound
 
-def is_valid_schema(data, schema_section):
-    if not config.has_section(schema_section):
-        logger.error(f"Schema section '{schema_section}' not found in configuration.")
-        return False
-
-    if not isinstance(data, dict):
-        logger.error("Data is not a dictionary.")
-        return False
-
-    schema = config[schema_section]
-    for key, value_type in schema.items():
-        if key not in data:
-            logger.error(f"Key '{key}' not found in data.")
-            return False
-
-        if not hasattr(__builtins__, value_type):
-            logger.error(f"Invalid type '{value_type}' in schema.")
-            return False
-
-        expected_type = getattr(__builtins__, value_type)
-        if not isinstance(data[key], expected_type):
-            logger.error(f"Data type for '{key}' does not match. Expected {value_type}, got {type(data[key]).__name__}.")
-            return False
-
-    logger.info(f"Data validated successfully against schema '{schema_section}'.")
-    return True
-
-def validate_json_data(hex_data):
-    try:
-        json_str = bytes.fromhex(hex_data).decode('utf-8')
-        data = json.loads(json_str)
-
-        if is_valid_schema(data, 'Schema_Localization') or is_valid_schema(data, 'Schema_Translation'):
-            return data
-    except (ValueError, json.JSONDecodeError, TypeError):
-        logger.error("Invalid JSON data")
-
-    return {"text": "No valid json found", "language": "en", "translations": []}
-
-def parse_tag_data(tag_data):
-    try:
-        if isinstance(tag_data, bytearray):
-            data_hex = ''.join(['{:02x}'.format(x) for x in tag_data])
-        elif isinstance(tag_data, str):
-            data_hex = tag_data  # If it's already a string, use it as is
-        else:
-            logger.error("Unsupported data type for tag data")
-            return None
-
-        logger.info(f"Tag Memory Data: {data_hex}")
-        return {"memory_data": data_hex}
-    except Exception as e:
-        logger.error(f"Error processing tag data: {e}")
-        return None
+beep_cache = {}
 
+def beep(frequency=1000, duration=0.1):
+    # Queued on the sequencer like any other clip; playing it directly would open a second
+    # output stream that competes with the sequencer's for the sound card
+    key = (frequency, duration)
+    if key not in beep_cache:
+        wav = io.BytesIO()
+        generate_beep(frequency=frequency, duration=duration, volume=0.1).export(wav, format='wav')
+        beep_cache[key] = wav.getvalue()
+    audio_sequencer.play([Clip(beep_cache[key], 'audio/wav', label='beep')], 0)
 
 def is_valid_json(json_str):
     try:
@@ -479,80 +580,94 @@ def is_valid_json(json_str):
     except json.JSONDecodeError:
         return False
 
-def write_nfc(pn532, json_str, start_page=4):
-    # Convert string to bytes
-    byte_data = json_str.encode()
+def encode_tag_data(json_str):
+    # CRC-protected header and segments, padded to whole pages (see tag_layout)
+    return encode_tag_layout(json_str.encode())
 
-    # Prepend the length of byte_data using 2 bytes
-    length_bytes = len(byte_data).to_bytes(2, 'big')  # 2 bytes for up to 65535
-    byte_data = length_bytes + byte_data
+def write_nfc(pn532, json_str, start_page=4, progress=None):
+    return write_tag_bytes(pn532, encode_tag_data(json_str), start_page, progress)
 
+
+def write_tag_bytes(pn532, byte_data, start_page=4, progress=None):
     # Define the page size (typically 4 bytes for NFC tags)
     page_size = 4
-
-    # Calculate the number of pages needed
-    num_pages = len(byte_data) // page_size + (len(byte_data) % page_size > 0)
+    num_pages = len(byte_data) // page_size
 
     # Write data to NFC tag
     for i in range(num_pages):
-        # Calculate page index
-        page = start_page + i
-
         # Get the byte chunk to write
         chunk = byte_data[i*page_size:(i+1)*page_size]
 
-        # Pad the chunk with zeros if it's less than the page size
-        while len(chunk) < page_size:
-            chunk += b'\x00'
-
         # Write the chunk to the tag
-        write_to_nfc_tag(pn532, page, list(chunk))
+        if not write_to_nfc_tag(pn532, start_page + i, list(chunk)):
+            raise Exception(f"Failed to write page {start_page + i}")
+        if progress:
+            progress(i + 1, num_pages)
 
     logger.info("JSON string written to NFC tag")
+    return num_pages
+
+
+def verify_nfc_write(pn532, json_str, start_page=4):
+    return verify_tag_bytes(pn532, encode_tag_data(json_str), start_page)
+
+
+def verify_tag_bytes(pn532, expected, start_page=4):
+    # One READ returns 4 pages, so verify 16 bytes at a time
+    block_size = 16
+    for offset in range(0, len(expected), block_size):
+        page = start_page + offset // 4
+        data = pn532.mifare_classic_read_block(page)
+        chunk = expected[offset:offset + block_size]
+        if data is None or bytes(data[:len(chunk)]) != chunk:
+            logger.error(f"Verification mismatch in pages {page}-{page + 3}")
+            return False
+    return True
+
+
+def provision_tag(uid):
+    # Batch provisioning: called from the read loop with the reader lock held
+    def write_and_verify(byte_data):
+        write_tag_bytes(pn532, byte_data)
+        if not verify_tag_bytes(pn532, byte_data):
+            raise Exception("Verification failed")
+
+    result = provisioning_session.handle_tag(uid, lambda: read_tag_memory(pn532), write_and_verify)
+    if result:
+        logger.info(f"Provisioned tag {result['uid']}: {result['status']} (payload {result['index']})")
+        events.publish('provisioning', provisioning_session.summary())
+    return result
 
 
 def write_to_nfc_tag(pn532, page, data):
     if not isinstance(page, int) or not (0 <= page <= 134):
         logger.error("Invalid page number for NFC tag write operation.")
-        return
+        return False
     if not isinstance(data, (list, tuple)) or len(data) != 4 or not all(isinstance(x, int) and 0 <= x < 256 for x in data):
         logger.error("Data must be a list or tuple of 4 bytes.")
-        return
+        return False
 
     try:
         pn532.ntag2xx_write_block(page, data)
-        logger.info(f"Data written to NFC tag at page {page}")
+        logger.debug("Data written to NFC tag at page %d", page)
+        return True
     except Exception as e:
         logger.error(f"Error writing to NFC tag: {e}")
+        return False
 
 
 def read_tag_memory(pn532, start_page=4):
+    # Failed or corrupted blocks are re-read while the tag is still in the field
     try:
-        logger.info("Reading length data from NFC tag.")
-        length_data = pn532.ntag2xx_read_block(start_page)
-        if length_data is None:
-            logger.error("Failed to read length data from NFC tag")
-            return None
-
-        length = int.from_bytes(length_data[:2], 'big')
-        logger.info(f"Data length: {length}")
-
-        page_size = 4
-        total_bytes_to_read = length + 2
-        total_pages_to_read = (total_bytes_to_read + page_size - 1) // page_size
-        tag_data = bytearray()
-        logger.info("Beginning to read tag memory.")
-        for i in range(total_pages_to_read):
-            data = pn532.ntag2xx_read_block(start_page + i)
-            if data is None:
-                logger.error(f"Failed to read page {start_page + i}")
-                break
-            tag_data.extend(data)
-        logger.info("Tag memory reading completed.")
-        return tag_data[2:2 + length]
+        result = read_tag_layout(pn532.mifare_classic_read_block, start_page)
     except Exception as e:
         logger.error(f"Error while reading NFC tag memory: {e}")
         return None
+    if result.retries:
+        logger.info(f"Tag memory read (layout v{result.version}) after {result.retries} block re-reads")
+    else:
+        logger.debug("Tag memory read (layout v%d)", result.version)
+    return result.body
 
 
 def check_for_nfc_tag(pn532):
@@ -563,54 +678,59 @@ def check_for_nfc_tag(pn532):
     return None
 
 
-def is_valid_audio_file(file_path):
-    try:
-        audio = AudioSegment.from_file(file_path)
-        return True  # The file is a valid audio file
-    except Exception as e:
-        logger.error(f"Error loading audio file: {e}")
-        return False
-
-def cleanup_downloaded_audio_file():
-    file_path = '/tmp/local_audio.mp3'  # Path where the audio file is downloaded
-    try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Successfully deleted temporary audio file: {file_path}")
-        else:
-            logger.info(f"No temporary audio file found to delete at: {file_path}")
-    except Exception as e:
-        logger.error(f"Error deleting temporary audio file at {file_path}: {e}")
-
 def get_system_uptime_seconds():
     with open("/proc/uptime", "r") as f:
         uptime_seconds = float(f.readline().split()[0])
     return uptime_seconds
 
 
-def perform_http_request(data, prefix="generate-speech"):
-    try:
-        url = f"{SERVER_NAME}/{prefix}"
-        if prefix == "healthz":
-            response = requests.get(url, timeout=10)
+# One keep-alive connection pool for all requests to the server
+http = requests.Session()
+
+def send_http_request(data, prefix, extra_headers=None):
+    load_configuration()
+    url = f"{SERVER_NAME}/{prefix}"
+    if prefix == "healthz":
+        response = http.get(url, timeout=10)
+    else:
+        if 'memory_data' in data:
+            content = json.loads(data['memory_data'])
+            logger.debug("Content parsed from memory_data: %s", content)
         else:
-            if 'memory_data' in data:
-                content = json.loads(data['memory_data'])
-                logger.info(f"Content parsed from memory_data: {content}")
-            else:
-                content = data
-                logger.info(f"Using provided data as content: {content}")
+            content = data
+            logger.debug("Using provided data as content: %s", content)
+
+        headers = dict(HEADERS, **extra_headers) if extra_headers else HEADERS
+        response = http.post(url, headers=headers, json=content, timeout=10, stream=True)
 
-            response = requests.post(url, headers=HEADERS, json=content, timeout=10, stream=True)
+    logger.info(f"Response status code: {response.status_code}")
+    response.raise_for_status()
+    logger.info("Request successful.")
+    return response
 
-        logger.info(f"Response status code: {response.status_code}")
-        response.raise_for_status()
-        logger.info("Request successful.")
+def perform_http_request(data, prefix="generate-speech"):
+    try:
+        response = send_http_request(data, prefix)
         return response.content  # Directly return the binary content of the response
     except requests.RequestException as e:
         logger.error(f"HTTP request error: {e}")
         return None
 
+def request_audio(data, prefix="audio", containerized_only=False):
+    # Advertises the codecs this device decodes natively; returns (audio bytes, content type)
+    try:
+        accept = audio_codecs.accept_header(containerized_only)
+        response = send_http_request(data, prefix, {"Accept": accept})
+        content = response.content
+        content_type = response.headers.get('Content-Type', 'audio/mpeg')
+        codec = audio_codecs.detect_codec(content, content_type)
+        audio_codecs.record_transfer(codec, len(content))
+        logger.info(f"Received {len(content)} bytes of {codec} audio ({content_type})")
+        return content, content_type
+    except requests.RequestException as e:
+        logger.error(f"HTTP request error: {e}")
+        return None, None
+
 def check_server_health():
     global CONNECTED_TO_SERVER
     while True:
@@ -628,18 +748,184 @@ def check_server_health():
 
         time.sleep(HEALTH_CHECK_INTERVAL)
 
-from voice_model import load_voice_model
+# Piper runs in its own process so synthesis never holds the GIL or cores the scan loop needs
+tts_worker = TTSWorker(PIPER_MODEL_NAME or PIPER_VOICE, PIPER_DOWNLOAD_DIR, PIPER_SYNTHESIS_ARGS)
+tts_worker.start()
 
-voice = load_voice_model()
+def generate_tts(text, locale="en", timeout=TTS_TIMEOUT):
+    logger.info(f"Generate TTS: [{locale}] {text}")
+    if locale != "en":
+        text = "Only English is currently supported for offline text to speech."
+
+    try:
+        audio = tts_worker.synthesize(text, timeout=timeout)
+        logger.info(f"Generate TTS finished")
+        return audio
+    except Exception as e:
+        raise Exception(f"Local TTS: Failed to generate speech: {text} {locale} {e}")
+
+# Fixed prompts spoken on every scan; synthesized once and kept in memory
+STATUS_PROMPTS = ("Connected to server", "Not connected to server, only English Text to Speech is available")
+speech_cache = {}
+
+def cache_speech(text, future):
+    if not future.cancelled() and future.exception() is None:
+        speech_cache[text] = future.result()
 
-from download_audio import download_sound_file, get_downloaded_audio_data
+def speech_clip(text, locale="en"):
+    # Queues synthesis now; the sequencer waits for the WAV when the clip's turn comes
+    if locale != "en":
+        text = "Only English is currently supported for offline text to speech."
+    if text in speech_cache:
+        return Clip(speech_cache[text], 'audio/wav', label=text)
+    job = tts_worker.submit(text)
+    if text in STATUS_PROMPTS:
+        job.future.add_done_callback(lambda future: cache_speech(text, future))
+    return Clip.from_future(job.future, 'audio/wav', label=text)
+
+def warm_speech():
+    for text in STATUS_PROMPTS:
+        if text not in speech_cache:
+            tts_worker.submit(text, priority=PRIORITY_LOW).future.add_done_callback(
+                lambda future, text=text: cache_speech(text, future))
+
+def announce(text, locale="en"):
+    # Non-blocking speech for the scan loop
+    audio_sequencer.play([speech_clip(text, locale)])
+
+def sound_file_clip(sound_file_url, sound_file_future):
+    def load():
+        local_audio_file_path = sound_file_future.result(timeout=CLIP_TIMEOUT)
+        # Read once, then probe the bytes: the store may evict the file at any time
+        audio_data = get_downloaded_audio_data(local_audio_file_path) if local_audio_file_path else None
+        if local_audio_file_path and audio_data is None:
+            # Evicted since it was fetched; a cache miss, so download it again
+            local_audio_file_path = get_audio_store().fetch(sound_file_url)
+            audio_data = get_downloaded_audio_data(local_audio_file_path) if local_audio_file_path else None
+        audio_info = probe_audio(audio_data) if audio_data else None
+        if not audio_info:
+            logger.warning("Downloaded audio file is missing or not valid and will not be played.")
+            return None
+        logger.info(f"Local audio validated ({audio_info.codec}, {audio_info.duration}s)")
+        return audio_data, audio_codecs.CODECS[audio_info.codec][0]
+    return Clip(loader=load, label='soundFileUrl')
+
+from download_audio import get_audio_store, get_downloaded_audio_data
+from phrase_audio import PhraseAudio, SEGMENT_PREFIX
+
+# Translation tags can be fetched per phrase so shared phrases are cached once ([Audio] PhraseSegments)
+phrase_audio = PhraseAudio(get_audio_store(), lambda segment: request_audio(segment, SEGMENT_PREFIX))
+
+def uses_phrase_audio(payload_data):
+    return phrase_audio.enabled and schema_validators.match(payload_data) == 'Schema_Translation'
+
+# The server's speech for a whole tag is kept in the AudioStore too, so repeat scans skip synthesis
+SERVER_AUDIO_MAX_AGE = float(os.getenv('SERVER_AUDIO_MAX_AGE', 7 * 86400))  # Re-requested from the server after this
+
+def server_audio_key(payload_data):
+    # The response depends on the payload and on the codecs this device accepts
+    digest = hashlib.sha256(json.dumps([payload_data, audio_codecs.accept_header()], sort_keys=True).encode()).hexdigest()
+    return f"server:{digest}"
+
+def cached_server_audio_entry(payload_data):
+    # (path, index entry) of a fresh cached response, or (None, None)
+    store = get_audio_store()
+    key = server_audio_key(payload_data)
+    entry = store.entry(key)
+    if not entry or time.time() - entry.get('checked', 0) > SERVER_AUDIO_MAX_AGE:
+        return None, None
+    path = store.cached_path(key)
+    return (path, entry) if path else (None, None)
+
+def cached_server_audio(payload_data):
+    path, entry = cached_server_audio_entry(payload_data)
+    if not path:
+        return None, None
+    try:
+        os.utime(path)  # Track recency for eviction
+        with open(path, 'rb') as f:
+            return f.read(), entry.get('content_type')
+    except OSError:
+        return None, None
+
+def fetch_server_audio(payload_data):
+    server_audio_data, content_type = request_audio(payload_data, "audio")
+    if server_audio_data:
+        get_audio_store().put(server_audio_key(payload_data), server_audio_data, content_type=content_type)
+    return server_audio_data, content_type
+
+def audio_cached(payload_data):
+    # Whether everything this tag plays from the network is already local
+    sound_file_url = payload_data.get('soundFileUrl')
+    if uses_phrase_audio(payload_data):
+        speech_cached = phrase_audio.is_cached(payload_data)
+    else:
+        speech_cached = cached_server_audio_entry(payload_data)[0] is not None
+    return speech_cached and (not sound_file_url or get_audio_store().cached_path(sound_file_url) is not None)
+
+def warm_tag_audio(payload_data):
+    # Returns the bytes downloaded; cached items cost only a stat()
+    fetched = 0
+    sound_file_url = payload_data.get('soundFileUrl')
+    store = get_audio_store()
+    if sound_file_url and not store.cached_path(sound_file_url):
+        if store.fetch(sound_file_url):
+            fetched += (store.entry(sound_file_url) or {}).get('size', 0)
+    if not CONNECTED_TO_SERVER:
+        return fetched
+    if uses_phrase_audio(payload_data):
+        fetched += phrase_audio.prefetch(payload_data)
+    elif not cached_server_audio_entry(payload_data)[0]:
+        # The per-tag speech the server synthesizes on a scan
+        server_audio_data, _ = fetch_server_audio(payload_data)
+        fetched += len(server_audio_data) if server_audio_data else 0
+    return fetched
+
+# Preloads the most scanned tags at boot and when idle; pauses as soon as a scan arrives.
+# Only successful scans count, so unreadable or invalid tags are never warmed.
+cache_warmer = CacheWarmer(lambda limit, since: scan_history.top_tags(limit, since, status='ok'),
+                           warm_tag_audio, warm_speech)
+cache_warmer.start()
+
+def upload_telemetry(body, headers):
+    load_configuration()
+    if not SERVER_NAME:
+        raise requests.RequestException("No server configured")
+    response = http.post(f"{SERVER_NAME}/telemetry", data=body, headers=dict(HEADERS, **headers), timeout=30)
+    response.raise_for_status()
+
+# Scan events are spooled to disk and uploaded in gzip batches while no scans are arriving
+telemetry = TelemetrySpool(upload_telemetry, cache_warmer.is_idle)
+telemetry.start()
+
+def record_scan(uid, status, payload=None, schema=None, error=None, timings=None):
+    scan_history.record(uid, status, payload, schema, error, timings)
+    telemetry.record('scan', {"uid": uid, "status": status, "schema": schema, "payload_hash": payload_hash(payload),
+                              "error": error, **(timings or {})})
+
+def server_audio_clips(payload):
+    if phrase_audio.enabled and payload.schema == 'Schema_Translation':
+        segments = phrase_audio.resolve(payload.data)
+        if segments:
+            return [Clip(data, content_type, label=f"{segment['target']}: {segment['text']}")
+                    for segment, data, content_type in segments]
+        logger.info("Phrase audio incomplete, requesting the whole payload.")
+    server_audio_data, content_type = cached_server_audio(payload.data)
+    if server_audio_data:
+        logger.info("Server audio served from the local cache.")
+    else:
+        server_audio_data, content_type = fetch_server_audio(payload.data)
+    if not server_audio_data:
+        return []
+    logger.info("Server audio data received.")
+    return [Clip(server_audio_data, content_type, label='server')]
 
 def main():
     global read_thread
     last_uid = None
     tag_cleared = False  # State to track if we have seen an empty cycle
     logger.info("Script started, waiting for NFC tag.")
-    generate_tts("Ready to scan NFC tags", "en")
+    announce("Ready to scan NFC tags", "en")
 
     # Start server health check thread
     health_check_thread = threading.Thread(target=check_server_health)
@@ -651,11 +937,20 @@ def main():
     #else:
     #    generate_tts("Not connected to server, only English Text to Speech is available", "en")
 
+    def elapsed_ms(started):
+        return round((time.perf_counter() - started) * 1000, 1)
+
     def read_loop():
         nonlocal last_uid, tag_cleared
         while True:
+            scan_uid = None
             try:
-                nfc_data = check_for_nfc_tag(pn532)
+                if read_pause_event.is_set():
+                    time.sleep(0.1)
+                    continue
+
+                with pn532_lock:
+                    nfc_data = check_for_nfc_tag(pn532)
 
                 # Check if no tag is present and update the tag_cleared state
                 if not nfc_data:
@@ -665,51 +960,88 @@ def main():
                 # Proceed if a new NFC tag is detected and the reader has been cleared at least once
                 elif nfc_data and nfc_data != last_uid and tag_cleared:
                     last_uid = nfc_data
+                    if provisioning_session and provisioning_session.active:
+                        with pn532_lock:
+                            result = provision_tag(nfc_data)
+                        if result and result['status'] != 'failed':
+                            beep()
+                        elif result:
+                            beep(frequency=400, duration=0.3)
+                        continue
+
                     logger.info("New NFC tag detected, processing.")
-                    full_memory = read_tag_memory(pn532, start_page=4)
+                    uid_hex = bytes(nfc_data).hex() if isinstance(nfc_data, (bytes, bytearray)) else str(nfc_data)
+                    events.publish('scan', {"uid": uid_hex})
+                    scan_uid, scan_started, timings = uid_hex, time.perf_counter(), {}
+                    cache_warmer.note_scan(uid_hex)
+                    with pn532_lock:
+                        full_memory = read_tag_memory(pn532, start_page=4)
+                    timings['read_ms'] = elapsed_ms(scan_started)
                     logger.info("Tag memory read, processing data.")
-                    beep_sound = generate_beep(frequency=1000, duration=0.1, volume=0.1)
-                    play(beep_sound)
-
-                    if full_memory:
-                        parsed_data = parse_tag_data(full_memory.decode('utf-8').rstrip('\x00'))
+                    beep()
+
+                    if not full_memory:
+                        record_scan(uid_hex, 'read_failed', timings=dict(timings, total_ms=elapsed_ms(scan_started)))
+                    else:
+                        logger.debug("Tag Memory Data: %s", Lazy(full_memory.hex))
+                        stage_started = time.perf_counter()
+                        payload = decode_tag_payload(full_memory, schema_validators)
+                        timings['decode_ms'] = elapsed_ms(stage_started)
+                        parsed_data = payload.data
+                        events.publish('tag_decoded', {"schema": payload.schema, "valid": payload.is_valid,
+                                                       "data": parsed_data})
                         if parsed_data:
-                            logger.info(f"Parsed data: {parsed_data}")
+                            logger.debug("Parsed data: %s", parsed_data)
+
+                            if payload.is_valid:
+                                cache_warmer.note_lookup(audio_cached(parsed_data))
 
-                            sound_file_thread = None
-                            sound_file_url = parsed_data.get('soundFileUrl')
+                            # Cached sound files resolve immediately; new ones stream into the store
+                            sound_file_future = None
+                            sound_file_url = payload.sound_file_url
                             if sound_file_url:
-                                sound_file_thread = threading.Thread(target=download_sound_file, args=(sound_file_url,))
-                                sound_file_thread.start()
+                                sound_file_future = get_audio_store().fetch_async(sound_file_url)
+
+                            # Synthesize the status prompt while the server request is in flight
+                            if CONNECTED_TO_SERVER:
+                                status_clip = speech_clip("Connected to server", "en")
+                            else:
+                                status_clip = speech_clip("Not connected to server, only English Text to Speech is available", "en")
 
+                            playlist = []
+                            stage_started = time.perf_counter()
                             try:
-                                server_audio_data = perform_http_request(parsed_data, "audio")
-                                if server_audio_data:
-                                    logger.info("Server audio data received, starting playback.")
-                                    play_audio(server_audio_data)
+                                playlist.extend(server_audio_clips(payload))
+                                status = 'ok' if playlist else 'no_server_audio'
                             except requests.Timeout:
                                 logger.warning("HTTP request timed out")
-
-                            if CONNECTED_TO_SERVER:
-                                generate_tts("Connected to server", "en")
-                            else:
-                                generate_tts("Not connected to server, only English Text to Speech is available", "en")
-
-                            if sound_file_thread:
-                                sound_file_thread.join()
-                                local_audio_file_path = '/tmp/local_audio.mp3'  # Path where the audio file is downloaded
-                                if is_valid_audio_file(local_audio_file_path):
-                                    local_audio_data = get_downloaded_audio_data()
-                                    if local_audio_data:
-                                        logger.info("Local audio data validated and available, starting playback.")
-                                        play_audio(local_audio_data)
-                                else:
-                                    logger.warning("Downloaded audio file is not valid and will not be played.")
-
-                                cleanup_downloaded_audio_file()
+                                status = 'server_timeout'
+                            timings['audio_ms'] = elapsed_ms(stage_started)
+
+                            playlist.append(status_clip)
+                            if sound_file_future:
+                                playlist.append(sound_file_clip(sound_file_url, sound_file_future))
+                            audio_sequencer.play(playlist)
+
+                            if not payload.is_valid:
+                                # parsed_data is the fallback text, not the tag's content
+                                status, parsed_data = 'invalid_payload', None
+                            record_scan(uid_hex, status, parsed_data, payload.schema,
+                                        timings=dict(timings, total_ms=elapsed_ms(scan_started)))
+                        else:
+                            record_scan(uid_hex, 'invalid_payload', schema=payload.schema,
+                                        timings=dict(timings, total_ms=elapsed_ms(scan_started)))
             except Exception as e:
                 logger.error(f"An error occurred: {e}")
-            time.sleep(1)
+                if scan_uid:
+                    record_scan(scan_uid, 'error', error=str(e))
+                if pn532.needs_recovery:
+                    # Reset now rather than on the next poll so scanning resumes quickly
+                    with pn532_lock:
+                        if pn532.recover(pn532.last_failure_reason):
+                            continue
+            # Poll faster while provisioning so the operator can swap tags quickly
+            time.sleep(0.2 if provisioning_session and provisioning_session.active else 1)
 
 
     read_thread = threading.Thread(target=read_loop)
@@ -802,13 +1134,18 @@ def signal_handler(sig, frame):
     else:
         logger.info("No read thread to join.")
 
+    tts_worker.shutdown()
     logger.info("Exiting system...")
     sys.exit(0)
 
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
-load_configuration()
+config_store.subscribe(apply_configuration)
+config_store.subscribe(schema_validators.compile)
+config_store.subscribe(audio_codecs.configure)
+config_store.subscribe(audio_sequencer.configure)
+config_store.subscribe(phrase_audio.configure)
 main()
 
 def run_flask_app():
@@ -820,29 +1157,3 @@ if __name__ == "__main__":
     flask_thread.start()
 
     main()
-
-def load_voice_model():
-    # Create the required directories if they don't exist
-    piper_download_dir = Path(PIPER_DOWNLOAD_DIR)
-    piper_download_dir.mkdir(parents=True, exist_ok=True)
-
-    voices_info = get_voices(PIPER_DOWNLOAD_DIR, update_voices=True)
-    ensure_voice_exists(PIPER_MODEL_NAME, [PIPER_DOWNLOAD_DIR], PIPER_DOWNLOAD_DIR, voices_info)
-    model_path, config_path = find_voice(PIPER_MODEL_NAME, [PIPER_DOWNLOAD_DIR])
-    voice = PiperVoice.load(str(model_path), config_path=str(config_path), use_cuda=False)
-    return voice
-
-def generate_tts(text, locale="en"):
-    logger.info(f"Generate TTS: [{locale}] {text}")
-    if locale != "en":
-        text = "Only English is currently supported for offline text to speech."
-
-    try:
-        audio_fp = io.BytesIO()
-        with wave.open(audio_fp, "wb") as wav_file:
-            voice.synthesize(text, wav_file, **PIPER_SYNTHESIS_ARGS)
-        audio_fp.seek(0)
-        logger.info(f"Generate TTS finished")
-        return audio_fp.read()
-    except Exception as e:
-        raise Exception(f"Local TTS: Failed to generate speech: {text} {locale} {e}")
@@ -0,0 +1,170 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+
+# Defaults for the logging pipeline
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_QUEUE_SIZE = 1000       # Records buffered before producers start dropping
+LOG_RING_SIZE = 500         # Records kept in memory for the debug endpoint
+LOG_SAMPLE_INTERVAL = 10.0  # Seconds per rate-limit window
+LOG_SAMPLE_BURST = 5        # Identical messages allowed per window
+
+_listener = None
+_queue_handler = None
+_ring_handler = None
+
+
+class Lazy:
+    # Defers an expensive formatting call until a handler actually renders the record
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        try:
+            return str(self.func(*self.args, **self.kwargs))
+        except Exception as e:
+            return f"<lazy format failed: {e}>"
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    # Lets through at most `burst` records per (logger, level, template) every `interval` seconds
+    def __init__(self, interval=LOG_SAMPLE_INTERVAL, burst=LOG_SAMPLE_BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.CRITICAL:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if len(self.windows) > 4096:
+                    self._prune(now)
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+        return True
+
+    def _prune(self, now):
+        for key in [k for k, w in self.windows.items() if now - w[0] >= self.interval]:
+            del self.windows[key]
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the caller; records are dropped when the background writer falls behind
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Leave msg/args untouched so formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RingBufferHandler(logging.Handler):
+    # Keeps the most recent records unformatted; they are only rendered when read
+    def __init__(self, capacity=LOG_RING_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def snapshot(self, limit=None, min_level=logging.NOTSET):
+        records = [r for r in list(self.records) if r.levelno >= min_level]
+        if limit:
+            records = records[-limit:]
+        entries = []
+        for record in records:
+            try:
+                message = record.getMessage()
+            except Exception as e:
+                message = f"<unformattable record {record.msg!r}: {e}>"
+            entries.append({
+                "time": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": message,
+            })
+        return entries
+
+
+def setup_logging(level=logging.INFO, ring_level=logging.INFO, ring_size=LOG_RING_SIZE,
+                  queue_size=LOG_QUEUE_SIZE, sample_interval=LOG_SAMPLE_INTERVAL,
+                  sample_burst=LOG_SAMPLE_BURST):
+    global _listener, _queue_handler, _ring_handler
+
+    if _listener is not None:
+        return logging.getLogger()
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _ring_handler = RingBufferHandler(ring_size)
+    _ring_handler.setLevel(ring_level)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(sample_interval, sample_burst))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(min(level, ring_level))
+
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, _ring_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_recent_logs(limit=None, min_level=logging.NOTSET):
+    if _ring_handler is None:
+        return []
+    return _ring_handler.snapshot(limit, min_level)
+
+
+def get_logging_stats():
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "buffered": len(_ring_handler.records) if _ring_handler else 0,
+    }
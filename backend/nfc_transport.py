@@ -0,0 +1,133 @@
+import logging
+import time
+
+from adafruit_pn532.adafruit_pn532 import PN532, BusyError
+from adafruit_pn532.i2c import PN532_I2C
+from adafruit_pn532.spi import PN532_SPI, reverse_bit
+from adafruit_pn532.uart import PN532_UART
+from adafruit_bus_device import spi_device
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ('i2c', 'spi', 'uart')
+
+# [Reader] keys in config.ini -> (setting, type, default)
+READER_OPTIONS = {
+    'Transport': ('transport', str, 'i2c'),
+    'I2CFrequency': ('i2c_frequency', int, 100000),    # PN532 supports up to 400 kHz
+    'SPIBaudrate': ('spi_baudrate', int, 1000000),     # PN532 supports up to 5 MHz
+    'SPIChipSelect': ('spi_cs_pin', str, 'D8'),        # CE0
+    'UARTPort': ('uart_port', str, '/dev/serial0'),
+    'UARTBaudrate': ('uart_baudrate', int, 115200),    # PN532 HSU default; must match the chip
+    'ResetPin': ('reset_pin', str, 'D6'),
+    'PollInterval': ('poll_interval', float, 0.001),   # Ready-status poll period; the driver default is 10 ms
+}
+
+ACK_LENGTH = 6
+SPI_STATUS_READ = bytes([reverse_bit(0x02), 0x00])
+
+
+def reader_settings(config):
+    section = config['Reader'] if config.has_section('Reader') else {}
+    settings = {}
+    for option, (name, cast, default) in READER_OPTIONS.items():
+        value = section.get(option, '').strip()
+        settings[name] = cast(value) if value else default
+    settings['transport'] = settings['transport'].lower()
+    if settings['transport'] not in TRANSPORTS:
+        raise ValueError(f"Unknown PN532 transport '{settings['transport']}', expected one of {TRANSPORTS}")
+    return settings
+
+
+class FastPollMixin:
+    # The stock drivers sleep 10 ms between ready checks, which dominates short commands
+    # like a 16-byte page read. Subclasses only provide _ready().
+    poll_interval = 0.001
+
+    def _wait_ready(self, timeout=1):
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._ready():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+
+class FastPN532_I2C(FastPollMixin, PN532_I2C):
+    def _ready(self):
+        status = bytearray(1)
+        try:
+            with self._i2c:
+                self._i2c.readinto(status)
+        except OSError:
+            return False
+        return status[0] == 0x01
+
+    def _read_data(self, count):
+        # The driver asks for up to 73 bytes for a 20-byte passive target frame. Read the
+        # header first (the PN532 restarts the frame on every read) and then only what is there.
+        if count <= ACK_LENGTH:
+            return super()._read_data(count)
+        header = super()._read_data(5)  # 00 00 FF LEN LCS
+        if header[:3] != b'\x00\x00\xff':
+            return super()._read_data(count)
+        return super()._read_data(min(count, 5 + header[3] + 2))
+
+
+class FastPN532_SPI(FastPollMixin, PN532_SPI):
+    def __init__(self, spi, cs_pin, *, baudrate=1000000, irq=None, reset=None, debug=False):
+        # PN532_SPI always opens the device at 100 kHz
+        self.debug = debug
+        self._spi = spi_device.SPIDevice(spi, cs_pin, baudrate=baudrate)
+        PN532.__init__(self, debug=debug, irq=irq, reset=reset)
+
+    def _ready(self):
+        response = bytearray(2)
+        with self._spi as spi:
+            spi.write_readinto(SPI_STATUS_READ, response)
+        return reverse_bit(response[1]) == 0x01
+
+
+class FastPN532_UART(FastPollMixin, PN532_UART):
+    def _ready(self):
+        return self._uart.in_waiting > 0
+
+    def _read_data(self, count):
+        # Reading `count` bytes when the frame is shorter blocks until the serial timeout,
+        # so read the header and then exactly the announced frame length.
+        if count <= ACK_LENGTH:
+            return super()._read_data(count)
+        header = self._uart.read(5)  # 00 00 FF LEN LCS
+        if len(header) < 5:
+            raise BusyError("No data read from PN532")
+        return header + self._uart.read(header[3] + 2)
+
+
+def open_reader(settings):
+    # Returns (pn532, reset_pin) for the configured transport
+    import board
+    import busio
+    from digitalio import DigitalInOut
+
+    transport = settings['transport']
+    reset_pin = DigitalInOut(getattr(board, settings['reset_pin'])) if settings['reset_pin'] else None
+
+    if transport == 'i2c':
+        # On a Raspberry Pi the bus clock is set by dtparam=i2c_arm_baudrate and frequency is ignored
+        i2c = busio.I2C(board.SCL, board.SDA, frequency=settings['i2c_frequency'])
+        pn532 = FastPN532_I2C(i2c, reset=reset_pin)
+    elif transport == 'spi':
+        spi = busio.SPI(board.SCK, board.MOSI, board.MISO)
+        cs_pin = DigitalInOut(getattr(board, settings['spi_cs_pin']))
+        pn532 = FastPN532_SPI(spi, cs_pin, baudrate=settings['spi_baudrate'], reset=reset_pin)
+    else:
+        import serial  # Blinka has no busio.UART on Linux; pip install pyserial
+        uart = serial.Serial(settings['uart_port'], baudrate=settings['uart_baudrate'], timeout=0.1)
+        pn532 = FastPN532_UART(uart, reset=reset_pin)
+
+    pn532.poll_interval = settings['poll_interval']
+    pn532.SAM_configuration()
+    ic, ver, rev, support = pn532.firmware_version
+    logger.info(f"PN532 firmware {ver}.{rev} over {transport}")
+    return pn532, reset_pin
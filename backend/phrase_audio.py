@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = os.getenv('PHRASE_SEGMENT_PREFIX', 'audio/segment')  # Server route for one segment
+FETCH_WORKERS = 4
+SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s+')
+
+
+def split_phrases(text):
+    # Sentences are the unit of reuse: tags that share a sentence share its audio
+    return [phrase for phrase in (p.strip() for p in SENTENCE_END.split(text)) if phrase]
+
+
+def translation_segments(payload):
+    # Each phrase is spoken in the source language, then in each translation language in turn
+    targets = [payload['language']] + [t for t in payload.get('translations', []) if t]
+    return [{"text": phrase, "language": payload['language'], "target": target}
+            for target in targets for phrase in split_phrases(payload['text'])]
+
+
+def segment_key(segment):
+    digest = hashlib.sha256(json.dumps(segment, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return f"segment:{digest}"
+
+
+class PhraseAudio:
+    # Resolves a translation payload to per-segment audio, cached in the AudioStore under
+    # segment keys. Missing segments are fetched in parallel with fetch_segment(segment),
+    # which returns (audio bytes, content type) or (None, None).
+    def __init__(self, store, fetch_segment, workers=FETCH_WORKERS):
+        self.store = store
+        self.fetch_segment = fetch_segment
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='phrase-fetch')
+        self.enabled = False
+        self.stats = {"payloads": 0, "segments": 0, "hits": 0, "misses": 0, "failures": 0,
+                      "fallbacks": 0, "fetch_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+
+    def configure(self, config, version=None):
+        self.enabled = config.getboolean('Audio', 'PhraseSegments', fallback=False)
+
+    def _record(self, **counts):
+        with self.stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def _cached(self, segment):
+        key = segment_key(segment)
+        path = self.store.cached_path(key)
+        entry = self.store.entry(key)
+        if not path or not entry:
+            return None
+        try:
+            os.utime(path)  # Track recency for eviction
+            with open(path, 'rb') as f:
+                return f.read(), entry.get('content_type')
+        except OSError:
+            return None
+
+    def _fetch(self, segment):
+        started = time.perf_counter()
+        data, content_type = self.fetch_segment(segment)
+        self._record(fetch_seconds=time.perf_counter() - started)
+        if not data:
+            return None
+        self.store.put(segment_key(segment), data, content_type=content_type)
+        return data, content_type
+
+    def resolve(self, payload):
+        # Returns [(segment, data, content_type)] in playback order, or None if any segment is
+        # unavailable so the caller can fall back to requesting the whole payload
+        segments = translation_segments(payload)
+        if not segments:
+            return None
+        results = [self._cached(segment) for segment in segments]
+        missing = [index for index, result in enumerate(results) if result is None]
+        self._record(payloads=1, segments=len(segments), hits=len(segments) - len(missing), misses=len(missing))
+
+        futures = {index: self.executor.submit(self._fetch, segments[index]) for index in missing}
+        for index, future in futures.items():
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching phrase segment {segments[index]}: {e}")
+        failed = sum(1 for result in results if result is None)
+        if failed:
+            self._record(failures=failed, fallbacks=1)
+            return None
+
+        logger.info(f"Phrase audio: {len(segments)} segments, {len(segments) - len(missing)} cached")
+        return [(segment, data, content_type) for segment, (data, content_type) in zip(segments, results)]
+
+    def is_cached(self, payload):
+        return all(self.store.cached_path(segment_key(segment)) for segment in translation_segments(payload))
+
+    def prefetch(self, payload):
+        # Cache warming: fetches missing segments without counting towards scan hit rates; returns bytes fetched
+        missing = [segment for segment in translation_segments(payload) if not self.store.cached_path(segment_key(segment))]
+        results = self.executor.map(self._fetch, missing)
+        return sum(len(result[0]) for result in results if result)
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["enabled"] = self.enabled
+        stats["hit_rate"] = round(stats["hits"] / stats["segments"], 3) if stats["segments"] else None
+        return stats
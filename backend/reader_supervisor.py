@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+STALL_MARGIN = float(os.getenv('READER_STALL_MARGIN', 1.0))          # Seconds over the expected duration that counts as a stall
+FAILURE_THRESHOLD = int(os.getenv('READER_FAILURE_THRESHOLD', 3))    # Consecutive failed commands before a reset
+HANG_TIMEOUT = float(os.getenv('READER_HANG_TIMEOUT', 3.0))          # An in-flight command older than this is aborted by the watchdog
+RECOVERY_ATTEMPTS = 3
+RECOVERY_BACKOFF = 0.2
+LATENCY_SAMPLES = 200                                                # Recent latencies kept per command for percentiles
+
+# Reader methods routed through the supervisor; everything else, including properties such as
+# firmware_version, is passed straight to the reader
+SUPERVISED_COMMANDS = ('read_passive_target', 'ntag2xx_read_block', 'ntag2xx_write_block', 'mifare_classic_read_block')
+
+
+class CommandStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.stalls = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self):
+        samples = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "stalls": self.stalls,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 1) if samples else None,
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1) if samples else None,
+            "max_ms": round(samples[-1] * 1000, 1) if samples else None,
+        }
+
+
+class ReaderSupervisor:
+    # Wraps a PN532, times every command and resets the chip when it stalls or keeps failing.
+    # Callers still serialize access themselves (pn532_lock); the watchdog only touches the reset pin.
+    def __init__(self, reader, reset_pin=None, on_recovery=None):
+        self.reader = reader
+        self.reset_pin = reset_pin
+        self.on_recovery = on_recovery
+        self.commands = {}
+        self.consecutive_failures = 0
+        self.needs_recovery = False
+        self.last_failure_reason = None
+        self.resets = 0
+        self.recoveries = 0
+        self.failed_recoveries = 0
+        self.watchdog_aborts = 0
+        self.recovery_times = deque(maxlen=50)
+        self.last_recovery = None
+        self.in_flight = None  # (command, started) while a command is running
+        self.lock = threading.Lock()
+        self.watchdog = threading.Thread(target=self._watch, daemon=True)
+        self.watchdog.start()
+
+    def __getattr__(self, name):
+        attr = getattr(self.reader, name)
+        if name in SUPERVISED_COMMANDS:
+            return lambda *args, **kwargs: self.call(name, attr, *args, **kwargs)
+        return attr
+
+    def call(self, name, func, *args, **kwargs):
+        if self.needs_recovery:
+            self.recover(self.last_failure_reason)
+
+        stats = self.commands.setdefault(name, CommandStats())
+        # read_passive_target legitimately blocks for its timeout when no tag is present
+        expected = 0
+        if name == 'read_passive_target':
+            expected = kwargs.get('timeout', args[0] if args else 1)
+        started = time.monotonic()
+        self.in_flight = (name, started)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(stats, name, e)
+            raise
+        finally:
+            self.in_flight = None
+            elapsed = time.monotonic() - started
+            stats.calls += 1
+            stats.latencies.append(elapsed)
+
+        if elapsed > expected + STALL_MARGIN:
+            stats.stalls += 1
+            logger.warning(f"PN532 {name} stalled for {elapsed:.2f}s")
+            self.last_failure_reason = f"{name} stall"
+            self.needs_recovery = True
+        else:
+            self.consecutive_failures = 0
+        return result
+
+    def _record_failure(self, stats, name, error):
+        stats.failures += 1
+        self.consecutive_failures += 1
+        logger.debug("PN532 %s failed (%d in a row): %s", name, self.consecutive_failures, error)
+        if self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.last_failure_reason = f"{self.consecutive_failures} consecutive failures"
+            self.needs_recovery = True
+
+    def _watch(self):
+        # A wedged I2C transaction never returns on its own; holding the chip in reset aborts it
+        while True:
+            time.sleep(HANG_TIMEOUT / 4)
+            in_flight = self.in_flight
+            if in_flight and time.monotonic() - in_flight[1] > HANG_TIMEOUT and self.reset_pin is not None:
+                logger.warning(f"PN532 {in_flight[0]} hung for over {HANG_TIMEOUT}s, forcing reset")
+                self.watchdog_aborts += 1
+                self.last_failure_reason = f"{in_flight[0]} hang"
+                self.needs_recovery = True
+                self.reset_pin.value = False
+                self.in_flight = None
+
+    def recover(self, reason):
+        with self.lock:
+            logger.warning(f"Resetting PN532 ({reason})")
+            started = time.monotonic()
+            for attempt in range(1, RECOVERY_ATTEMPTS + 1):
+                try:
+                    self.resets += 1
+                    if hasattr(self.reader, 'reset'):
+                        self.reader.reset()  # Toggles the reset pin and wakes the chip
+                    if hasattr(self.reader, 'SAM_configuration'):
+                        self.reader.SAM_configuration()
+                    break
+                except Exception as e:
+                    logger.error(f"PN532 recovery attempt {attempt} failed: {e}")
+                    time.sleep(RECOVERY_BACKOFF * attempt)
+            else:
+                # Leave needs_recovery set so the next command tries again
+                self.failed_recoveries += 1
+                return False
+
+            duration = time.monotonic() - started
+            self.needs_recovery = False
+            self.consecutive_failures = 0
+            self.recoveries += 1
+            self.recovery_times.append(duration)
+            self.last_recovery = {"reason": reason, "time": time.time(), "duration": round(duration, 3)}
+            logger.info(f"PN532 recovered in {duration:.2f}s")
+        if self.on_recovery:
+            self.on_recovery(self.last_recovery)
+        return True
+
+    def stats(self):
+        times = list(self.recovery_times)
+        return {
+            "commands": {name: stats.to_dict() for name, stats in self.commands.items()},
+            "consecutive_failures": self.consecutive_failures,
+            "resets": self.resets,
+            "recoveries": self.recoveries,
+            "failed_recoveries": self.failed_recoveries,
+            "watchdog_aborts": self.watchdog_aborts,
+            "avg_recovery_s": round(sum(times) / len(times), 3) if times else None,
+            "last_recovery": self.last_recovery,
+        }
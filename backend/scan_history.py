@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCAN_HISTORY_DB = os.getenv('SCAN_HISTORY_DB', os.path.join(os.path.expanduser("~"), ".langiot", "history.db"))
+BATCH_SIZE = 50          # Scans written per transaction at most
+FLUSH_INTERVAL = 2.0     # Seconds a scan may wait for others to share its transaction
+QUEUE_SIZE = 1000        # Scans buffered for the writer; beyond this they are dropped, never blocking the read loop
+RETENTION_DAYS = int(os.getenv('SCAN_HISTORY_RETENTION_DAYS', 90))
+STAGES = ('read_ms', 'decode_ms', 'audio_ms', 'total_ms')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    uid TEXT NOT NULL,
+    schema TEXT,
+    payload_hash TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    read_ms REAL,
+    decode_ms REAL,
+    audio_ms REAL,
+    total_ms REAL
+);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (time);
+CREATE INDEX IF NOT EXISTS scans_uid_time ON scans (uid, time);
+CREATE INDEX IF NOT EXISTS scans_status_time ON scans (status, time);
+CREATE TABLE IF NOT EXISTS tags (
+    uid TEXT PRIMARY KEY,
+    payload TEXT,
+    payload_hash TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    scans INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def payload_hash(payload):
+    if payload is None:
+        return None
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class ScanHistory:
+    # Scan log and tag-content index in SQLite. record() only enqueues; one writer thread commits
+    # batches in WAL mode, so queries from Flask threads never wait on the scan loop or vice versa.
+    def __init__(self, path=SCAN_HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        self.pending = queue.Queue(maxsize=QUEUE_SIZE)
+        self.local = threading.local()
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "write_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True, name='scan-history')
+        self.writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; a crash loses at most the last batches
+        return db
+
+    def _reader(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = self._connect()
+            db.row_factory = sqlite3.Row
+        return db
+
+    def _record(self, **counts):
+        # record() runs on the scan loop, the writer thread updates the rest
+        with self.stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def record(self, uid, status, payload=None, schema=None, error=None, timings=None):
+        scan = {"time": time.time(), "uid": uid, "schema": schema, "payload": payload, "status": status,
+                "error": error, **{stage: (timings or {}).get(stage) for stage in STAGES}}
+        try:
+            self.pending.put_nowait(scan)
+            self._record(recorded=1)
+        except queue.Full:
+            self._record(dropped=1)
+
+    def _write_loop(self):
+        db = self._connect()
+        last_prune = 0
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.pending.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            started = time.perf_counter()
+            try:
+                with db:
+                    self._write_batch(db, batch)
+                    if time.time() - last_prune > 86400:
+                        db.execute("DELETE FROM scans WHERE time < ?", (time.time() - RETENTION_DAYS * 86400,))
+                        last_prune = time.time()
+                self._record(written=len(batch), batches=1)
+            except Exception as e:
+                # A bad batch is lost, but the writer keeps running for the scans after it
+                logger.error(f"Failed to write {len(batch)} scans to history: {e}")
+                self._record(dropped=len(batch))
+            self._record(write_seconds=time.perf_counter() - started)
+
+    def _write_batch(self, db, batch):
+        for scan in batch:
+            scan["payload_hash"] = payload_hash(scan["payload"])
+        db.executemany(
+            "INSERT INTO scans (time, uid, schema, payload_hash, status, error, read_ms, decode_ms, audio_ms, total_ms) "
+            "VALUES (:time, :uid, :schema, :payload_hash, :status, :error, :read_ms, :decode_ms, :audio_ms, :total_ms)",
+            batch)
+        db.executemany(
+            "INSERT INTO tags (uid, payload, payload_hash, first_seen, last_seen, scans) "
+            "VALUES (:uid, :payload_json, :payload_hash, :time, :time, 1) "
+            "ON CONFLICT (uid) DO UPDATE SET last_seen = excluded.last_seen, scans = scans + 1, "
+            "payload = COALESCE(excluded.payload, payload), payload_hash = COALESCE(excluded.payload_hash, payload_hash)",
+            [dict(scan, payload_json=json.dumps(scan["payload"]) if scan["payload"] is not None else None)
+             for scan in batch])
+
+    def top_tags(self, limit=10, since=None, status=None):
+        # status limits the count to scans with that outcome, e.g. 'ok'
+        rows = self._reader().execute(
+            "SELECT s.uid, COUNT(*) AS scans, MAX(s.time) AS last_seen, t.payload "
+            "FROM scans s LEFT JOIN tags t ON t.uid = s.uid WHERE s.time >= ? AND (? IS NULL OR s.status = ?) "
+            "GROUP BY s.uid ORDER BY scans DESC, last_seen DESC LIMIT ?",
+            (since or 0, status, status, limit)).fetchall()
+        return [dict(row, payload=json.loads(row["payload"]) if row["payload"] else None) for row in rows]
+
+    def recent_failures(self, limit=20):
+        rows = self._reader().execute(
+            "SELECT time, uid, status, error, total_ms FROM scans WHERE status != 'ok' "
+            "ORDER BY time DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def latency_percentiles(self, since=None, percentiles=(50, 90, 99)):
+        db = self._reader()
+        result = {}
+        for stage in STAGES:
+            # Column names come from STAGES, never from the request
+            count = db.execute(f"SELECT COUNT({stage}) FROM scans WHERE time >= ?", (since or 0,)).fetchone()[0]
+            values = {"count": count}
+            for p in percentiles:
+                row = db.execute(f"SELECT {stage} FROM scans WHERE time >= ? AND {stage} IS NOT NULL "
+                                 f"ORDER BY {stage} LIMIT 1 OFFSET ?",
+                                 (since or 0, min(count - 1, count * p // 100))).fetchone() if count else None
+                values[f"p{p}"] = round(row[0], 1) if row else None
+            result[stage] = values
+        return result
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["queued"] = self.pending.qsize()
+        stats["avg_batch"] = round(stats["written"] / stats["batches"], 1) if stats["batches"] else None
+        row = self._reader().execute("SELECT COUNT(*), (SELECT COUNT(*) FROM tags) FROM scans").fetchone()
+        stats["scans"], stats["tags"] = row[0], row[1]
+        return stats
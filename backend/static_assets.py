@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import sys
+from flask import request, send_file, abort
+from werkzeug.utils import safe_join
+
+try:
+    import brotli  # pip install brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.css', '.json', '.map', '.svg', '.txt', '.ico')
+MIN_COMPRESS_SIZE = 1024  # Bytes; smaller files are not worth an extra variant
+
+# Cache policies
+IMMUTABLE_MAX_AGE = 31536000  # One year for content-hashed bundles
+ROOT_FILE_MAX_AGE = 3600      # manifest.json, favicon.ico, logos
+HASHED_ASSET_PATTERN = re.compile(r'\.[0-9a-f]{8,}\.')
+
+# Absolute path -> (mtime, size, etag)
+_etag_cache = {}
+
+
+def _is_stale(source_path, variant_path):
+    try:
+        return os.path.getmtime(variant_path) < os.path.getmtime(source_path)
+    except OSError:
+        return True
+
+
+def _write_variant(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def precompress_assets(root):
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            source_path = os.path.join(dirpath, filename)
+            try:
+                if os.path.getsize(source_path) < MIN_COMPRESS_SIZE:
+                    continue
+                data = None
+                if _is_stale(source_path, source_path + '.gz'):
+                    with open(source_path, 'rb') as f:
+                        data = f.read()
+                    _write_variant(source_path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                    written += 1
+                if brotli is not None and _is_stale(source_path, source_path + '.br'):
+                    if data is None:
+                        with open(source_path, 'rb') as f:
+                            data = f.read()
+                    _write_variant(source_path + '.br', brotli.compress(data, quality=11))
+                    written += 1
+            except OSError as e:
+                logger.warning(f"Could not precompress {source_path}: {e}")
+    logger.info(f"Precompressed static assets in {root}: {written} variant(s) written")
+    return written
+
+
+def _file_etag(path):
+    stat = os.stat(path)
+    cached = _etag_cache.get(path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:20]
+    _etag_cache[path] = (stat.st_mtime, stat.st_size, etag)
+    return etag
+
+
+def _accepted_encodings():
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        token, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if token:
+            accepted.add(token.lower())
+    return accepted
+
+
+def _cache_max_age(relpath):
+    if relpath == 'index.html':
+        return None
+    if relpath.startswith('static/') and HASHED_ASSET_PATTERN.search(os.path.basename(relpath)):
+        return IMMUTABLE_MAX_AGE
+    return ROOT_FILE_MAX_AGE
+
+
+def send_asset(root, relpath):
+    path = safe_join(root, relpath)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    etag = _file_etag(path)
+
+    send_path, encoding = path, None
+    accepted = _accepted_encodings()
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if candidate in accepted and os.path.isfile(path + suffix) and not _is_stale(path, path + suffix):
+            send_path, encoding = path + suffix, candidate
+            break
+
+    max_age = _cache_max_age(relpath)
+    response = send_file(
+        send_path,
+        mimetype=mimetype,
+        download_name=os.path.basename(path),
+        etag=f"{etag}-{encoding}" if encoding else etag,
+        conditional=True,
+        max_age=max_age,
+    )
+    if encoding and response.status_code != 304:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    if max_age == IMMUTABLE_MAX_AGE:
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    elif max_age is None:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    precompress_assets(sys.argv[1] if len(sys.argv) > 1 else os.getenv('WEB_APP_PATH', '/app/web'))
@@ -0,0 +1,143 @@
+import binascii
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Layout v1 (legacy): 2-byte big-endian length, then the body.
+# Layout v2, from the first user page:
+#   header   magic(1) version(1) length(2) segments(1) reserved(1) crc16(2)
+#   segment  up to 14 body bytes + crc16(2), padded to 16 bytes (4 pages)
+# A segment is exactly what one NTAG READ command returns, so a bad segment costs one re-read.
+MAGIC = 0xA5  # A v1 length can never start with this byte on NTAG-sized memory
+VERSION = 2
+PAGE_SIZE = 4
+HEADER_SIZE = 8
+SEGMENT_SIZE = 16
+SEGMENT_DATA = SEGMENT_SIZE - 2
+MAX_RETRIES = 3  # Re-read rounds for failed or corrupted blocks while the tag is in the field
+MAX_USER_BYTES = 888  # NTAG216, the largest NTAG21x; no layout can claim more than this
+JSON_START = b'{["-0123456789tfn \t\r\n'  # v1 bodies are JSON text
+
+TagReadResult = namedtuple('TagReadResult', ['body', 'version', 'retries'])
+
+_stats = {"reads": 0, "v1": 0, "v2": 0, "block_failures": 0, "corrupted_segments": 0,
+          "header_retries": 0, "segment_retries": 0, "recovered": 0, "unrecoverable": 0,
+          "unrecognized": 0}
+_stats_lock = threading.Lock()
+
+
+class TagReadError(Exception):
+    pass
+
+
+def crc16(data):
+    return binascii.crc_hqx(bytes(data), 0xFFFF)  # CRC-16/CCITT-FALSE
+
+
+def encode_tag_layout(body):
+    segments = [body[i:i + SEGMENT_DATA] for i in range(0, len(body), SEGMENT_DATA)]
+    if len(segments) > 255:
+        raise ValueError(f"Tag body of {len(body)} bytes is too large")
+    header = bytes([MAGIC, VERSION]) + len(body).to_bytes(2, 'big') + bytes([len(segments), 0])
+    encoded = bytearray(header + crc16(header).to_bytes(2, 'big'))
+    for segment in segments:
+        encoded += segment + crc16(segment).to_bytes(2, 'big')
+    encoded += b'\x00' * (-len(encoded) % PAGE_SIZE)  # Only the last segment can be short
+    return bytes(encoded)
+
+
+def _record(**counts):
+    with _stats_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+
+
+def get_tag_read_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _read_block(read_block, page):
+    # read_block(page) -> 16 bytes starting at page, or None; exceptions count as a failed read
+    try:
+        data = read_block(page)
+    except Exception as e:
+        logger.debug("Block read at page %d failed: %s", page, e)
+        return None
+    return bytes(data) if data is not None and len(data) >= SEGMENT_SIZE else None
+
+
+def _read_with_retries(read_block, pages, check, retry_key):
+    # Reads every page in pages, then re-reads only those that failed or did not pass check
+    blocks = {}
+    pending = list(pages)
+    retries = 0
+    for attempt in range(MAX_RETRIES + 1):
+        failed = []
+        for page in pending:
+            data = _read_block(read_block, page)
+            if data is None:
+                _record(block_failures=1)
+                failed.append(page)
+            elif not check(page, data):
+                _record(corrupted_segments=1)
+                failed.append(page)
+            else:
+                blocks[page] = data
+        if not failed:
+            return blocks, retries
+        pending = failed
+        if attempt < MAX_RETRIES:
+            retries += len(failed)
+            _record(**{retry_key: len(failed)})
+    _record(unrecoverable=1)
+    raise TagReadError(f"Pages {pending} unreadable after {MAX_RETRIES} retries")
+
+
+def read_tag_layout(read_block, start_page=4):
+    _record(reads=1)
+
+    def header_ok(page, data):
+        return data[0] != MAGIC or crc16(data[:HEADER_SIZE - 2]) == int.from_bytes(data[6:8], 'big')
+
+    blocks, retries = _read_with_retries(read_block, [start_page], header_ok, 'header_retries')
+    first = blocks[start_page]
+
+    if first[0] != MAGIC:
+        # v1: no checksums, so only blocks that fail outright can be retried. NDEF-formatted or
+        # foreign tags also land here; reject them before reading blocks for a garbage length.
+        length = int.from_bytes(first[:2], 'big')
+        total = length + 2
+        if total > MAX_USER_BYTES or (length and first[2] not in JSON_START):
+            _record(unrecognized=1)
+            raise TagReadError(f"Not a langiot tag (starts {first[:4].hex(' ')})")
+        pages = [start_page + i * PAGE_SIZE for i in range(1, (total + SEGMENT_SIZE - 1) // SEGMENT_SIZE)]
+        more, more_retries = _read_with_retries(read_block, pages, lambda page, data: True, 'segment_retries')
+        blocks.update(more)
+        data = b''.join(blocks[page] for page in sorted(blocks))
+        _record(v1=1, recovered=1 if retries + more_retries else 0)
+        return TagReadResult(data[2:total], 1, retries + more_retries)
+
+    length = int.from_bytes(first[2:4], 'big')
+    segment_count = first[4]
+    if segment_count != (length + SEGMENT_DATA - 1) // SEGMENT_DATA:
+        _record(unrecoverable=1)
+        raise TagReadError(f"Header claims {segment_count} segments for {length} bytes")
+    if HEADER_SIZE + segment_count * SEGMENT_SIZE > MAX_USER_BYTES:
+        _record(unrecognized=1)
+        raise TagReadError(f"Header claims {length} bytes, more than any NTAG holds")
+
+    first_segment_page = start_page + HEADER_SIZE // PAGE_SIZE
+    sizes = {first_segment_page + i * (SEGMENT_SIZE // PAGE_SIZE): min(SEGMENT_DATA, length - i * SEGMENT_DATA)
+             for i in range(segment_count)}
+
+    def segment_ok(page, data):
+        size = sizes[page]
+        return crc16(data[:size]) == int.from_bytes(data[size:size + 2], 'big')
+
+    segments, segment_retries = _read_with_retries(read_block, list(sizes), segment_ok, 'segment_retries')
+    body = b''.join(segments[page][:sizes[page]] for page in sorted(segments))
+    _record(v2=1, recovered=1 if retries + segment_retries else 0)
+    return TagReadResult(body, VERSION, retries + segment_retries)
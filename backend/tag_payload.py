@@ -0,0 +1,95 @@
+import json
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Schema sections tried in order when decoding a tag
+SCHEMA_SECTIONS = ('Schema_Localization', 'Schema_Translation')
+
+# Type names allowed in schema sections of config.ini
+SCHEMA_TYPES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'list': list,
+    'dict': dict,
+}
+
+FALLBACK_PAYLOAD = {"text": "No valid json found", "language": "en", "translations": []}
+
+
+@dataclass(frozen=True)
+class TagPayload:
+    schema: str
+    data: dict = field(default_factory=dict)
+
+    @property
+    def sound_file_url(self):
+        return self.data.get('soundFileUrl')
+
+    @property
+    def is_valid(self):
+        return self.schema is not None
+
+
+def compile_schema(config, section):
+    # Returns a tuple of (key, type) pairs; DEFAULT keys are not part of a schema
+    defaults = config.defaults()
+    fields = []
+    for key, type_name in config.items(section, raw=True):
+        if key in defaults and defaults[key] == type_name:
+            continue
+        expected_type = SCHEMA_TYPES.get(type_name.strip())
+        if expected_type is None:
+            raise ValueError(f"Invalid type '{type_name}' for '{key}' in schema '{section}'")
+        fields.append((key, expected_type))
+    return tuple(fields)
+
+
+class SchemaValidators:
+    def __init__(self):
+        self.schemas = {}
+
+    def compile(self, config, version=None):
+        schemas = {}
+        for section in SCHEMA_SECTIONS:
+            if not config.has_section(section):
+                logger.error(f"Schema section '{section}' not found in configuration.")
+                continue
+            try:
+                schemas[section] = compile_schema(config, section)
+            except ValueError as e:
+                logger.error(str(e))
+        self.schemas = schemas
+
+    def validate(self, data, section):
+        fields = self.schemas.get(section)
+        if fields is None or not isinstance(data, dict):
+            return False
+        for key, expected_type in fields:
+            if not isinstance(data.get(key), expected_type):
+                return False
+        return True
+
+    def match(self, data):
+        for section in self.schemas:
+            if self.validate(data, section):
+                return section
+        return None
+
+
+def decode_tag_payload(raw, validators):
+    # raw is the tag body (length header already removed); one UTF-8/JSON decode, one schema pass
+    try:
+        data = json.loads(bytes(raw).rstrip(b'\x00'))
+    except (ValueError, TypeError) as e:
+        logger.error(f"Invalid JSON data on tag: {e}")
+        return TagPayload(None, dict(FALLBACK_PAYLOAD))
+
+    schema = validators.match(data)
+    if schema is None:
+        logger.error("Tag data does not match any configured schema.")
+        return TagPayload(None, dict(FALLBACK_PAYLOAD))
+    return TagPayload(schema, data)
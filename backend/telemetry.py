@@ -0,0 +1,148 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_DIR = os.getenv('TELEMETRY_DIR', os.path.join(os.path.expanduser("~"), ".langiot", "telemetry"))
+SEGMENT_BYTES = 64 * 1024                                                # A sealed segment is one upload batch
+MAX_SPOOL_BYTES = int(os.getenv('TELEMETRY_MAX_SPOOL_BYTES', 5 * 1024 * 1024))  # Oldest segments are dropped above this
+UPLOAD_INTERVAL = float(os.getenv('TELEMETRY_UPLOAD_INTERVAL', 300))
+MAX_BACKOFF = 3600
+QUEUE_SIZE = 1000
+CURRENT_SEGMENT = 'current.jsonl'
+
+
+class TelemetrySpool:
+    # Events are appended as JSON lines to current.jsonl by a background thread. Full segments
+    # are sealed under a timestamped name and uploaded gzip-compressed, oldest first, while the
+    # device is idle. A segment is deleted only after the server accepts it, so uploads resume
+    # where they stopped after an outage or a restart.
+    # upload(body, headers) raises on failure; is_idle() says whether the scan loop is quiet.
+    def __init__(self, upload, is_idle=None, directory=TELEMETRY_DIR):
+        self.upload = upload
+        self.is_idle = is_idle or (lambda: True)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.events = queue.Queue(maxsize=QUEUE_SIZE)
+        self.next_upload = time.monotonic() + UPLOAD_INTERVAL
+        self.backoff = UPLOAD_INTERVAL
+        self.stats = {"recorded": 0, "dropped": 0, "spooled": 0, "uploaded_events": 0, "uploaded_batches": 0,
+                      "uploaded_bytes": 0, "failed_uploads": 0, "evicted_segments": 0, "last_upload": None,
+                      "last_error": None}
+        self.stats_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True, name='telemetry')
+
+    def start(self):
+        self.thread.start()
+
+    def _record(self, **counts):
+        # record() runs on the scan loop, the spool thread updates the rest
+        with self.stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def record(self, event_type, data):
+        # Never blocks the caller; events are dropped if the spool thread falls far behind
+        try:
+            self.events.put_nowait(dict(data, type=event_type, time=time.time()))
+            self._record(recorded=1)
+        except queue.Full:
+            self._record(dropped=1)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _sealed_segments(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.jsonl') and name != CURRENT_SEGMENT)
+
+    def _append(self, batch):
+        with open(self._path(CURRENT_SEGMENT), 'a', encoding='utf-8') as f:
+            for event in batch:
+                f.write(json.dumps(event, separators=(',', ':')) + '\n')
+            size = f.tell()
+        self._record(spooled=len(batch))
+        if size >= SEGMENT_BYTES:
+            self._seal()
+
+    def _seal(self):
+        current = self._path(CURRENT_SEGMENT)
+        if os.path.exists(current) and os.path.getsize(current):
+            os.replace(current, self._path(f"{time.time_ns()}.jsonl"))
+            self._enforce_limit()
+
+    def _enforce_limit(self):
+        segments = self._sealed_segments()
+        sizes = {name: os.path.getsize(self._path(name)) for name in segments}
+        total = sum(sizes.values())
+        for name in segments[:-1]:  # Always keep the newest
+            if total <= MAX_SPOOL_BYTES:
+                break
+            os.remove(self._path(name))
+            total -= sizes[name]
+            self._record(evicted_segments=1)
+            logger.warning(f"Telemetry spool over {MAX_SPOOL_BYTES} bytes, dropped segment {name}")
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self.events.get(timeout=1))
+                while len(batch) < 100:
+                    batch.append(self.events.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                if batch:
+                    self._append(batch)
+                if time.monotonic() >= self.next_upload and self.is_idle():
+                    self._upload_all()
+            except OSError as e:
+                logger.error(f"Telemetry spool error: {e}")
+
+    def _upload_all(self):
+        self._seal()
+        for name in self._sealed_segments():
+            if not self.is_idle() or not self.events.empty():
+                return  # Let the scan loop have the connection; the rest goes when idle again
+            path = self._path(name)
+            with open(path, 'rb') as f:
+                raw = f.read()
+            body = gzip.compress(raw)
+            try:
+                self.upload(body, {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip",
+                                   "X-Telemetry-Batch": name[:-len('.jsonl')]})
+            except Exception as e:
+                with self.stats_lock:
+                    self.stats["failed_uploads"] += 1
+                    self.stats["last_error"] = str(e)
+                self.next_upload = time.monotonic() + self.backoff
+                logger.info(f"Telemetry upload failed, retrying in {self.backoff:.0f}s: {e}")
+                self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+                return
+            os.remove(path)
+            self._record(uploaded_events=raw.count(b'\n'), uploaded_batches=1, uploaded_bytes=len(body))
+            with self.stats_lock:
+                self.stats["last_upload"] = time.time()
+        self.backoff = UPLOAD_INTERVAL
+        self.next_upload = time.monotonic() + UPLOAD_INTERVAL
+
+    def _size(self, name):
+        # The spool thread may upload and delete a segment while stats are being read
+        try:
+            return os.path.getsize(self._path(name))
+        except OSError:
+            return 0
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        segments = self._sealed_segments()
+        stats["queued"] = self.events.qsize()
+        stats["pending_segments"] = len(segments)
+        stats["spool_bytes"] = sum(self._size(name) for name in segments + [CURRENT_SEGMENT])
+        return stats
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Probes small synthetic MP3, WAV and Ogg headers; no real audio files or decoders needed.
+
+import os
+import struct
+import tempfile
+import unittest
+
+from audio_probe import probe_audio, AudioInfo, HEADER_READ_BYTES
+
+
+def mp3_frame(header, length):
+    return bytes(header) + bytes(length - 4)
+
+
+MPEG1_L3_128K = (0xFF, 0xFB, 0x90, 0x00)   # 128 kbps, 44.1 kHz, stereo: 417-byte frames
+MPEG1_L3_MONO = (0xFF, 0xFB, 0x90, 0xC0)
+MPEG2_L3_64K = (0xFF, 0xF3, 0x80, 0x00)    # 64 kbps, 22.05 kHz: 208-byte frames
+MPEG1_L1_32K = (0xFF, 0xFF, 0x10, 0x00)    # 32 kbps, 44.1 kHz: 32-byte frames
+
+
+def wav_file(chunks):
+    body = b'WAVE' + b''.join(chunk_id + struct.pack('<I', len(data)) + data + bytes(len(data) & 1)
+                              for chunk_id, data in chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def fmt_chunk(channels=2, sample_rate=44100, bits=16):
+    block_align = channels * bits // 8
+    return b'fmt ', struct.pack('<HHIIHH', 1, channels, sample_rate, sample_rate * block_align, block_align, bits)
+
+
+def ogg_page(granule, packet, header_type=0):
+    return (b'OggS' + bytes([0, header_type]) + struct.pack('<qIIIB', granule, 1, 0, 0, 1)
+            + bytes([len(packet)]) + packet)
+
+
+def opus_head(channels=2, pre_skip=312, input_rate=48000):
+    return b'OpusHead' + bytes([1, channels]) + struct.pack('<HIhB', pre_skip, input_rate, 0, 0)
+
+
+def vorbis_id(channels=1, sample_rate=22050):
+    return b'\x01vorbis' + struct.pack('<IBIiiiBB', 0, channels, sample_rate, 0, 0, 0, 0xB8, 1)
+
+
+class TestMp3Probe(unittest.TestCase):
+    def test_cbr_duration_from_file_size(self):
+        data = mp3_frame(MPEG1_L3_128K, 417) * 10
+        self.assertEqual(probe_audio(data), AudioInfo('mp3', len(data) * 8 / 128000, 44100, 2))
+
+    def test_mono(self):
+        info = probe_audio(mp3_frame(MPEG1_L3_MONO, 417) * 2)
+        self.assertEqual(info.channels, 1)
+
+    def test_mpeg2_and_layer1_frame_lengths(self):
+        # A wrong frame length would miss the second sync word and reject the file
+        info = probe_audio(mp3_frame(MPEG2_L3_64K, 208) * 3)
+        self.assertEqual((info.sample_rate, info.duration), (22050, 208 * 3 * 8 / 64000))
+        info = probe_audio(mp3_frame(MPEG1_L1_32K, 32) * 3)
+        self.assertEqual((info.sample_rate, info.duration), (44100, 32 * 3 * 8 / 32000))
+
+    def test_padding_bit(self):
+        padded = (0xFF, 0xFB, 0x92, 0x00)
+        info = probe_audio(mp3_frame(padded, 418) + mp3_frame(MPEG1_L3_128K, 417))
+        self.assertEqual(info.codec, 'mp3')
+
+    def test_xing_frame_count(self):
+        frame = bytearray(mp3_frame(MPEG1_L3_128K, 417))
+        frame[36:48] = b'Xing' + struct.pack('>II', 0x01, 100)
+        info = probe_audio(bytes(frame) + mp3_frame(MPEG1_L3_128K, 417) * 5)
+        self.assertAlmostEqual(info.duration, 100 * 1152 / 44100)
+
+    def test_vbri_frame_count(self):
+        frame = bytearray(mp3_frame(MPEG1_L3_128K, 417))
+        frame[36:54] = b'VBRI' + bytes(10) + struct.pack('>I', 250)
+        info = probe_audio(bytes(frame) + mp3_frame(MPEG1_L3_128K, 417))
+        self.assertAlmostEqual(info.duration, 250 * 1152 / 44100)
+
+    def test_id3_tag_is_skipped(self):
+        tag = b'ID3\x04\x00\x00' + bytes([0, 0, 1, 0x04]) + bytes(132)   # Syncsafe size 132
+        audio = mp3_frame(MPEG1_L3_128K, 417) * 4
+        info = probe_audio(tag + audio)
+        self.assertEqual(info.codec, 'mp3')
+        self.assertAlmostEqual(info.duration, len(audio) * 8 / 128000)
+
+    def test_id3_tag_larger_than_header_window(self):
+        # Cover art routinely pushes the first frame past HEADER_READ_BYTES
+        body_size = 100 * 1024
+        syncsafe = bytes((body_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+        tag = b'ID3\x04\x00\x00' + syncsafe + bytes(body_size)
+        audio = mp3_frame(MPEG1_L3_128K, 417) * 4
+        self.assertGreater(len(tag), HEADER_READ_BYTES)
+        info = probe_audio(tag + audio)
+        self.assertEqual(info, AudioInfo('mp3', len(audio) * 8 / 128000, 44100, 2))
+        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
+            f.write(tag + audio)
+        try:
+            self.assertEqual(probe_audio(f.name), info)
+        finally:
+            os.remove(f.name)
+
+    def test_id3_tag_with_footer(self):
+        tag = b'ID3\x04\x00\x10' + bytes([0, 0, 0, 20]) + bytes(20) + b'3DI' + bytes(7)
+        info = probe_audio(tag + mp3_frame(MPEG1_L3_128K, 417) * 2)
+        self.assertEqual(info.duration, 417 * 2 * 8 / 128000)
+
+    def test_leading_junk_before_first_frame(self):
+        info = probe_audio(b'\x00' * 50 + mp3_frame(MPEG1_L3_128K, 417) * 2)
+        self.assertEqual(info.sample_rate, 44100)
+
+    def test_single_sync_word_in_noise_is_rejected(self):
+        data = bytes(100) + bytes(MPEG1_L3_128K) + bytes(range(256)) * 4
+        self.assertIsNone(probe_audio(data))
+
+    def test_reserved_header_values_are_rejected(self):
+        for header in ((0xFF, 0xEB, 0x90, 0x00),    # Reserved MPEG version
+                       (0xFF, 0xF9, 0x90, 0x00),    # Reserved layer
+                       (0xFF, 0xFB, 0xF0, 0x00),    # Bad bitrate index
+                       (0xFF, 0xFB, 0x9C, 0x00)):   # Reserved sample rate
+            self.assertIsNone(probe_audio(mp3_frame(header, 417) * 3), header)
+
+    def test_truncated_first_frame_is_accepted(self):
+        # Nothing follows to contradict the header, e.g. a very short clip
+        self.assertEqual(probe_audio(bytes(MPEG1_L3_128K) + bytes(100)).codec, 'mp3')
+
+
+class TestWavProbe(unittest.TestCase):
+    def test_duration(self):
+        data = wav_file([fmt_chunk(), (b'data', bytes(176400))])
+        self.assertEqual(probe_audio(data), AudioInfo('wav', 1.0, 44100, 2))
+
+    def test_chunks_before_data_with_odd_sizes(self):
+        data = wav_file([(b'LIST', bytes(7)), fmt_chunk(1, 16000), (b'fact', bytes(4)), (b'data', bytes(16000))])
+        self.assertEqual(probe_audio(data), AudioInfo('wav', 0.5, 16000, 1))
+
+    def test_data_chunk_size_beyond_header_window(self):
+        # Only the header is read; the duration comes from the declared size
+        data = wav_file([fmt_chunk(), (b'data', bytes(HEADER_READ_BYTES * 2))])
+        self.assertAlmostEqual(probe_audio(data).duration, HEADER_READ_BYTES * 2 / 176400)
+
+    def test_data_before_fmt(self):
+        self.assertIsNone(probe_audio(wav_file([(b'data', bytes(100)), fmt_chunk()])))
+
+    def test_truncated(self):
+        data = wav_file([fmt_chunk(), (b'data', bytes(100))])
+        for length in (4, 12, 30):
+            self.assertIsNone(probe_audio(data[:length]), length)
+
+    def test_not_wave(self):
+        self.assertIsNone(probe_audio(b'RIFF' + struct.pack('<I', 4) + b'AVI ' + bytes(40)))
+
+
+class TestOggProbe(unittest.TestCase):
+    def test_opus_duration_from_last_granule(self):
+        data = ogg_page(0, opus_head(), 2) + bytes(1000) + ogg_page(48000 + 312, bytes(50), 4)
+        self.assertEqual(probe_audio(data), AudioInfo('opus', 1.0, 48000, 2))
+
+    def test_opus_input_rate_is_reported(self):
+        data = ogg_page(0, opus_head(1, 0, 16000)) + ogg_page(24000, bytes(10))
+        self.assertEqual(probe_audio(data), AudioInfo('opus', 0.5, 16000, 1))
+
+    def test_vorbis(self):
+        data = ogg_page(0, vorbis_id(1, 22050), 2) + ogg_page(44100, bytes(10), 4)
+        self.assertEqual(probe_audio(data), AudioInfo('ogg', 2.0, 22050, 1))
+
+    def test_unknown_codec(self):
+        self.assertIsNone(probe_audio(ogg_page(0, b'\x80theora' + bytes(40))))
+
+    def test_truncated(self):
+        data = ogg_page(0, opus_head())
+        self.assertIsNone(probe_audio(data[:20]))
+        self.assertIsNone(probe_audio(data[:30]))   # OpusHead cut short
+
+
+class TestProbeSources(unittest.TestCase):
+    def test_file_path(self):
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
+            f.write(wav_file([fmt_chunk(), (b'data', bytes(44100))]))
+        try:
+            self.assertEqual(probe_audio(f.name).duration, 0.25)
+        finally:
+            os.remove(f.name)
+
+    def test_missing_file(self):
+        self.assertIsNone(probe_audio('/nonexistent/audio.mp3'))
+
+    def test_m4a(self):
+        self.assertEqual(probe_audio(b'\x00\x00\x00\x18ftypM4A ' + bytes(40)).codec, 'm4a')
+
+    def test_garbage(self):
+        for data in (b'', b'\xff', b'hello world' * 100, bytes(range(256)) * 40, b'\xff\xff\xff\xff' * 10):
+            self.assertIsNone(probe_audio(data), data[:16])
+
+
+if __name__ == '__main__':
+    unittest.main()
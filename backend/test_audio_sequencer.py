@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# PlaylistSequencer with raw PCM clips and a recording stream in place of aplay.
+
+import threading
+import time
+import unittest
+
+from pydub import AudioSegment
+
+import audio_sequencer
+from audio_sequencer import PlaylistSequencer, Clip, STALL_CHUNK_MS
+
+RATE = audio_sequencer.DEFAULT_PLAYBACK_RATE
+
+
+def pcm(value, frames=100):
+    # 16-bit stereo frames that cannot be mistaken for silence
+    return bytes([value, 0]) * 2 * frames
+
+
+def decode(data, content_type=None):
+    return AudioSegment(data=data, sample_width=2, frame_rate=RATE, channels=2), 'pcm'
+
+
+class RecordingStream:
+    def __init__(self, on_write=None):
+        self.writes = []
+        self.empty = True
+        self.closed = False
+        self.on_write = on_write
+
+    def write(self, data):
+        self.empty = False
+        if self.on_write:
+            self.on_write(data)
+        self.writes.append(data)
+
+    def close(self):
+        self.closed = True
+
+    def parts(self):
+        # Collapses the writes into ('silence', ms) and ('clip', first byte) entries
+        parts = []
+        for data in self.writes:
+            if any(data):
+                parts.append(('clip', data[0]))
+            elif parts and parts[-1][0] == 'silence':
+                parts[-1] = ('silence', parts[-1][1] + len(data) * 1000 // (RATE * 4))
+            else:
+                parts.append(('silence', len(data) * 1000 // (RATE * 4)))
+        return parts
+
+
+class TestPlaylistSequencer(unittest.TestCase):
+    def setUp(self):
+        self.streams = []
+        self.sequencer = PlaylistSequencer(decode, player='')
+        self.sequencer._open_stream = self.open_stream
+        self.on_write = None
+
+    def open_stream(self):
+        self.sequencer._record(streams=1)
+        stream = RecordingStream(self.on_write)
+        self.streams.append(stream)
+        return stream
+
+    def play_and_wait(self, clips):
+        self.sequencer.play(clips, 0)
+        self.sequencer.playlists.join()
+
+    def test_clips_play_in_order_with_lead_in_and_gaps(self):
+        self.play_and_wait([Clip(pcm(1)), Clip(pcm(2)), Clip(pcm(3))])
+        self.assertEqual(self.streams[0].parts(), [
+            ('silence', self.sequencer.lead_in_ms), ('clip', 1),
+            ('silence', self.sequencer.clip_gap_ms), ('clip', 2),
+            ('silence', self.sequencer.clip_gap_ms), ('clip', 3)])
+        self.assertTrue(self.streams[0].closed)
+        stats = self.sequencer.get_stats()
+        self.assertEqual((stats["playlists"], stats["clips"], stats["stalls"]), (1, 3, 0))
+
+    def test_next_clip_is_prepared_while_the_current_one_plays(self):
+        second_loaded = threading.Event()
+        loaded_during_first = []
+
+        def on_write(data):
+            if any(data) and data[0] == 1:
+                # Writing the first clip blocks at the device's pace; the second loads meanwhile
+                loaded_during_first.append(second_loaded.wait(2))
+        self.on_write = on_write
+        second = Clip(loader=lambda: second_loaded.set() or (pcm(2), None))
+        self.play_and_wait([Clip(pcm(1)), second])
+        self.assertEqual(loaded_during_first, [True])
+
+    def test_silence_is_written_while_a_clip_stalls(self):
+        def slow():
+            time.sleep(STALL_CHUNK_MS * 5 / 1000)
+            return pcm(2), None
+        self.play_and_wait([Clip(pcm(1)), Clip(loader=slow, label='slow')])
+
+        parts = self.streams[0].parts()
+        self.assertEqual([part for part in parts if part[0] == 'clip'], [('clip', 1), ('clip', 2)])
+        # Stall silence plus the usual gap sits between the two clips
+        self.assertGreaterEqual(parts[2][1], self.sequencer.clip_gap_ms + STALL_CHUNK_MS * 3)
+        stats = self.sequencer.get_stats()
+        self.assertEqual(stats["stalls"], 1)
+        self.assertGreater(stats["stall_seconds"], 0)
+
+    def test_failed_clip_is_skipped(self):
+        published = []
+        self.sequencer.publish = lambda event_type, data=None: published.append(data)
+
+        def broken():
+            raise ValueError("bad audio")
+        self.play_and_wait([Clip(loader=broken, label='broken'), Clip(loader=lambda: None), Clip(pcm(3))])
+        self.assertEqual([part for part in self.streams[0].parts() if part[0] == 'clip'], [('clip', 3)])
+        self.assertEqual(self.sequencer.get_stats()["skipped"], 2)
+        self.assertIn({"status": "error", "error": "bad audio"}, published)
+
+    def test_queued_playlists_share_one_stream(self):
+        release = threading.Event()
+        self.sequencer.play([Clip(loader=lambda: release.wait(2) and (pcm(1), None))], 0)
+        self.sequencer.play([Clip(pcm(2))], 0)
+        self.sequencer.play([Clip(pcm(3))], 0)
+        release.set()
+        self.sequencer.playlists.join()
+
+        self.assertEqual(len(self.streams), 1)
+        self.assertEqual([part for part in self.streams[0].parts() if part[0] == 'clip'],
+                         [('clip', 1), ('clip', 2), ('clip', 3)])
+
+    def test_backlog(self):
+        release = threading.Event()
+        self.sequencer.max_queued = 2
+        self.sequencer.play([Clip(loader=lambda: release.wait(2) and (pcm(1), None))], 0)
+        while self.sequencer.queue_depth():
+            time.sleep(0.01)  # Until the first playlist is taken off the queue
+        self.sequencer.play([Clip(pcm(2))], 0)
+        self.assertFalse(self.sequencer.backlog_full())
+        self.sequencer.play([Clip(pcm(3))], 0)
+        self.assertTrue(self.sequencer.backlog_full())
+        release.set()
+        self.sequencer.playlists.join()
+        self.assertFalse(self.sequencer.backlog_full())
+
+
+if __name__ == '__main__':
+    unittest.main()
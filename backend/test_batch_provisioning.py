@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# ProvisioningSession against in-memory tags; the encoding is a stand-in for tag_layout.
+
+import unittest
+
+from batch_provisioning import ProvisioningSession
+
+
+def encode(payload):
+    return b'ENC' + payload.encode()
+
+
+class FakeTags:
+    # uid -> tag body; writes can be made to fail for chosen UIDs
+    def __init__(self, bodies=None):
+        self.bodies = dict(bodies or {})
+        self.failing = set()
+        self.writes = []
+
+    def present(self, session, uid):
+        def write_bytes(data):
+            self.writes.append(uid)
+            if uid in self.failing:
+                raise IOError("Verification failed")
+            self.bodies[uid] = data[len(b'ENC'):]
+        return session.handle_tag(uid, lambda: self.bodies.get(uid), write_bytes)
+
+
+class TestProvisioningSession(unittest.TestCase):
+    def test_payloads_are_written_in_order_and_encoded_up_front(self):
+        encoded = []
+        session = ProvisioningSession(['{"a": 1}', '{"a": 2}'], lambda p: encoded.append(p) or encode(p))
+        self.assertEqual(encoded, ['{"a": 1}', '{"a": 2}'])
+
+        tags = FakeTags()
+        self.assertEqual(tags.present(session, b'\x01')["index"], 0)
+        self.assertEqual(tags.present(session, b'\x02')["index"], 1)
+        self.assertEqual(tags.bodies, {b'\x01': b'{"a": 1}', b'\x02': b'{"a": 2}'})
+        self.assertFalse(session.active)
+        self.assertEqual(session.summary()["written"], 2)
+
+    def test_tag_already_holding_a_pending_payload_is_skipped(self):
+        session = ProvisioningSession(['{"a": 1}', '{"a": 2}'], encode)
+        tags = FakeTags({b'\x01': b'{"a": 2}'})
+        result = tags.present(session, b'\x01')
+        self.assertEqual((result["status"], result["index"]), ('skipped', 1))
+        self.assertEqual(tags.writes, [])
+        # The next blank tag gets the payload that is still pending
+        self.assertEqual(tags.present(session, b'\x02')["index"], 0)
+        summary = session.summary()
+        self.assertEqual((summary["written"], summary["skipped"], summary["pending"]), (1, 1, 0))
+
+    def test_same_uid_is_only_handled_once(self):
+        session = ProvisioningSession(['{"a": 1}', '{"a": 2}'], encode)
+        tags = FakeTags()
+        tags.present(session, b'\x01')
+        self.assertIsNone(tags.present(session, b'\x01'))
+        self.assertEqual(session.summary()["pending"], 1)
+
+    def test_failed_tag_can_be_presented_again(self):
+        session = ProvisioningSession(['{"a": 1}'], encode)
+        tags = FakeTags()
+        tags.failing.add(b'\x01')
+        result = tags.present(session, b'\x01')
+        self.assertEqual((result["status"], result["error"]), ('failed', "Verification failed"))
+        self.assertTrue(session.active)
+        self.assertEqual(session.summary()["pending"], 1)
+
+        tags.failing.clear()
+        result = tags.present(session, b'\x01')
+        self.assertEqual((result["status"], result["index"]), ('written', 0))
+        self.assertFalse(session.active)
+        summary = session.summary()
+        self.assertEqual((summary["written"], summary["failed"], summary["done"]), (1, 1, 1))
+
+    def test_stopped_session_ignores_tags(self):
+        session = ProvisioningSession(['{"a": 1}'], encode)
+        session.stop()
+        self.assertIsNone(FakeTags().present(session, b'\x01'))
+        self.assertFalse(session.summary()["active"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# CacheWarmer passes driven directly, with fake tag history and downloads.
+
+import time
+import unittest
+from unittest import mock
+
+import cache_warmer
+from cache_warmer import CacheWarmer
+
+
+def tags(count):
+    return [{"uid": f"uid{n}", "payload": {"text": f"tag {n}"}} for n in range(count)]
+
+
+class TestCacheWarmer(unittest.TestCase):
+    def setUp(self):
+        for name, value in (('WARM_BYTES_PER_SECOND', 10**9), ('WARM_MAX_BYTES', 10**9)):
+            patcher = mock.patch.object(cache_warmer, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.history = tags(5)
+        self.warmed = []
+        self.speech = 0
+
+    def warm_tag(self, payload):
+        self.warmed.append(payload["text"])
+        return 400
+
+    def warm_speech(self):
+        self.speech += 1
+
+    def warmer(self, warm_tag=None):
+        return CacheWarmer(lambda limit, since: self.history[:limit], warm_tag or self.warm_tag, self.warm_speech)
+
+    def test_pass_warms_the_top_tags(self):
+        warmer = self.warmer()
+        warmer._warm(reason='boot')
+        self.assertEqual(self.warmed, [f"tag {n}" for n in range(5)])
+        self.assertEqual(self.speech, 1)
+        stats = warmer.get_stats()
+        self.assertEqual((stats["passes"], stats["tags_checked"], stats["tags_fetched"], stats["bytes"]),
+                         (1, 5, 5, 2000))
+        self.assertEqual(stats["warmed_tags"], 5)
+
+    def test_scan_interrupts_the_pass(self):
+        warmer = None
+
+        def warm_tag(payload):
+            self.warmed.append(payload["text"])
+            if len(self.warmed) == 2:
+                warmer.note_scan('uid9')  # The read loop sees a tag mid-pass
+            return 400
+        warmer = self.warmer(warm_tag)
+        warmer._warm(reason='idle')
+
+        self.assertEqual(self.warmed, ["tag 0", "tag 1"])
+        stats = warmer.get_stats()
+        self.assertEqual((stats["interrupted"], stats["tags_checked"]), (1, 2))
+        self.assertLessEqual(warmer.next_pass, time.monotonic())  # Resumes at the next idle period
+        self.assertFalse(warmer.is_idle())
+
+    def test_scan_cuts_the_throttle_wait_short(self):
+        with mock.patch.object(cache_warmer, 'WARM_BYTES_PER_SECOND', 100):
+            warmer = None
+
+            def warm_tag(payload):
+                warmer.note_scan('uid9')
+                return 400  # Four seconds of throttling at 100 bytes/s
+            warmer = self.warmer(warm_tag)
+            started = time.monotonic()
+            warmer._warm(reason='idle')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(warmer.get_stats()["interrupted"], 1)
+
+    def test_byte_budget_ends_the_pass(self):
+        with mock.patch.object(cache_warmer, 'WARM_MAX_BYTES', 1000):
+            warmer = self.warmer()
+            warmer._warm(reason='idle')
+        self.assertEqual(self.warmed, ["tag 0", "tag 1", "tag 2"])  # 1200 bytes: the budget is checked per tag
+        self.assertEqual(warmer.get_stats()["interrupted"], 0)
+
+    def test_cached_tags_cost_nothing_against_the_budget(self):
+        with mock.patch.object(cache_warmer, 'WARM_MAX_BYTES', 1):
+            warmer = self.warmer(lambda payload: self.warmed.append(payload["text"]) or 0)
+            warmer._warm(reason='idle')
+        self.assertEqual(len(self.warmed), 5)
+        self.assertEqual(warmer.get_stats()["tags_fetched"], 0)
+
+    def test_failed_tags_are_skipped(self):
+        def warm_tag(payload):
+            if payload["text"] == "tag 1":
+                raise ConnectionError("server unreachable")
+            return self.warm_tag(payload)
+        self.history.insert(2, {"uid": "empty", "payload": None})
+        warmer = self.warmer(warm_tag)
+        warmer._warm(reason='idle')
+        self.assertEqual(self.warmed, ["tag 0", "tag 2", "tag 3", "tag 4"])
+        stats = warmer.get_stats()
+        self.assertEqual((stats["failures"], stats["tags_checked"]), (1, 4))
+
+    def test_history_error_skips_the_pass(self):
+        def broken(limit, since):
+            raise RuntimeError("database locked")
+        warmer = CacheWarmer(broken, self.warm_tag)
+        warmer._warm(reason='boot')
+        self.assertEqual(self.warmed, [])
+        self.assertEqual(warmer.get_stats()["passes"], 1)
+
+    def test_warm_scan_and_hit_rates(self):
+        warmer = self.warmer()
+        warmer._warm(reason='boot')
+        for uid in ('uid0', 'uid1', 'other', 'uid0'):
+            warmer.note_scan(uid)
+        for hit in (True, True, False, True):
+            warmer.note_lookup(hit)
+        stats = warmer.get_stats()
+        self.assertEqual((stats["scans"], stats["warm_scans"], stats["warm_scan_rate"]), (4, 3, 0.75))
+        self.assertEqual(stats["hit_rate"], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# ConfigStore against a config file in a temporary directory.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from config_store import ConfigStore
+
+
+class TestConfigStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'langiot.conf')
+        self.write("[Audio]\nPlaybackRate = 44100\n")
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        if mtime_ns:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_reloads_only_when_the_file_changes(self):
+        store = ConfigStore(self.path)
+        calls = []
+        store.subscribe(lambda config, version: calls.append((config.get('Audio', 'PlaybackRate'), version)))
+        self.assertEqual(calls, [('44100', store.version)])
+
+        store.get()
+        store.get()
+        self.assertEqual(len(calls), 1)
+
+        # Same size and a new mtime: only the stat signature can tell
+        self.write("[Audio]\nPlaybackRate = 48000\n", mtime_ns=os.stat(self.path).st_mtime_ns + 10**9)
+        self.assertEqual(store.get().get('Audio', 'PlaybackRate'), '48000')
+        self.assertEqual(calls[-1], ('48000', store.version))
+        self.assertEqual(len(calls), 2)
+
+    def test_missing_file_is_an_empty_config(self):
+        os.remove(self.path)
+        store = ConfigStore(self.path)
+        self.assertEqual(store.get().sections(), [])
+        self.assertEqual(store.version, 0)
+
+    def test_failing_subscriber_does_not_stop_the_others(self):
+        store = ConfigStore(self.path)
+        seen = []
+
+        def broken(config, version):
+            if seen:
+                raise ValueError("bad config")
+        store.subscribe(broken)
+        store.subscribe(lambda config, version: seen.append(version))
+        store.update({'Audio': {'PlaybackRate': 22050}})
+        self.assertEqual(len(seen), 2)
+
+    def test_update_keeps_other_keys_and_preserves_mode(self):
+        os.chmod(self.path, 0o640)
+        store = ConfigStore(self.path)
+        version = store.update({'Audio': {'ClipGapMs': 100}, 'Server': {'Url': 'http://example.com'}})
+
+        self.assertEqual(version, os.stat(self.path).st_mtime_ns)
+        config = store.get()
+        self.assertEqual((config.get('Audio', 'PlaybackRate'), config.get('Audio', 'ClipGapMs')), ('44100', '100'))
+        self.assertEqual(config.get('Server', 'Url'), 'http://example.com')
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['langiot.conf', 'langiot.conf.lock'])
+
+    def test_failed_write_leaves_the_file_intact(self):
+        store = ConfigStore(self.path)
+        with mock.patch('config_store.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.update({'Audio': {'PlaybackRate': 8000}})
+        with open(self.path) as f:
+            self.assertIn('44100', f.read())
+        self.assertEqual(sorted(os.listdir(self.directory)), ['langiot.conf', 'langiot.conf.lock'])
+
+    def test_concurrent_updates_are_not_lost(self):
+        # Separate stores stand in for separate processes sharing the file
+        stores = [ConfigStore(self.path) for _ in range(4)]
+        threads = [threading.Thread(target=lambda n=n: [stores[n].update({'Keys': {f'k{n}_{i}': i}})
+                                                        for i in range(10)]) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(ConfigStore(self.path).get()['Keys']), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
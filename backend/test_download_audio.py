@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# AudioStore puts and eviction in a temporary directory; no network access.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from download_audio import AudioStore
+
+
+class TestAudioStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_concurrent_puts_of_the_same_bytes(self):
+        store = AudioStore(self.root)
+        errors = []
+
+        def put(n):
+            try:
+                for _ in range(20):
+                    with open(store.put(f"segment:{n}", b'shared phrase' * 1000), 'rb') as f:
+                        f.read()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=put, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(os.listdir(store.objects_dir)), 1)
+        self.assertEqual(os.listdir(store.partial_dir), [])
+
+    def test_put_never_evicts_its_own_object(self):
+        store = AudioStore(self.root, max_bytes=1000)
+        store.put('old', b'a' * 600)
+        path = store.put('new', b'b' * 1500)  # Alone over the limit
+        self.assertTrue(os.path.exists(path))
+        self.assertIsNone(store.cached_path('old'))
+        self.assertEqual(store.cached_path('new'), path)
+
+    def test_evicted_object_is_a_cache_miss(self):
+        store = AudioStore(self.root)
+        url = 'https://example.com/a.mp3'
+        path = store.put(url, b'audio')
+        with mock.patch.object(store, 'cached_path', return_value=path), \
+                mock.patch.object(store, '_download', return_value='downloaded') as download:
+            os.remove(path)  # Evicted between the lookup and the touch
+            self.assertEqual(store.fetch(url), 'downloaded')
+        download.assert_called_once_with(url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# EventBroker fan-out, the subscriber cap and drop-oldest buffering, without a web server.
+
+import json
+import unittest
+from unittest import mock
+
+from event_stream import EventBroker
+
+
+def events_from(chunks):
+    # Parses SSE chunks into (event type, data) pairs, ignoring retry and keepalive lines
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n') if not line.startswith((':', 'retry')))
+        if fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+class TestEventBroker(unittest.TestCase):
+    def test_subscriber_cap(self):
+        broker = EventBroker(max_subscribers=2)
+        first, second = broker.subscribe(), broker.subscribe()
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(broker.subscribe())
+        self.assertEqual(broker.stats(), {"subscribers": 2, "max_subscribers": 2, "rejected": 1})
+
+        broker.unsubscribe(first)
+        self.assertIsNotNone(broker.subscribe())
+
+    def test_closing_a_stream_frees_its_slot(self):
+        broker = EventBroker(max_subscribers=1)
+        stream = broker.stream(broker.subscribe(), keepalive=0.01)
+        next(stream)
+        self.assertIsNone(broker.subscribe())
+        stream.close()
+        self.assertEqual(broker.stats()["subscribers"], 0)
+        self.assertIsNotNone(broker.subscribe())
+
+    def test_fan_out(self):
+        broker = EventBroker()
+        streams = [broker.stream(broker.subscribe(), keepalive=0.01) for _ in range(2)]
+        for stream in streams:
+            next(stream)  # retry hint
+        broker.publish('scan', {"uid": "04a1"})
+        for stream in streams:
+            self.assertEqual(events_from([next(stream)]), [('scan', {"id": 1, "type": "scan", "time": mock.ANY,
+                                                                     "data": {"uid": "04a1"}})])
+
+    def test_slow_client_drops_oldest(self):
+        broker = EventBroker(buffer_size=3)
+        stream = broker.stream(broker.subscribe(), keepalive=0.01)
+        next(stream)
+        for n in range(5):
+            broker.publish('playback', {"n": n})
+
+        chunks = [next(stream) for _ in range(3)]
+        parsed = events_from(chunks)
+        self.assertEqual(parsed[0], ('dropped', {"count": 2}))
+        self.assertEqual([data["data"]["n"] for _, data in parsed[1:]], [2, 3])
+        self.assertEqual(events_from([next(stream)])[0][1]["data"]["n"], 4)
+
+    def test_keepalive_on_idle_stream(self):
+        broker = EventBroker()
+        stream = broker.stream(broker.subscribe(), keepalive=0.01)
+        next(stream)
+        self.assertEqual(next(stream), ": keepalive\n\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# The logging pipeline's handlers and filter on a private logger; the root logger is left alone.
+
+import logging
+import queue
+import time
+import unittest
+
+from log_pipeline import SamplingFilter, DroppingQueueHandler, RingBufferHandler, Lazy
+
+
+def record(msg, *args, level=logging.WARNING, lineno=10):
+    return logging.LogRecord('test', level, __file__, lineno, msg, args, None)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    def test_burst_then_suppressed_count(self):
+        sampler = SamplingFilter(interval=0.2, burst=3)
+        passed = [sampler.filter(record("Tag read failed: %s", n)) for n in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+
+        time.sleep(0.25)
+        first = record("Tag read failed: %s", 10)
+        self.assertTrue(sampler.filter(first))
+        self.assertEqual(first.getMessage(), "Tag read failed: 10 (suppressed 7 similar messages)")
+        second = record("Tag read failed: %s", 11)
+        self.assertTrue(sampler.filter(second))
+        self.assertEqual(second.getMessage(), "Tag read failed: 11")
+
+    def test_messages_are_sampled_separately(self):
+        sampler = SamplingFilter(interval=60, burst=1)
+        self.assertTrue(sampler.filter(record("a")))
+        self.assertTrue(sampler.filter(record("b")))
+        self.assertTrue(sampler.filter(record("a", level=logging.ERROR)))
+        self.assertTrue(sampler.filter(record("a", lineno=20)))
+        self.assertFalse(sampler.filter(record("a")))
+
+    def test_critical_is_never_dropped(self):
+        sampler = SamplingFilter(interval=60, burst=1)
+        self.assertTrue(all(sampler.filter(record("down", level=logging.CRITICAL)) for _ in range(5)))
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    def test_full_queue_drops_without_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=3))
+        logger = logging.getLogger('test_log_pipeline.dropping')
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        started = time.monotonic()
+        for n in range(10):
+            logger.warning("message %d", n)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual((handler.queue.qsize(), handler.dropped), (3, 7))
+        # Records are queued unformatted; the listener thread renders them
+        queued = handler.queue.get_nowait()
+        self.assertEqual((queued.msg, queued.args), ("message %d", (0,)))
+
+    def test_lazy_argument_is_not_formatted_when_dropped(self):
+        calls = []
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        handler.addFilter(SamplingFilter(interval=60, burst=1))
+        for _ in range(3):
+            handler.handle(record("state %s", Lazy(lambda: calls.append(1) or "expensive")))
+        self.assertEqual(calls, [])
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "state expensive")
+        self.assertEqual(calls, [1])
+
+
+class TestRingBufferHandler(unittest.TestCase):
+    def test_keeps_the_most_recent_records(self):
+        ring = RingBufferHandler(capacity=3)
+        for n in range(5):
+            ring.handle(record("n=%d", n, level=logging.INFO if n % 2 else logging.ERROR))
+        self.assertEqual([e["message"] for e in ring.snapshot()], ["n=2", "n=3", "n=4"])
+        self.assertEqual([e["message"] for e in ring.snapshot(min_level=logging.ERROR)], ["n=2", "n=4"])
+        self.assertEqual([e["message"] for e in ring.snapshot(limit=1)], ["n=4"])
+
+    def test_unformattable_record(self):
+        ring = RingBufferHandler()
+        ring.handle(record("%d items", "not a number"))
+        self.assertIn("unformattable record", ring.snapshot()[0]["message"])
+
+    def test_lazy_failure_is_reported_in_the_message(self):
+        ring = RingBufferHandler()
+        ring.handle(record("value %s", Lazy(lambda: 1 / 0)))
+        self.assertIn("lazy format failed", ring.snapshot()[0]["message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# Phrase segmentation and PhraseAudio caching against an AudioStore in a temporary directory.
+
+import shutil
+import tempfile
+import threading
+import unittest
+
+from download_audio import AudioStore
+from phrase_audio import PhraseAudio, split_phrases, translation_segments, segment_key
+
+
+class TestSegmentation(unittest.TestCase):
+    def test_split_phrases(self):
+        self.assertEqual(split_phrases("Hello there. How are you?  Fine!"), ["Hello there.", "How are you?", "Fine!"])
+        self.assertEqual(split_phrases("你好。 谢谢！"), ["你好。", "谢谢！"])
+        self.assertEqual(split_phrases("No sentence end"), ["No sentence end"])
+        self.assertEqual(split_phrases("Version 1.5 is out."), ["Version 1.5 is out."])
+        self.assertEqual(split_phrases("  "), [])
+
+    def test_source_language_then_each_translation(self):
+        payload = {"text": "One. Two.", "language": "en", "translations": ["es", "", "fr"]}
+        self.assertEqual([(s["target"], s["text"]) for s in translation_segments(payload)],
+                         [("en", "One."), ("en", "Two."), ("es", "One."), ("es", "Two."), ("fr", "One."), ("fr", "Two.")])
+
+    def test_shared_phrase_has_one_key(self):
+        first = translation_segments({"text": "Good morning. Page one.", "language": "en"})
+        second = translation_segments({"text": "Good morning. Page two.", "language": "en"})
+        self.assertEqual(segment_key(first[0]), segment_key(second[0]))
+        self.assertNotEqual(segment_key(first[1]), segment_key(second[1]))
+
+
+class TestPhraseAudio(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.fetched = []
+        self.failing = set()
+        self.lock = threading.Lock()
+        self.phrase_audio = PhraseAudio(AudioStore(self.root), self.fetch_segment)
+
+    def fetch_segment(self, segment):
+        with self.lock:
+            self.fetched.append(segment["text"])
+        if segment["text"] in self.failing:
+            return None, None
+        return f"{segment['target']}:{segment['text']}".encode(), 'audio/mpeg'
+
+    def test_resolve_fetches_missing_segments_then_hits_the_cache(self):
+        payload = {"text": "Good morning. Page one.", "language": "en", "translations": ["es"]}
+        resolved = self.phrase_audio.resolve(payload)
+        self.assertEqual([data for _, data, _ in resolved],
+                         [b"en:Good morning.", b"en:Page one.", b"es:Good morning.", b"es:Page one."])
+        self.assertEqual({content_type for _, _, content_type in resolved}, {'audio/mpeg'})
+        self.assertTrue(self.phrase_audio.is_cached(payload))
+
+        self.fetched.clear()
+        self.phrase_audio.resolve({"text": "Good morning. Page two.", "language": "en"})
+        self.assertEqual(self.fetched, ["Page two."])
+        stats = self.phrase_audio.get_stats()
+        self.assertEqual((stats["payloads"], stats["segments"], stats["hits"], stats["misses"]), (2, 6, 1, 5))
+
+    def test_any_missing_segment_falls_back(self):
+        self.failing.add("Page one.")
+        payload = {"text": "Good morning. Page one.", "language": "en"}
+        self.assertIsNone(self.phrase_audio.resolve(payload))
+        stats = self.phrase_audio.get_stats()
+        self.assertEqual((stats["failures"], stats["fallbacks"]), (1, 1))
+        # The segment that did arrive is kept for next time
+        self.assertFalse(self.phrase_audio.is_cached(payload))
+        self.failing.clear()
+        self.fetched.clear()
+        self.assertIsNotNone(self.phrase_audio.resolve(payload))
+        self.assertEqual(self.fetched, ["Page one."])
+
+    def test_fetch_error_falls_back(self):
+        def broken(segment):
+            raise ConnectionError("server unreachable")
+        self.phrase_audio.fetch_segment = broken
+        self.assertIsNone(self.phrase_audio.resolve({"text": "Hello.", "language": "en"}))
+        self.assertEqual(self.phrase_audio.get_stats()["fallbacks"], 1)
+
+    def test_empty_text(self):
+        self.assertIsNone(self.phrase_audio.resolve({"text": " ", "language": "en"}))
+        self.assertEqual(self.fetched, [])
+
+    def test_prefetch_does_not_count_as_scans(self):
+        payload = {"text": "One. Two.", "language": "en"}
+        self.assertEqual(self.phrase_audio.prefetch(payload), len(b"en:One.") + len(b"en:Two."))
+        self.assertEqual(self.phrase_audio.prefetch(payload), 0)
+        self.assertEqual(self.phrase_audio.get_stats()["segments"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# ScanHistory against a temporary SQLite file: batching, dropping under load and queries.
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import scan_history
+from scan_history import ScanHistory
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the history writer")
+        time.sleep(0.01)
+
+
+class TestScanHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history.db')
+        patcher = mock.patch.object(scan_history, 'FLUSH_INTERVAL', 0.2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_scans_are_written_in_batches(self):
+        history = ScanHistory(self.path)
+        for n in range(120):
+            history.record(f"uid{n % 3}", 'ok', {"text": f"tag {n % 3}"}, timings={"total_ms": n})
+        wait_for(lambda: history.get_stats()["written"] == 120)
+
+        stats = history.get_stats()
+        self.assertEqual((stats["recorded"], stats["dropped"], stats["scans"], stats["tags"]), (120, 0, 120, 3))
+        # 120 scans recorded at once share transactions of up to BATCH_SIZE
+        self.assertLessEqual(stats["batches"], 120 // scan_history.BATCH_SIZE + 2)
+        self.assertGreaterEqual(stats["batches"], -(-120 // scan_history.BATCH_SIZE))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        release = threading.Event()
+        with mock.patch.object(scan_history, 'QUEUE_SIZE', 5), mock.patch.object(scan_history, 'BATCH_SIZE', 2):
+            history = ScanHistory(self.path)
+            write_batch = history._write_batch
+
+            def stalled_write(db, batch):
+                release.wait(5)  # A slow disk holding up the writer
+                write_batch(db, batch)
+            history._write_batch = stalled_write
+
+            started = time.monotonic()
+            for n in range(50):
+                history.record(f"uid{n}", 'ok')
+            self.assertLess(time.monotonic() - started, 0.5)
+
+            stats = history.get_stats()
+            self.assertEqual(stats["recorded"] + stats["dropped"], 50)
+            # At most one batch in the writer plus a full queue got through
+            self.assertLessEqual(stats["recorded"], 5 + 2)
+            self.assertGreater(stats["dropped"], 0)
+
+            release.set()
+            wait_for(lambda: history.get_stats()["written"] == stats["recorded"])
+
+    def test_bad_batch_does_not_stop_the_writer(self):
+        history = ScanHistory(self.path)
+        history.record('bad', 'ok', {"value": object()})  # Not JSON serializable
+        wait_for(lambda: history.get_stats()["dropped"] == 1)
+        history.record('good', 'ok', {"text": "fine"})
+        wait_for(lambda: history.get_stats()["written"] == 1)
+        self.assertTrue(history.writer.is_alive())
+
+    def test_queries(self):
+        history = ScanHistory(self.path)
+        for uid, status, total in [('a', 'ok', 10), ('a', 'ok', 30), ('b', 'invalid_payload', 50), ('b', 'ok', 20),
+                                   ('b', 'read_failed', 40)]:
+            history.record(uid, status, {"text": uid} if status == 'ok' else None, timings={"total_ms": total})
+        wait_for(lambda: history.get_stats()["written"] == 5)
+
+        self.assertEqual([(t["uid"], t["scans"]) for t in history.top_tags()], [('b', 3), ('a', 2)])
+        self.assertEqual([(t["uid"], t["scans"], t["payload"]) for t in history.top_tags(status='ok')],
+                         [('a', 2, {"text": "a"}), ('b', 1, {"text": "b"})])
+        self.assertEqual({f["status"] for f in history.recent_failures()}, {'invalid_payload', 'read_failed'})
+        latency = history.latency_percentiles()["total_ms"]
+        self.assertEqual((latency["count"], latency["p50"], latency["p99"]), (5, 30, 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
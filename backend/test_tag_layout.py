@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Reads and writes the tag layouts against an in-memory NTAG block store.
+
+import json
+import unittest
+
+from tag_layout import (encode_tag_layout, read_tag_layout, crc16, TagReadError, MAX_RETRIES,
+                        PAGE_SIZE, SEGMENT_SIZE, VERSION, get_tag_read_stats)
+
+START_PAGE = 4
+NTAG215_PAGES = 135
+
+
+class FakePN532:
+    # NTAG memory behind the two PN532 calls the layout uses. A READ returns the 16 bytes
+    # (4 pages) starting at the page, wrapping like the real tag. corrupt and fail map a page
+    # to how many of its next reads are bit-flipped or return None.
+    def __init__(self, pages=NTAG215_PAGES):
+        self.memory = bytearray(pages * PAGE_SIZE)
+        self.corrupt = {}
+        self.fail = {}
+        self.reads = []
+
+    def ntag2xx_write_block(self, page, data):
+        assert len(data) == PAGE_SIZE
+        self.memory[page * PAGE_SIZE:(page + 1) * PAGE_SIZE] = bytes(data)
+
+    def mifare_classic_read_block(self, page):
+        self.reads.append(page)
+        if self.fail.get(page):
+            self.fail[page] -= 1
+            return None
+        offset = page * PAGE_SIZE
+        data = bytearray((self.memory + self.memory)[offset:offset + SEGMENT_SIZE])
+        if self.corrupt.get(page):
+            self.corrupt[page] -= 1
+            data[3] ^= 0x40
+        return bytes(data)
+
+    def write_bytes(self, data, start_page=START_PAGE):
+        for i in range(0, len(data), PAGE_SIZE):
+            self.ntag2xx_write_block(start_page + i // PAGE_SIZE, data[i:i + PAGE_SIZE])
+
+
+def tag_with(body):
+    tag = FakePN532()
+    tag.write_bytes(encode_tag_layout(body))
+    return tag
+
+
+BODY = json.dumps({"text": "Where is the train station?", "language": "en",
+                   "translations": ["fr", "de", "es"]}).encode()
+
+
+class TestTagLayout(unittest.TestCase):
+    def test_encoding(self):
+        encoded = encode_tag_layout(BODY)
+        self.assertEqual(len(encoded) % PAGE_SIZE, 0)
+        self.assertEqual(encoded[1], VERSION)
+        self.assertEqual(int.from_bytes(encoded[2:4], 'big'), len(BODY))
+        self.assertEqual(crc16(encoded[:6]), int.from_bytes(encoded[6:8], 'big'))
+
+    def test_round_trip(self):
+        for body in (b'', b'x', BODY[:14], BODY[:15], BODY, BODY * 5):
+            tag = tag_with(body)
+            result = read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+            self.assertEqual(result, (body, VERSION, 0), len(body))
+
+    def test_one_read_per_segment(self):
+        tag = tag_with(BODY)
+        read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+        segments = -(-len(BODY) // 14)
+        self.assertEqual(len(tag.reads), 1 + segments)
+        self.assertEqual(len(set(tag.reads)), len(tag.reads))
+
+    def test_corrupted_segment_is_reread(self):
+        tag = tag_with(BODY)
+        tag.corrupt[START_PAGE + 6] = MAX_RETRIES  # Second segment, bad until the last retry
+        before = get_tag_read_stats()
+        result = read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+        self.assertEqual(result, (BODY, VERSION, MAX_RETRIES))
+        # Only the bad segment is read again
+        self.assertEqual(tag.reads.count(START_PAGE + 6), MAX_RETRIES + 1)
+        self.assertEqual(tag.reads.count(START_PAGE + 2), 1)
+        after = get_tag_read_stats()
+        self.assertEqual(after["corrupted_segments"] - before["corrupted_segments"], MAX_RETRIES)
+        self.assertEqual(after["recovered"] - before["recovered"], 1)
+
+    def test_corrupted_header_is_reread(self):
+        tag = tag_with(BODY)
+        tag.corrupt[START_PAGE] = 1
+        self.assertEqual(read_tag_layout(tag.mifare_classic_read_block, START_PAGE), (BODY, VERSION, 1))
+
+    def test_failed_block_is_reread(self):
+        tag = tag_with(BODY)
+        tag.fail[START_PAGE + 2] = 2
+        self.assertEqual(read_tag_layout(tag.mifare_classic_read_block, START_PAGE), (BODY, VERSION, 2))
+
+    def test_reader_exception_counts_as_failed_read(self):
+        tag = tag_with(BODY)
+        raised = []
+
+        def read_block(page):
+            if page == START_PAGE + 2 and not raised:
+                raised.append(page)
+                raise RuntimeError("No response from PN532")
+            return tag.mifare_classic_read_block(page)
+        self.assertEqual(read_tag_layout(read_block, START_PAGE), (BODY, VERSION, 1))
+
+    def test_unrecoverable_segment(self):
+        tag = tag_with(BODY)
+        tag.corrupt[START_PAGE + 2] = MAX_RETRIES + 1
+        with self.assertRaises(TagReadError):
+            read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+
+    def test_inconsistent_header(self):
+        tag = tag_with(BODY)
+        header = bytearray(tag.memory[START_PAGE * PAGE_SIZE:START_PAGE * PAGE_SIZE + 6])
+        header[4] += 1  # Segment count no longer matches the length, with a valid CRC
+        tag.write_bytes(bytes(header) + crc16(header).to_bytes(2, 'big'))
+        with self.assertRaises(TagReadError):
+            read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+
+    def test_legacy_v1_tag(self):
+        tag = FakePN532()
+        legacy = len(BODY).to_bytes(2, 'big') + BODY
+        tag.write_bytes(legacy + b'\x00' * (-len(legacy) % PAGE_SIZE))
+        self.assertEqual(read_tag_layout(tag.mifare_classic_read_block, START_PAGE), (BODY, 1, 0))
+
+    def test_legacy_v1_failed_block_is_reread(self):
+        tag = FakePN532()
+        legacy = len(BODY).to_bytes(2, 'big') + BODY
+        tag.write_bytes(legacy + b'\x00' * (-len(legacy) % PAGE_SIZE))
+        tag.fail[START_PAGE + 4] = 1
+        self.assertEqual(read_tag_layout(tag.mifare_classic_read_block, START_PAGE), (BODY, 1, 1))
+
+    def test_blank_tag(self):
+        # Factory-fresh user memory is all zeros: a v1 tag with an empty body
+        tag = FakePN532()
+        self.assertEqual(read_tag_layout(tag.mifare_classic_read_block, START_PAGE), (b'', 1, 0))
+        self.assertEqual(tag.reads, [START_PAGE])
+
+    def test_foreign_tags_fail_fast(self):
+        # Read as v1 these would claim hundreds of bytes and retry every block
+        for first_page in (b'\x03\x00\xfe\x00',        # Empty NDEF message TLV, as on NDEF-formatted blanks
+                           b'\x03\x0d\xd1\x01',        # NDEF text record
+                           b'\xe1\x10\x6d\x00',        # Capability container, read from page 3
+                           b'\x01\x03\xa0\x0c',        # Lock control TLV
+                           b'\x7f\xff{"'):             # Garbage length beyond any NTAG
+            tag = FakePN532()
+            tag.write_bytes(first_page + bytes(range(1, 13)))
+            before = get_tag_read_stats()["unrecognized"]
+            with self.assertRaises(TagReadError, msg=first_page.hex()):
+                read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+            self.assertEqual(tag.reads, [START_PAGE], first_page.hex())
+            self.assertEqual(get_tag_read_stats()["unrecognized"], before + 1)
+
+    def test_header_larger_than_any_tag(self):
+        tag = FakePN532()
+        header = bytes([0xA5, VERSION]) + (14 * 100).to_bytes(2, 'big') + bytes([100, 0])
+        tag.write_bytes(header + crc16(header).to_bytes(2, 'big'))
+        with self.assertRaises(TagReadError):
+            read_tag_layout(tag.mifare_classic_read_block, START_PAGE)
+        self.assertEqual(tag.reads, [START_PAGE])
+
+    def test_too_large(self):
+        with self.assertRaises(ValueError):
+            encode_tag_layout(bytes(14 * 256))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# TelemetrySpool in a temporary directory, driven directly instead of through its thread.
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import telemetry
+from telemetry import TelemetrySpool, CURRENT_SEGMENT
+
+
+def event(n):
+    return {"type": "scan", "uid": f"uid{n}", "status": "ok", "time": n}
+
+
+class TestTelemetrySpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.uploads = []
+        self.fail_uploads = False
+        for name, value in (('SEGMENT_BYTES', 300), ('MAX_SPOOL_BYTES', 1000), ('UPLOAD_INTERVAL', 10),
+                            ('MAX_BACKOFF', 35)):
+            patcher = mock.patch.object(telemetry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.spool = TelemetrySpool(self.upload, directory=self.directory)
+
+    def upload(self, body, headers):
+        if self.fail_uploads:
+            raise ConnectionError("server unreachable")
+        self.uploads.append((gzip.decompress(body), headers))
+
+    def fill(self, count, start=0):
+        # Appends events one per batch, as the spool thread does when scans trickle in
+        for n in range(start, start + count):
+            self.spool._append([event(n)])
+
+    def test_segment_is_sealed_when_full(self):
+        self.fill(2)
+        self.assertEqual(self.spool._sealed_segments(), [])
+        self.fill(10, start=2)
+        sealed = self.spool._sealed_segments()
+        self.assertGreaterEqual(len(sealed), 1)
+        for name in sealed:
+            with open(os.path.join(self.directory, name)) as f:
+                lines = f.read().splitlines()
+            self.assertTrue(all(json.loads(line)["type"] == "scan" for line in lines))
+        self.assertEqual(self.spool.get_stats()["spooled"], 12)
+
+    def test_size_cap_drops_oldest_segments(self):
+        self.fill(60)
+        sealed = self.spool._sealed_segments()
+        sizes = [os.path.getsize(os.path.join(self.directory, name)) for name in sealed]
+        self.assertLessEqual(sum(sizes), 1000)
+        self.assertGreater(self.spool.get_stats()["evicted_segments"], 0)
+        # The newest events survive
+        with open(os.path.join(self.directory, sealed[-1])) as f:
+            last = json.loads(f.read().splitlines()[-1])
+        self.assertGreater(last["time"], 50)
+
+    def test_newest_segment_is_kept_even_over_the_cap(self):
+        self.spool._append([dict(event(0), note='x' * 2000)])
+        self.assertEqual(len(self.spool._sealed_segments()), 1)
+        self.assertEqual(self.spool.get_stats()["evicted_segments"], 0)
+
+    def test_upload_sends_gzip_batches_oldest_first(self):
+        self.fill(15)
+        sealed = self.spool._sealed_segments()
+        self.spool._upload_all()
+
+        self.assertEqual([headers["X-Telemetry-Batch"] for _, headers in self.uploads][:len(sealed)],
+                         [name[:-len('.jsonl')] for name in sealed])
+        self.assertEqual(self.uploads[0][1]["Content-Encoding"], "gzip")
+        uploaded = [json.loads(line)["uid"] for body, _ in self.uploads for line in body.splitlines()]
+        self.assertEqual(uploaded, [f"uid{n}" for n in range(15)])
+        self.assertEqual(os.listdir(self.directory), [])
+        stats = self.spool.get_stats()
+        self.assertEqual((stats["uploaded_events"], stats["pending_segments"], stats["spool_bytes"]), (15, 0, 0))
+
+    def test_failed_upload_backs_off_and_keeps_the_data(self):
+        self.fill(3)
+        self.fail_uploads = True
+        backoffs = []
+        for _ in range(4):
+            before = time.monotonic()
+            self.spool._upload_all()
+            backoffs.append(round(self.spool.next_upload - before))
+        self.assertEqual(backoffs, [10, 20, 35, 35])  # Doubles up to MAX_BACKOFF
+        stats = self.spool.get_stats()
+        self.assertEqual(stats["failed_uploads"], 4)
+        self.assertIn("server unreachable", stats["last_error"])
+        self.assertEqual(stats["pending_segments"], 1)
+
+        self.fail_uploads = False
+        self.spool._upload_all()
+        self.assertEqual(len(self.uploads), 1)
+        self.assertEqual(self.spool.backoff, 10)
+
+    def test_upload_waits_for_idle(self):
+        self.fill(3)
+        self.spool.is_idle = lambda: False
+        self.spool._upload_all()
+        self.assertEqual(self.uploads, [])
+        self.assertEqual(self.spool.get_stats()["pending_segments"], 1)
+
+    def test_full_queue_drops_events(self):
+        with mock.patch.object(telemetry, 'QUEUE_SIZE', 3):
+            spool = TelemetrySpool(self.upload, directory=self.directory)
+        for n in range(5):
+            spool.record('scan', {"uid": n})
+        stats = spool.get_stats()
+        self.assertEqual((stats["recorded"], stats["dropped"], stats["queued"]), (3, 2, 3))
+
+    def test_stats_survive_a_segment_deleted_mid_read(self):
+        self.fill(3)
+        current = os.path.getsize(os.path.join(self.directory, CURRENT_SEGMENT))
+        # The spool thread uploaded and removed '1.jsonl' between listing and sizing
+        with mock.patch.object(self.spool, '_sealed_segments', return_value=['1.jsonl']):
+            stats = self.spool.get_stats()
+        self.assertEqual((stats["pending_segments"], stats["spool_bytes"]), (1, current))
+
+if __name__ == '__main__':
+    unittest.main()
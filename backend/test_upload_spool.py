@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# spool_upload on in-memory multipart bodies, as /play_audio receives them.
+
+import io
+import unittest
+from unittest import mock
+
+import upload_spool
+from upload_spool import spool_upload, UploadError
+
+BOUNDARY = 'testboundary'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+
+def multipart(*parts):
+    # parts: (field name, filename or None, content type or None, bytes)
+    body = b''
+    for name, filename, content_type, data in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else '')
+        body += f'--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n'.encode()
+        if content_type:
+            body += f'Content-Type: {content_type}\r\n'.encode()
+        body += b'\r\n' + data + b'\r\n'
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+def audio_part(data, name='audioData'):
+    return (name, 'clip.mp3', 'audio/mpeg', data)
+
+
+class TestSpoolUpload(unittest.TestCase):
+    def spool(self, body, content_type=CONTENT_TYPE, **kwargs):
+        return spool_upload(io.BytesIO(body), content_type, 'audioData', **kwargs)
+
+    def test_file_field_is_spooled(self):
+        data = bytes(range(256)) * 1000
+        spool, part_type, size = self.spool(multipart(('note', None, None, b'hello'), audio_part(data)))
+        with spool:
+            self.assertEqual((spool.read(), part_type, size), (data, 'audio/mpeg', len(data)))
+
+    def test_large_upload_rolls_over_to_disk(self):
+        data = b'\x01' * 5000
+        with mock.patch.object(upload_spool, 'SPOOL_MEMORY_BYTES', 1000), mock.patch.object(upload_spool, 'READ_CHUNK', 512):
+            spool, _, size = self.spool(multipart(audio_part(data)))
+        with spool:
+            self.assertTrue(spool._rolled)
+            self.assertEqual((spool.read(), size), (data, 5000))
+
+    def test_upload_over_the_limit_is_refused(self):
+        with self.assertRaises(UploadError) as cm:
+            self.spool(multipart(audio_part(b'\x01' * 2000)), max_bytes=1000)
+        self.assertEqual(cm.exception.status, 413)
+        # Exactly at the limit is fine
+        _, _, size = self.spool(multipart(audio_part(b'\x01' * 1000)), max_bytes=1000)
+        self.assertEqual(size, 1000)
+
+    def test_not_multipart(self):
+        for content_type in ('application/json', 'multipart/form-data', ''):
+            with self.assertRaises(UploadError) as cm:
+                self.spool(multipart(audio_part(b'data')), content_type)
+            self.assertEqual(cm.exception.status, 400, content_type)
+
+    def test_missing_or_empty_field(self):
+        for body in (multipart(audio_part(b'data', name='other')), multipart(audio_part(b''))):
+            with self.assertRaises(UploadError) as cm:
+                self.spool(body)
+            self.assertEqual((cm.exception.status, cm.exception.message), (400, "No audio data received"))
+
+    def test_invalid_multipart_body(self):
+        # /play_audio answers ValueError with a 400 "Malformed upload"
+        body = f'--{BOUNDARY}\r\nthis is not a header block'.encode() + bytes(200) + f'\r\n--{BOUNDARY}--\r\n'.encode()
+        with self.assertRaises(ValueError):
+            self.spool(body)
+
+    def test_truncated_body(self):
+        body = multipart(audio_part(b'\x01' * 100))
+        with self.assertRaises(ValueError):
+            self.spool(body[:60])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# Runs WifiManager against a fake NetworkManager service on a private dbus-daemon.
+# Needs python3-dbus, python3-gi and dbus-daemon; skipped otherwise.
+
+import shutil
+import subprocess
+import threading
+import unittest
+
+try:
+    import dbus
+    import dbus.service
+    from dbus.mainloop.glib import DBusGMainLoop
+    from gi.repository import GLib
+except ImportError:
+    dbus = None
+
+from wifi_manager import (WifiManager, WifiError, NM_PATH, NM_INTERFACE, NM_SETTINGS_PATH,
+                          NM_SETTINGS_INTERFACE, NM_CONNECTION_INTERFACE,
+                          DBUS_PROPERTIES_INTERFACE)
+
+FAKE_BUS_NAME = 'org.freedesktop.NetworkManager.Fake'
+
+if dbus is not None:
+    class FakeConnection(dbus.service.Object):
+        def __init__(self, settings_service, path, settings):
+            super().__init__(settings_service.bus_name, path)
+            self.settings_service = settings_service
+            self.path = path
+            self.settings = settings
+
+        @dbus.service.method(NM_CONNECTION_INTERFACE, out_signature='a{sa{sv}}')
+        def GetSettings(self):
+            # Secrets are never returned by NetworkManager
+            return {name: {k: v for k, v in values.items() if k != 'psk'} for name, values in self.settings.items()}
+
+        @dbus.service.method(NM_CONNECTION_INTERFACE)
+        def Delete(self):
+            self.settings_service.connections.pop(self.path)
+            self.remove_from_connection()
+
+    class FakeActiveConnection(dbus.service.Object):
+        def __init__(self, bus_name, path, connection_id):
+            super().__init__(bus_name, path)
+            self.connection_id = connection_id
+
+        @dbus.service.method(DBUS_PROPERTIES_INTERFACE, in_signature='ss', out_signature='v')
+        def Get(self, interface, prop):
+            return {'Type': '802-11-wireless', 'Id': self.connection_id}[prop]
+
+    class FakeNetworkManager(dbus.service.Object):
+        def __init__(self, bus_name):
+            super().__init__(bus_name, NM_PATH)
+            self.active = []
+
+        @dbus.service.method(DBUS_PROPERTIES_INTERFACE, in_signature='ss', out_signature='v')
+        def Get(self, interface, prop):
+            assert interface == NM_INTERFACE and prop == 'ActiveConnections'
+            return dbus.Array(self.active, signature='o')
+
+    class FakeSettings(dbus.service.Object):
+        def __init__(self, bus_name):
+            super().__init__(bus_name, NM_SETTINGS_PATH)
+            self.bus_name = bus_name
+            self.connections = {}
+            self.counter = 0
+
+        @dbus.service.method(NM_SETTINGS_INTERFACE, out_signature='ao')
+        def ListConnections(self):
+            return dbus.Array(self.connections.keys(), signature='o')
+
+        @dbus.service.method(NM_SETTINGS_INTERFACE, in_signature='a{sa{sv}}', out_signature='o')
+        def AddConnection(self, settings):
+            if len(settings['802-11-wireless-security']['psk']) < 8:
+                raise dbus.exceptions.DBusException('invalid psk',
+                                                    name='org.freedesktop.NetworkManager.Settings.InvalidProperty')
+            self.counter += 1
+            path = f"{NM_SETTINGS_PATH}/{self.counter}"
+            self.connections[path] = FakeConnection(self, path, settings)
+            return path
+
+
+@unittest.skipIf(dbus is None or shutil.which('dbus-daemon') is None, "dbus-python, gi or dbus-daemon missing")
+class WifiManagerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.daemon = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address'],
+                                      stdout=subprocess.PIPE, text=True)
+        cls.address = cls.daemon.stdout.readline().strip()
+
+        DBusGMainLoop(set_as_default=True)
+        service_bus = dbus.bus.BusConnection(cls.address)
+        bus_name = dbus.service.BusName(FAKE_BUS_NAME, service_bus)
+        cls.nm = FakeNetworkManager(bus_name)
+        cls.settings = FakeSettings(bus_name)
+        cls.loop = GLib.MainLoop()
+        threading.Thread(target=cls.loop.run, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.quit()
+        cls.daemon.terminate()
+        cls.daemon.wait()
+
+    def setUp(self):
+        for connection in list(self.settings.connections.values()):
+            connection.Delete()
+        self.nm.active = []
+        self.manager = WifiManager(bus=dbus.bus.BusConnection(self.address), bus_name=FAKE_BUS_NAME)
+
+    def test_add_and_list(self):
+        self.manager.add_network('Home', 'password123')
+        self.assertEqual(self.manager.list_networks(), [{"ssid": "Home", "isConnected": False}])
+        settings = list(self.settings.connections.values())[0].settings
+        self.assertEqual(bytes(settings['802-11-wireless']['ssid']), b'Home')
+        self.assertEqual(settings['802-11-wireless-security']['key-mgmt'], 'wpa-psk')
+        self.assertEqual(settings['connection']['interface-name'], 'wlan0')
+
+    def test_add_raw_psk(self):
+        self.manager.add_network('Home', 'A1b2' * 16)
+        settings = list(self.settings.connections.values())[0].settings
+        self.assertEqual(settings['802-11-wireless-security']['psk'], 'A1b2' * 16)
+
+    def test_add_duplicate(self):
+        self.manager.add_network('Home', 'password123')
+        with self.assertRaises(WifiError) as cm:
+            self.manager.add_network('Home', 'password123')
+        self.assertEqual(cm.exception.code, 'already_exists')
+
+    def test_add_invalid_arguments(self):
+        for ssid, psk, key_mgmt in [('', 'password123', 'WPA-PSK'), ('Home', 'short', 'WPA-PSK'),
+                                    ('Home', 'password123', 'WEP'), ('Home', 'x' * 64, 'WPA-PSK'),
+                                    ('Home', 'a1' * 32, 'SAE')]:
+            with self.assertRaises(WifiError) as cm:
+                self.manager.add_network(ssid, psk, key_mgmt)
+            self.assertEqual(cm.exception.code, 'invalid_argument')
+
+    def test_delete(self):
+        self.manager.add_network('Home', 'password123')
+        self.manager.delete_network('Home')
+        self.assertEqual(self.manager.list_networks(), [])
+
+    def test_delete_missing(self):
+        with self.assertRaises(WifiError) as cm:
+            self.manager.delete_network('Nowhere')
+        self.assertEqual(cm.exception.code, 'not_found')
+
+    def test_active_connection(self):
+        self.manager.add_network('Home', 'password123')
+        self.manager.add_network('Work', 'password456')
+        FakeActiveConnection(self.settings.bus_name, '/org/freedesktop/NetworkManager/ActiveConnection/1', 'Work')
+        self.nm.active = ['/org/freedesktop/NetworkManager/ActiveConnection/1']
+        networks = {n['ssid']: n['isConnected'] for n in self.manager.list_networks()}
+        self.assertEqual(networks, {'Home': False, 'Work': True})
+
+    def test_batch(self):
+        results = self.manager.add_networks([{'ssid': 'A', 'psk': 'password123'},
+                                             {'ssid': 'A', 'psk': 'password123'},
+                                             {'ssid': 'B', 'psk': 'password456'}])
+        self.assertEqual([r['status'] for r in results], ['added', 'failed', 'added'])
+        self.assertEqual(results[1]['code'], 'already_exists')
+
+        results = self.manager.delete_networks(['A', 'C', 'B'])
+        self.assertEqual([r['status'] for r in results], ['deleted', 'failed', 'deleted'])
+        self.assertEqual(results[1]['code'], 'not_found')
+
+    def test_service_missing(self):
+        manager = WifiManager(bus=dbus.bus.BusConnection(self.address), bus_name='org.example.Missing')
+        with self.assertRaises(WifiError) as cm:
+            manager.list_networks()
+        self.assertEqual(cm.exception.code, 'unavailable')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# WriteJobQueue with fake runners standing in for the PN532 write in langiot.handle_write_request.
+
+import json
+import threading
+import unittest
+
+from write_jobs import WriteJobQueue, MAX_STREAMS
+
+
+def states(stream):
+    return [json.loads(chunk[len('data: '):]) for chunk in stream]
+
+
+class TestWriteJobQueue(unittest.TestCase):
+    def run_job(self, runner, payload='{"text": "hi"}'):
+        jobs = WriteJobQueue(runner)
+        job = jobs.submit(payload)
+        return jobs, job, states(jobs.stream(job.id, timeout=5))
+
+    def test_success_reports_progress(self):
+        def runner(job, progress):
+            progress(status='writing', pages_total=3)
+            for page in range(1, 4):
+                progress(pages_written=page)
+            progress(verified=True)
+        jobs, job, updates = self.run_job(runner)
+
+        self.assertEqual(updates[-1]["status"], 'succeeded')
+        self.assertEqual((updates[-1]["pages_written"], updates[-1]["verified"]), (3, True))
+        self.assertIsNotNone(updates[-1]["duration"])
+        # Updates that arrive faster than the client reads are coalesced, never reordered
+        pages = [update["pages_written"] for update in updates]
+        self.assertEqual(pages, sorted(pages))
+
+    def test_no_tag_before_the_deadline(self):
+        def runner(job, progress):
+            progress(status='waiting_for_tag')
+            raise Exception("No NFC tag presented")
+        _, job, updates = self.run_job(runner)
+        self.assertEqual(updates[-1]["status"], 'failed')
+        self.assertEqual(updates[-1]["error"], "No NFC tag presented")
+        self.assertEqual(updates[-1]["pages_written"], 0)
+
+    def test_verify_failure(self):
+        def runner(job, progress):
+            progress(pages_total=4, pages_written=4)
+            progress(verified=False)
+            raise Exception("Verification failed after writing 4 pages")
+        _, job, updates = self.run_job(runner)
+        self.assertEqual((updates[-1]["status"], updates[-1]["verified"]), ('failed', False))
+        self.assertIn("Verification failed", updates[-1]["error"])
+
+    def test_failed_job_does_not_stop_the_worker(self):
+        payloads = []
+
+        def runner(job, progress):
+            payloads.append(job.payload)
+            if job.payload == 'bad':
+                raise Exception("write error")
+        jobs = WriteJobQueue(runner)
+        bad, good = jobs.submit('bad'), jobs.submit('good')
+        self.assertEqual(states(jobs.stream(good.id, timeout=5))[-1]["status"], 'succeeded')
+        self.assertEqual(jobs.get(bad.id).status, 'failed')
+        self.assertEqual(payloads, ['bad', 'good'])  # Serialized in submission order
+
+    def test_stream_times_out_without_updates(self):
+        release = threading.Event()
+        jobs = WriteJobQueue(lambda job, progress: release.wait(5))
+        job = jobs.submit('slow')
+        updates = states(jobs.stream(job.id, timeout=0.2))
+        self.assertEqual(updates[-1]["status"], 'running')
+        release.set()
+        self.assertEqual(states(jobs.stream(job.id, timeout=5))[-1]["status"], 'succeeded')
+
+    def test_abandoned_stream_leaves_the_job_running(self):
+        # There is no cancel: a client that disconnects only closes its stream
+        release = threading.Event()
+        jobs = WriteJobQueue(lambda job, progress: release.wait(5))
+        job = jobs.submit('payload')
+        self.assertTrue(jobs.open_stream())
+        stream = jobs.stream(job.id, timeout=5)
+        next(stream)
+        stream.close()
+        jobs.close_stream()
+
+        release.set()
+        self.assertEqual(states(jobs.stream(job.id, timeout=5))[-1]["status"], 'succeeded')
+        self.assertEqual(jobs.streams, 0)
+
+    def test_stream_cap(self):
+        jobs = WriteJobQueue(lambda job, progress: None)
+        for _ in range(MAX_STREAMS):
+            self.assertTrue(jobs.open_stream())
+        self.assertFalse(jobs.open_stream())
+        jobs.close_stream()
+        self.assertTrue(jobs.open_stream())
+
+    def test_unknown_job(self):
+        jobs = WriteJobQueue(lambda job, progress: None)
+        self.assertEqual(list(jobs.stream('missing')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,339 @@
+import concurrent.futures
+import io
+import itertools
+import json
+import logging
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+logger = logging.getLogger(__name__)
+
+TTS_CPUS = os.getenv('TTS_CPUS', '')            # e.g. "3" or "2,3"; defaults to the last core
+TTS_NICE = int(os.getenv('TTS_NICE', '10'))     # Added to the worker's nice level
+TTS_TIMEOUT = float(os.getenv('TTS_TIMEOUT', '30'))
+START_TIMEOUT = 900                             # First start may download and calibrate voices
+SPAWN_BACKOFF = 5                               # Seconds before retrying a worker that failed to start, doubling
+MAX_SPAWN_BACKOFF = 600
+TTS_WARMUP = os.getenv('TTS_WARMUP', 'True') == 'True'
+POLL_INTERVAL = 0.1
+
+# Representative short, medium and long inputs; ONNX Runtime specializes per input shape
+WARMUP_TEXTS = (
+    "Ready.",
+    "Connected to server",
+    "Not connected to server, only English Text to Speech is available",
+)
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+
+class TTSError(Exception):
+    pass
+
+
+def default_cpus():
+    cpus = sorted(os.sched_getaffinity(0))
+    # Leave the other cores to the scan loop and web workers
+    return cpus[-1:] if len(cpus) > 1 else cpus
+
+
+def parse_cpus(value):
+    return [int(cpu) for cpu in value.split(',') if cpu.strip()] if value else default_cpus()
+
+
+class TTSJob:
+    def __init__(self, job_id, text, timeout):
+        self.id = job_id
+        self.text = text
+        self.timeout = timeout
+        self.future = concurrent.futures.Future()
+        self.cancel_requested = False
+
+    def cancel(self):
+        # Queued jobs are dropped; a running job kills and restarts the worker
+        if self.future.cancel():
+            return True
+        self.cancel_requested = True
+        return not self.future.done()
+
+
+class TTSWorker:
+    # Runs Piper in a separate process (python tts_worker.py) pinned to its own cores at a
+    # lower priority, so inference never competes with the scan loop for the GIL or CPU.
+    # model_name may be a voice family ("en_US-lessac"), in which case the worker picks the quality.
+    def __init__(self, model_name, download_dir, synthesis_args, cpus=None, nice=TTS_NICE, warmup=TTS_WARMUP):
+        self.model_name = model_name
+        self.download_dir = download_dir
+        self.synthesis_args = synthesis_args
+        self.cpus = cpus or parse_cpus(TTS_CPUS)
+        self.nice = nice
+        self.warmup = warmup
+        self.jobs = queue.PriorityQueue()
+        self.ids = itertools.count(1)
+        self.voice = None
+        self.process = None
+        self.responses = None
+        self.current = None
+        self.spawn_failures = 0
+        self.next_spawn = 0.0
+        self.stats = {"completed": 0, "failed": 0, "timeouts": 0, "cancelled": 0, "restarts": 0,
+                      "spawn_failures": 0, "synthesis_seconds": 0.0, "load_seconds": None, "warmup": None,
+                      "calibration": None}
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True, name='tts-dispatch')
+
+    def start(self):
+        self.dispatcher.start()
+
+    def submit(self, text, priority=PRIORITY_NORMAL, timeout=TTS_TIMEOUT):
+        job = TTSJob(next(self.ids), text, timeout)
+        self.jobs.put((priority, job.id, job))
+        return job
+
+    def synthesize(self, text, priority=PRIORITY_NORMAL, timeout=TTS_TIMEOUT):
+        # Blocking helper; returns WAV bytes or raises TTSError / CancelledError
+        return self.submit(text, priority, timeout).future.result()
+
+    def shutdown(self):
+        self.jobs.put((-1, 0, None))
+
+    def _spawn(self):
+        config = json.dumps({"model_name": self.model_name, "download_dir": self.download_dir,
+                             "synthesis_args": self.synthesis_args, "cpus": self.cpus, "nice": self.nice,
+                             "warmup": self.warmup})
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), config],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.responses = queue.Queue()
+        threading.Thread(target=self._read_responses, args=(self.process, self.responses),
+                         daemon=True, name='tts-reader').start()
+
+        # The worker reports once the voice is loaded
+        message = self._next_response(time.monotonic() + START_TIMEOUT)
+        if message is None or message[0] != 'ready' or message[2]:
+            error = message[2] if message else "no response"
+            self._stop_process()
+            raise TTSError(f"TTS worker failed to start: {error}")
+        info = message[1]
+        self.voice = info["model"]
+        self.stats["load_seconds"] = round(message[3], 3)
+        self.stats["calibration"] = info["calibration"]
+        logger.info(f"TTS worker {self.process.pid} ready on CPUs {self.cpus} ({message[3]:.1f}s to load {self.voice})")
+        if info["warmup"]:
+            self.stats["warmup"] = info["warmup"]
+            for run in info["warmup"]:
+                logger.info(f"TTS warm-up ({run['chars']} chars): cold {run['cold_ms']} ms, warm {run['warm_ms']} ms")
+
+    def _ensure_process(self):
+        # While a broken install keeps the worker down, jobs fail at once instead of each
+        # waiting for another start attempt; attempts back off exponentially
+        if self.process is not None:
+            return
+        wait = self.next_spawn - time.monotonic()
+        if wait > 0:
+            raise TTSError(f"TTS worker unavailable, next start attempt in {wait:.0f}s")
+        try:
+            self._spawn()
+        except Exception as e:
+            self.spawn_failures += 1
+            self.stats["spawn_failures"] += 1
+            backoff = min(SPAWN_BACKOFF * 2 ** (self.spawn_failures - 1), MAX_SPAWN_BACKOFF)
+            self.next_spawn = time.monotonic() + backoff
+            logger.error(f"{e}; retrying in {backoff}s")
+            raise e if isinstance(e, TTSError) else TTSError(str(e))
+        self.spawn_failures = 0
+
+    def _read_responses(self, process, responses):
+        try:
+            while True:
+                responses.put(pickle.load(process.stdout))
+        except (EOFError, OSError, pickle.UnpicklingError):
+            responses.put(('exit', None, None, 0))
+
+    def _next_response(self, deadline, job=None):
+        while time.monotonic() < deadline:
+            if job and job.cancel_requested:
+                return ('cancelled', None, None, 0)
+            try:
+                return self.responses.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _stop_process(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def _restart(self, reason):
+        logger.warning(f"Restarting TTS worker: {reason}")
+        self.stats["restarts"] += 1
+        self._stop_process()
+
+    def _dispatch(self):
+        # Load and warm the voice at startup rather than on the first announcement
+        try:
+            self._ensure_process()
+        except TTSError:
+            pass
+        while True:
+            _, _, job = self.jobs.get()
+            if job is None:
+                if self.process:
+                    self.process.stdin.close()
+                    try:
+                        self.process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        self._stop_process()
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._ensure_process()
+                self.current = job
+                self._run(job)
+            except Exception as e:
+                self.stats["failed"] += 1
+                job.future.set_exception(e if isinstance(e, TTSError) else TTSError(str(e)))
+            finally:
+                self.current = None
+
+    def _run(self, job):
+        pickle.dump((job.id, job.text), self.process.stdin)
+        self.process.stdin.flush()
+        message = self._next_response(time.monotonic() + job.timeout, job)
+
+        if message is None:
+            self.stats["timeouts"] += 1
+            self._restart(f"job {job.id} exceeded {job.timeout}s")
+            job.future.set_exception(TTSError(f"Synthesis timed out after {job.timeout}s"))
+        elif message[0] == 'cancelled':
+            self.stats["cancelled"] += 1
+            self._restart(f"job {job.id} cancelled")
+            job.future.set_exception(concurrent.futures.CancelledError())
+        elif message[0] == 'exit':
+            self._restart(f"worker exited with {self.process.poll()}")
+            raise TTSError("TTS worker exited during synthesis")
+        elif message[2]:
+            raise TTSError(message[2])
+        else:
+            self.stats["completed"] += 1
+            self.stats["synthesis_seconds"] += message[3]
+            job.future.set_result(message[1])
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update({
+            "queued": self.jobs.qsize(),
+            "running": self.current.text if self.current else None,
+            "pid": self.process.pid if self.process else None,
+            "next_start_in": round(max(0.0, self.next_spawn - time.monotonic()), 1) if self.process is None else None,
+            "cpus": self.cpus,
+            "nice": self.nice,
+            "model": self.model_name,
+            "voice": self.voice,
+            "avg_synthesis_seconds": round(stats["synthesis_seconds"] / stats["completed"], 3) if stats["completed"] else None,
+        })
+        return stats
+
+
+def load_voice(model_name, download_dir, threads):
+    import onnxruntime
+    from piper import PiperVoice
+    from piper.config import PiperConfig
+    from piper.download import ensure_voice_exists, get_voices, find_voice
+
+    os.makedirs(download_dir, exist_ok=True)
+    try:
+        model_path, config_path = find_voice(model_name, [download_dir])
+    except ValueError:
+        voices_info = get_voices(download_dir, update_voices=True)
+        ensure_voice_exists(model_name, [download_dir], download_dir, voices_info)
+        model_path, config_path = find_voice(model_name, [download_dir])
+
+    with open(config_path, encoding='utf-8') as f:
+        config = PiperConfig.from_dict(json.load(f))
+    # Size ONNX Runtime's thread pool to the cores we are pinned to
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    session = onnxruntime.InferenceSession(str(model_path), sess_options=options,
+                                           providers=["CPUExecutionProvider"])
+    return PiperVoice(session=session, config=config)
+
+
+def synthesize_wav(voice, text, synthesis_args):
+    if voice.config.num_speakers <= 1:
+        # Single-speaker models have no sid input and reject one
+        synthesis_args = dict(synthesis_args, speaker_id=None)
+    audio_fp = io.BytesIO()
+    with wave.open(audio_fp, "wb") as wav_file:
+        voice.synthesize(text, wav_file, **synthesis_args)
+    return audio_fp.getvalue()
+
+
+def warm_up(voice, synthesis_args):
+    # The first inference allocates ONNX Runtime arenas and the phonemizer loads lazily;
+    # pay for both here. Each text runs twice so the report shows cold versus warm latency.
+    report = []
+    for text in WARMUP_TEXTS:
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            synthesize_wav(voice, text, synthesis_args)
+            timings.append(time.perf_counter() - started)
+        report.append({"chars": len(text), "cold_ms": round(timings[0] * 1000, 1),
+                       "warm_ms": round(timings[1] * 1000, 1)})
+    return report
+
+
+def serve(config):
+    # Worker process: pickled (job_id, text) on stdin, pickled (job_id, wav, error, seconds) on stdout
+    requests, responses = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # Keep stray prints off the response pipe
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - tts-worker - %(levelname)s - %(message)s')
+    from voice_calibration import is_voice_family, select_voice  # Imports this module; only needed in the worker
+
+    def respond(*message):
+        pickle.dump(message, responses)
+        responses.flush()
+
+    try:
+        os.sched_setaffinity(0, config["cpus"])
+        os.nice(config["nice"])
+        started = time.perf_counter()
+        model_name, calibration = config["model_name"], None
+        if is_voice_family(model_name):
+            model_name, voice, calibration = select_voice(model_name, config["download_dir"], len(config["cpus"]),
+                                                          config["synthesis_args"])
+        else:
+            voice = load_voice(model_name, config["download_dir"], len(config["cpus"]))
+        load_seconds = time.perf_counter() - started
+        warmup = warm_up(voice, config["synthesis_args"]) if config["warmup"] else None
+        respond('ready', {"model": model_name, "warmup": warmup, "calibration": calibration}, None, load_seconds)
+    except Exception as e:
+        respond('ready', None, str(e), 0)
+        return
+
+    while True:
+        try:
+            job_id, text = pickle.load(requests)
+        except EOFError:
+            return
+        started = time.perf_counter()
+        try:
+            respond(job_id, synthesize_wav(voice, text, config["synthesis_args"]), None, time.perf_counter() - started)
+        except Exception as e:
+            respond(job_id, None, str(e), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    serve(json.loads(sys.argv[1]))
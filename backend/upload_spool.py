@@ -0,0 +1,64 @@
+import logging
+import os
+import tempfile
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, NeedData, File, Data, Epilogue
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MEMORY_BYTES = int(os.getenv('PLAY_AUDIO_SPOOL_MEMORY', 1024 * 1024))      # Kept in RAM up to this size, then on disk
+MAX_UPLOAD_BYTES = int(os.getenv('PLAY_AUDIO_MAX_BYTES', 25 * 1024 * 1024))
+SPOOL_DIR = os.getenv('PLAY_AUDIO_SPOOL_DIR') or None                            # Defaults to the system temp dir
+READ_CHUNK = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def spool_upload(stream, content_type, field_name, max_bytes=MAX_UPLOAD_BYTES):
+    # Reads a multipart body from stream chunk by chunk and copies one file field into a spooled
+    # temporary file, so the upload is never held in memory as a whole.
+    # Returns (spool positioned at 0, the part's content type, size).
+    mimetype, options = parse_options_header(content_type)
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        raise UploadError(400, "Expected a multipart/form-data upload")
+
+    decoder = MultipartDecoder(options['boundary'].encode())
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, dir=SPOOL_DIR)
+    part_type, size, writing, found = None, 0, False, False
+    try:
+        while True:
+            chunk = stream.read(READ_CHUNK)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, NeedData):
+                if isinstance(event, File):
+                    writing = event.name == field_name and not found
+                    if writing:
+                        found = True
+                        part_type = event.headers.get('Content-Type')
+                elif isinstance(event, Data) and writing:
+                    size += len(event.data)
+                    if size > max_bytes:
+                        raise UploadError(413, f"Upload exceeds {max_bytes} bytes")
+                    spool.write(event.data)
+                    writing = event.more_data
+                elif isinstance(event, Epilogue):
+                    break
+                event = decoder.next_event()
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    except Exception:
+        spool.close()
+        raise
+
+    if not found or not size:
+        spool.close()
+        raise UploadError(400, "No audio data received")
+    spool.seek(0)
+    return spool, part_type, size
@@ -0,0 +1,111 @@
+import io
+import json
+import logging
+import os
+import time
+import wave
+
+from tts_worker import load_voice, synthesize_wav
+
+logger = logging.getLogger(__name__)
+
+QUALITIES = ('x_low', 'low', 'medium', 'high')  # Slowest last
+RTF_BUDGET = float(os.getenv('TTS_RTF_BUDGET', '0.5'))  # Synthesis seconds per second of audio
+CALIBRATION_FILE = os.getenv('TTS_CALIBRATION_FILE', os.path.join(os.path.expanduser("~"), ".piper", "calibration.json"))
+CALIBRATION_TEXT = "Good morning, the tag has been read. Please wait while the translation is prepared."
+
+
+def is_voice_family(name):
+    # "en_US-lessac" is a family to calibrate; "en_US-lessac-medium" is a fixed voice
+    return name.rsplit('-', 1)[-1] not in QUALITIES
+
+
+def hardware_class(threads):
+    # RTF depends on the board and on how many cores the worker is pinned to
+    model = None
+    try:
+        with open('/proc/device-tree/model', 'rb') as f:
+            model = f.read().rstrip(b'\x00').decode(errors='replace').strip()
+    except OSError:
+        try:
+            with open('/proc/cpuinfo') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key.strip() in ('model name', 'Model', 'Hardware'):
+                        model = value.strip()
+                        break
+        except OSError:
+            pass
+    return f"{model or os.uname().machine} ({threads} threads)"
+
+
+def load_calibrations():
+    try:
+        with open(CALIBRATION_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_calibration(key, result):
+    calibrations = load_calibrations()
+    calibrations[key] = result
+    os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+    temp_path = CALIBRATION_FILE + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(calibrations, f, indent=2)
+    os.replace(temp_path, CALIBRATION_FILE)
+
+
+def measure_rtf(voice, synthesis_args):
+    synthesize_wav(voice, CALIBRATION_TEXT, synthesis_args)  # Cold run, not counted
+    started = time.perf_counter()
+    audio = synthesize_wav(voice, CALIBRATION_TEXT, synthesis_args)
+    seconds = time.perf_counter() - started
+    with wave.open(io.BytesIO(audio)) as wav_file:
+        duration = wav_file.getnframes() / wav_file.getframerate()
+    return seconds / duration if duration else float('inf'), seconds
+
+
+def calibrate(family, download_dir, threads, synthesis_args, budget=RTF_BUDGET):
+    # Benchmarks qualities from fastest to slowest and stops at the first one over budget,
+    # so slow boards never download or load the large voices. Returns (result, voice).
+    results = {}
+    chosen, chosen_voice = None, None
+    for quality in QUALITIES:
+        model_name = f"{family}-{quality}"
+        try:
+            voice = load_voice(model_name, download_dir, threads)
+        except Exception as e:
+            logger.info(f"Skipping {model_name} in calibration: {e}")
+            continue
+        rtf, seconds = measure_rtf(voice, synthesis_args)
+        results[model_name] = {"rtf": round(rtf, 3), "seconds": round(seconds, 3)}
+        logger.info(f"Calibration: {model_name} RTF {rtf:.2f} ({seconds:.2f}s)")
+        if rtf > budget:
+            break
+        chosen, chosen_voice = model_name, voice
+
+    if not results:
+        raise ValueError(f"No voices available for {family}")
+    if chosen is None:
+        # Nothing meets the budget; the fastest voice is still the best we can do
+        chosen = min(results, key=lambda name: results[name]["rtf"])
+        chosen_voice = voice if chosen == model_name else None
+    result = {"voice": chosen, "budget": budget, "results": results, "time": time.time()}
+    return result, chosen_voice
+
+
+def select_voice(family, download_dir, threads, synthesis_args, budget=RTF_BUDGET):
+    # Returns (model_name, voice, calibration); calibration runs once per hardware class and budget
+    key = f"{family} on {hardware_class(threads)}"
+    result = load_calibrations().get(key)
+    if result and result.get("budget") == budget:
+        logger.info(f"Using calibrated voice {result['voice']} for {key}")
+        return result["voice"], load_voice(result["voice"], download_dir, threads), result
+
+    logger.info(f"Calibrating {family} voices for {key} (RTF budget {budget})")
+    result, voice = calibrate(family, download_dir, threads, synthesis_args, budget)
+    save_calibration(key, result)
+    logger.info(f"Selected {result['voice']} for {key}")
+    return result["voice"], voice or load_voice(result["voice"], download_dir, threads), result
@@ -0,0 +1,216 @@
+import logging
+import os
+import string
+import threading
+import time
+import uuid
+
+try:
+    import dbus  # apt install python3-dbus
+except ImportError:
+    dbus = None
+
+logger = logging.getLogger(__name__)
+
+NM_BUS_NAME = 'org.freedesktop.NetworkManager'
+NM_PATH = '/org/freedesktop/NetworkManager'
+NM_INTERFACE = 'org.freedesktop.NetworkManager'
+NM_SETTINGS_PATH = '/org/freedesktop/NetworkManager/Settings'
+NM_SETTINGS_INTERFACE = 'org.freedesktop.NetworkManager.Settings'
+NM_CONNECTION_INTERFACE = 'org.freedesktop.NetworkManager.Settings.Connection'
+NM_ACTIVE_INTERFACE = 'org.freedesktop.NetworkManager.Connection.Active'
+DBUS_PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+WIFI_TYPE = '802-11-wireless'
+NETWORKS_CACHE_TTL = float(os.getenv('WIFI_NETWORKS_CACHE_TTL', 10))  # Catches changes made outside this API
+
+# API key_mgmt values -> NetworkManager 802-11-wireless-security key-mgmt
+KEY_MANAGEMENT = {
+    'WPA-PSK': 'wpa-psk',
+    'SAE': 'sae',
+}
+
+
+def is_raw_psk(psk):
+    # A precomputed 256-bit key, e.g. from wpa_passphrase; SAE only takes the passphrase
+    return len(psk) == 64 and all(c in string.hexdigits for c in psk)
+
+
+class WifiError(Exception):
+    # code is one of: invalid_argument, not_found, already_exists, permission_denied, unavailable, dbus_error
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def to_dict(self):
+        return {"error": self.message, "code": self.code}
+
+
+class WifiManager:
+    # Talks to NetworkManager over one long-lived system bus connection
+    def __init__(self, bus=None, interface='wlan0', bus_name=NM_BUS_NAME):
+        self._bus = bus
+        self.interface = interface
+        self.bus_name = bus_name
+        self.lock = threading.Lock()
+        self._networks = None  # (fetched_at, networks)
+
+    @property
+    def bus(self):
+        if self._bus is None:
+            if dbus is None:
+                raise WifiError('unavailable', "dbus-python is not installed")
+            self._bus = dbus.SystemBus()
+        return self._bus
+
+    def _call(self, func):
+        # Runs func(); reconnects once if the bus connection was dropped
+        if dbus is None:
+            raise WifiError('unavailable', "dbus-python is not installed")
+        try:
+            return func()
+        except WifiError:
+            raise
+        except dbus.exceptions.DBusException as e:
+            name = e.get_dbus_name() or ''
+            if name == 'org.freedesktop.DBus.Error.Disconnected' or 'Disconnected' in str(e):
+                logger.warning("D-Bus connection lost, reconnecting.")
+                self._bus = None
+                try:
+                    return func()
+                except dbus.exceptions.DBusException as retry_error:
+                    e = retry_error
+                    name = e.get_dbus_name() or ''
+            raise self._translate(name, e)
+
+    def _translate(self, name, error):
+        if name.endswith('PermissionDenied') or name.endswith('AccessDenied'):
+            return WifiError('permission_denied', "Not permitted to change NetworkManager settings")
+        if name.endswith('InvalidProperty') or name.endswith('InvalidSetting') or name.endswith('InvalidArgs'):
+            return WifiError('invalid_argument', error.get_dbus_message() or str(error))
+        if name.endswith('ServiceUnknown') or name.endswith('NameHasNoOwner'):
+            return WifiError('unavailable', "NetworkManager is not running")
+        return WifiError('dbus_error', error.get_dbus_message() or str(error))
+
+    def _settings(self):
+        return dbus.Interface(self.bus.get_object(self.bus_name, NM_SETTINGS_PATH), NM_SETTINGS_INTERFACE)
+
+    def _wifi_connections(self):
+        # Returns {connection id: object path} for saved Wi-Fi connections
+        connections = {}
+        for path in self._settings().ListConnections():
+            connection = dbus.Interface(self.bus.get_object(self.bus_name, path), NM_CONNECTION_INTERFACE)
+            settings = connection.GetSettings()
+            if settings['connection']['type'] == WIFI_TYPE:
+                connections[str(settings['connection']['id'])] = path
+        return connections
+
+    def list_networks(self):
+        def list_all():
+            saved = self._wifi_connections()
+            active = self._active_connection_ids()
+            return [{"ssid": ssid, "isConnected": ssid in active} for ssid in saved]
+        networks = self._call(list_all)
+        self._networks = (time.monotonic(), networks)
+        return networks
+
+    def cached_networks(self, max_age=NETWORKS_CACHE_TTL):
+        # For frequent readers (the admin UI bootstrap); add/delete invalidate immediately
+        cached = self._networks
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        return self.list_networks()
+
+    def _active_connection_ids(self):
+        properties = dbus.Interface(self.bus.get_object(self.bus_name, NM_PATH), DBUS_PROPERTIES_INTERFACE)
+        active_ids = set()
+        for path in properties.Get(NM_INTERFACE, 'ActiveConnections'):
+            active = dbus.Interface(self.bus.get_object(self.bus_name, path), DBUS_PROPERTIES_INTERFACE)
+            if active.Get(NM_ACTIVE_INTERFACE, 'Type') == WIFI_TYPE:
+                active_ids.add(str(active.Get(NM_ACTIVE_INTERFACE, 'Id')))
+        return active_ids
+
+    def add_network(self, ssid, psk, key_mgmt='WPA-PSK'):
+        if not ssid or not psk:
+            raise WifiError('invalid_argument', "SSID and PSK are required")
+        if key_mgmt not in KEY_MANAGEMENT:
+            raise WifiError('invalid_argument', f"Unsupported key management '{key_mgmt}'")
+        if not (8 <= len(psk) <= 63 or (key_mgmt == 'WPA-PSK' and is_raw_psk(psk))):
+            raise WifiError('invalid_argument', "PSK must be 8 to 63 characters, or 64 hex digits for WPA-PSK")
+
+        def add():
+            if ssid in self._wifi_connections():
+                raise WifiError('already_exists', f"Network '{ssid}' already exists")
+            settings = dbus.Dictionary({
+                'connection': dbus.Dictionary({
+                    'id': ssid,
+                    'uuid': str(uuid.uuid4()),
+                    'type': WIFI_TYPE,
+                    'interface-name': self.interface,
+                }),
+                WIFI_TYPE: dbus.Dictionary({
+                    'ssid': dbus.ByteArray(ssid.encode()),
+                    'mode': 'infrastructure',
+                }),
+                '802-11-wireless-security': dbus.Dictionary({
+                    'key-mgmt': KEY_MANAGEMENT[key_mgmt],
+                    'psk': psk,
+                }),
+                'ipv4': dbus.Dictionary({'method': 'auto'}),
+                'ipv6': dbus.Dictionary({'method': 'auto'}),
+            })
+            return str(self._settings().AddConnection(settings))
+
+        with self.lock:
+            path = self._call(add)
+            self._networks = None
+        logger.info(f"Successfully added network: {ssid}")
+        return path
+
+    def delete_network(self, ssid):
+        if not ssid:
+            raise WifiError('invalid_argument', "SSID is required for deletion")
+
+        def delete():
+            path = self._wifi_connections().get(ssid)
+            if path is None:
+                raise WifiError('not_found', f"Network '{ssid}' not found")
+            # Deleting an active connection also deactivates it
+            dbus.Interface(self.bus.get_object(self.bus_name, path), NM_CONNECTION_INTERFACE).Delete()
+
+        with self.lock:
+            self._call(delete)
+            self._networks = None
+        logger.info(f"Successfully deleted network: {ssid}")
+
+    def add_networks(self, networks):
+        results = []
+        for network in networks:
+            ssid = network.get('ssid')
+            try:
+                self.add_network(ssid, network.get('psk'), network.get('key_mgmt', 'WPA-PSK'))
+                results.append({"ssid": ssid, "status": "added"})
+            except WifiError as e:
+                results.append(dict(e.to_dict(), ssid=ssid, status="failed"))
+        return results
+
+    def delete_networks(self, ssids):
+        results = []
+        for ssid in ssids:
+            try:
+                self.delete_network(ssid)
+                results.append({"ssid": ssid, "status": "deleted"})
+            except WifiError as e:
+                results.append(dict(e.to_dict(), ssid=ssid, status="failed"))
+        return results
+
+
+# HTTP status used for each WifiError code
+ERROR_STATUS = {
+    'invalid_argument': 400,
+    'not_found': 404,
+    'already_exists': 409,
+    'permission_denied': 403,
+    'unavailable': 503,
+    'dbus_error': 500,
+}
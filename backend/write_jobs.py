@@ -0,0 +1,144 @@
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_FINISHED_JOBS = 100  # Finished jobs kept for status queries
+MAX_STREAMS = 2          # Open job event streams; each holds a gunicorn thread
+TERMINAL_STATES = ('succeeded', 'failed')
+
+
+class WriteJob:
+    def __init__(self, payload):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = 'queued'
+        self.pages_total = 0
+        self.pages_written = 0
+        self.verified = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.revision = 0
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "pages_total": self.pages_total,
+            "pages_written": self.pages_written,
+            "verified": self.verified,
+            "error": self.error,
+            "duration": (self.finished or time.time()) - self.started if self.started else None,
+            "created": self.created,
+        }
+
+
+class WriteJobQueue:
+    # Serializes NFC write jobs onto a single worker thread. `runner(job, progress)`
+    # performs the write; `progress(**fields)` publishes updates to waiting clients.
+    # Jobs live in process memory: the app runs in one gunicorn worker (gunicorn.conf.py).
+    def __init__(self, runner):
+        self.runner = runner
+        self.jobs = OrderedDict()
+        self.pending = queue.Queue()
+        self.changed = threading.Condition()
+        self.worker = None
+        self.listeners = []
+        self.streams = 0
+
+    def submit(self, payload):
+        job = WriteJob(payload)
+        with self.changed:
+            self.jobs[job.id] = job
+            self._trim()
+        self._ensure_worker()
+        self.pending.put(job)
+        self._update(job)
+        return job
+
+    def get(self, job_id):
+        with self.changed:
+            return self.jobs.get(job_id)
+
+    def add_listener(self, callback):
+        # callback(job_dict) on every job update
+        self.listeners.append(callback)
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._work, daemon=True)
+            self.worker.start()
+
+    def _update(self, job, **fields):
+        with self.changed:
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.revision += 1
+            self.changed.notify_all()
+            state = job.to_dict()
+        for callback in list(self.listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                logger.error(f"Write job listener failed: {e}")
+
+    def _work(self):
+        while True:
+            job = self.pending.get()
+            self._update(job, status='running', started=time.time())
+            try:
+                self.runner(job, lambda **fields: self._update(job, **fields))
+                if not job.done:
+                    self._update(job, status='succeeded', finished=time.time())
+            except Exception as e:
+                logger.error(f"Write job {job.id} failed: {e}")
+                self._update(job, status='failed', error=str(e), finished=time.time())
+            finally:
+                self.pending.task_done()
+
+    def open_stream(self):
+        # Reserves a stream slot; False when MAX_STREAMS are already open
+        with self.changed:
+            if self.streams >= MAX_STREAMS:
+                return False
+            self.streams += 1
+            return True
+
+    def close_stream(self):
+        with self.changed:
+            self.streams -= 1
+
+    def stream(self, job_id, timeout=60):
+        # Server-Sent Events: one event per state change until the job finishes
+        job = self.get(job_id)
+        if job is None:
+            return
+        last_revision = -1
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.changed:
+                while job.revision == last_revision and time.monotonic() < deadline:
+                    self.changed.wait(timeout=max(0.0, deadline - time.monotonic()))
+                if job.revision == last_revision:
+                    return
+                last_revision = job.revision
+                state = job.to_dict()
+            yield f"data: {json.dumps(state)}\n\n"
+            if job.done:
+                return
@@ -38,7 +38,7 @@ fi
 # Update and install dependencies
 log_message "Updating system and installing dependencies..."
 sudo apt-get remove nodejs-legacy
-sudo apt-get update && sudo apt-get install -y jq git gcc libglib2.0-0 make build-essential libssl-dev zlib1g-dev libbz2-dev libreadline-dev libsqlite3-dev wget curl llvm libncurses5-dev xz-utils tk-dev libxml2-dev libxmlsec1-dev libffi-dev liblzma-dev python3-dbus dbus python3-networkmanager
+sudo apt-get update && sudo apt-get install -y jq git gcc libglib2.0-0 make build-essential libssl-dev zlib1g-dev libbz2-dev libreadline-dev libsqlite3-dev wget curl llvm libncurses5-dev xz-utils tk-dev libxml2-dev libxmlsec1-dev libffi-dev liblzma-dev python3-dbus dbus python3-networkmanager python3-gi alsa-utils
 sudo apt-get install -y libsdl2-dev libsdl2-image-dev libsdl2-mixer-dev libsdl2-ttf-dev libportmidi-dev libjpeg-dev python3-dev libasound2-dev ffmpeg python3-pip pipx
 
 # Install Piper TTS using pipx
@@ -150,6 +150,33 @@ if ! id -nG "$USER" | grep -qw wificonfig; then
     sudo usermod -a -G wificonfig "$USER"
     echo "User '$USER' added to 'wificonfig' group"
 fi
+# The backend edits saved networks through NetworkManager over D-Bus; polkit only lets
+# active console sessions do that by default, so grant it to the 'wificonfig' group
+if [ -d /etc/polkit-1/rules.d ]; then
+    sudo tee /etc/polkit-1/rules.d/50-$APP_NAME-networkmanager.rules > /dev/null << 'EOF'
+polkit.addRule(function(action, subject) {
+    if (action.id == "org.freedesktop.NetworkManager.settings.modify.system" &&
+        subject.isInGroup("wificonfig")) {
+        return polkit.Result.YES;
+    }
+});
+EOF
+else
+    # polkit < 0.106 (older Raspberry Pi OS) only reads .pkla files
+    sudo mkdir -p /etc/polkit-1/localauthority/50-local.d
+    sudo tee /etc/polkit-1/localauthority/50-local.d/50-$APP_NAME-networkmanager.pkla > /dev/null << 'EOF'
+[Allow wificonfig to modify NetworkManager connections]
+Identity=unix-group:wificonfig
+Action=org.freedesktop.NetworkManager.settings.modify.system
+ResultAny=yes
+ResultInactive=yes
+ResultActive=yes
+EOF
+fi
+if [ $? -ne 0 ]; then
+    log_message "Failed to install the NetworkManager polkit rule."
+    exit 1
+fi
 # Check the group owner of wpa_supplicant.conf
 if [ "$(stat -c %G /etc/wpa_supplicant/wpa_supplicant.conf)" != "wificonfig" ]; then
     sudo chgrp wificonfig /etc/wpa_supplicant/wpa_supplicant.conf
@@ -258,7 +285,7 @@ Environment=PYTHONUNBUFFERED=1
 Environment="XDG_RUNTIME_DIR=/home/$USER/.xdg"
 Environment="WEB_APP_PATH=$APP_DIR/backend/web"
 Environment="CONFIG_FILE_PATH=$CONFIG_DIR/$CONFIG_FILE"
-ExecStart=$APP_DIR/backend/venv/bin/gunicorn --workers 1 --bind 0.0.0.0:8080 'langiot:app'
+ExecStart=$APP_DIR/backend/venv/bin/gunicorn --config $APP_DIR/backend/gunicorn.conf.py --bind 0.0.0.0:8080 'langiot:app'
 Restart=on-failure
 RestartSec=5s
 
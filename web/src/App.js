@@ -2,71 +2,6 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import './App.css';
 
-// Language codes for dropdown selections
-const languageCodes = [
-  { code: 'en', name: 'English' },
-  { code: 'zh-TW', name: 'Chinese (Mandarin/Taiwan)' },
-  { code: 'zh-CN', name: 'Chinese (Simplified)' },
-  { code: 'zh', name: 'Chinese (Mandarin)' },
-  { code: 'gu', name: 'Gujarati' },
-  { code: 'hi', name: 'Hindi' },
-  { code: 'af', name: 'Afrikaans' },
-  { code: 'ar', name: 'Arabic' },
-  { code: 'bg', name: 'Bulgarian' },
-  { code: 'bn', name: 'Bengali' },
-  { code: 'bs', name: 'Bosnian' },
-  { code: 'ca', name: 'Catalan' },
-  { code: 'cs', name: 'Czech' },
-  { code: 'da', name: 'Danish' },
-  { code: 'de', name: 'German' },
-  { code: 'el', name: 'Greek' },
-  { code: 'es', name: 'Spanish' },
-  { code: 'et', name: 'Estonian' },
-  { code: 'fi', name: 'Finnish' },
-  { code: 'fr', name: 'French' },
-  { code: 'hr', name: 'Croatian' },
-  { code: 'hu', name: 'Hungarian' },
-  { code: 'id', name: 'Indonesian' },
-  { code: 'is', name: 'Icelandic' },
-  { code: 'it', name: 'Italian' },
-  { code: 'iw', name: 'Hebrew' },
-  { code: 'ja', name: 'Japanese' },
-  { code: 'jw', name: 'Javanese' },
-  { code: 'km', name: 'Khmer' },
-  { code: 'kn', name: 'Kannada' },
-  { code: 'ko', name: 'Korean' },
-  { code: 'la', name: 'Latin' },
-  { code: 'lv', name: 'Latvian' },
-  { code: 'ml', name: 'Malayalam' },
-  { code: 'mr', name: 'Marathi' },
-  { code: 'ms', name: 'Malay' },
-  { code: 'my', name: 'Myanmar (Burmese)' },
-  { code: 'ne', name: 'Nepali' },
-  { code: 'nl', name: 'Dutch' },
-  { code: 'no', name: 'Norwegian' },
-  { code: 'pl', name: 'Polish' },
-  { code: 'pt', name: 'Portuguese' },
-  { code: 'ro', name: 'Romanian' },
-  { code: 'ru', name: 'Russian' },
-  { code: 'si', name: 'Sinhala' },
-  { code: 'sk', name: 'Slovak' },
-  { code: 'sq', name: 'Albanian' },
-  { code: 'sr', name: 'Serbian' },
-  { code: 'su', name: 'Sundanese' },
-  { code: 'sv', name: 'Swedish' },
-  { code: 'sw', name: 'Swahili' },
-  { code: 'ta', name: 'Tamil' },
-  { code: 'te', name: 'Telugu' },
-  { code: 'th', name: 'Thai' },
-  { code: 'tl', name: 'Filipino' },
-  { code: 'tr', name: 'Turkish' },
-  { code: 'uk', name: 'Ukrainian' },
-  { code: 'ur', name: 'Urdu' },
-  { code: 'vi', name: 'Vietnamese' },
-  // ...other languages
-];
-
-
 function App() {
   const [showConfig, setShowConfig] = useState(false);
   const [error, setError] = useState('');
@@ -81,25 +16,41 @@ function App() {
   const [serverName, setServerName] = useState('');
   const [apiToken, setApiToken] = useState('');
   const [soundFileUrl, setSoundFileUrl] = useState('');
+  const [writeStatus, setWriteStatus] = useState(null);
+  // Batch Provisioning State
+  const [batchPayloads, setBatchPayloads] = useState('');
+  const [provisioning, setProvisioning] = useState(null);
+  const [activity, setActivity] = useState([]);
   // Wi-Fi Management State
   const [networks, setNetworks] = useState([]);
   const [newNetworkSSID, setNewNetworkSSID] = useState('');
   const [newNetworkPSK, setNewNetworkPSK] = useState('');
+  // Language codes for dropdown selections, from /bootstrap
+  const [languageCodes, setLanguageCodes] = useState([]);
+  const [deviceStatus, setDeviceStatus] = useState(null);
   
 
+  // One request for config, networks, status and languages; the browser revalidates it with
+  // its ETag, so an unchanged device answers 304
+  const fetchBootstrap = async () => {
+    try {
+      const response = await axios.get('/bootstrap');
+      setServerName(response.data.config.ServerName);
+      setApiToken(response.data.config.ApiToken);
+      setNetworks(response.data.networks);
+      setDeviceStatus(response.data.status);
+      setLanguageCodes(response.data.languages);
+    } catch (error) {
+      console.error('Error fetching configuration:', error);
+      setErrorConfig(`Error fetching configuration: ${error.message}`);
+    }
+  };
+
   useEffect(() => {
-    const fetchConfig = async () => {
-      try {
-        const response = await axios.get('/get_config');
-        setServerName(response.data.ServerName);
-        setApiToken(response.data.ApiToken);
-      } catch (error) {
-        console.error('Error fetching configuration:', error);
-        setErrorConfig(`Error fetching configuration: ${error.message}`);
-      }
-    };
+    fetchBootstrap();
+  }, []);
 
-    fetchConfig();
+  useEffect(() => {
     if (formType === 'localization') {
       setLocalizations([{ language: '', value: '' }]);
     } else {
@@ -107,18 +58,9 @@ function App() {
       setLanguage('');
       setTranslations(['']);
     }
-
-    fetchNetworks();
   }, [formType]);
 
-  const fetchNetworks = async () => {
-    try {
-      const response = await axios.get('/wifi-networks');
-      setNetworks(response.data);
-    } catch (error) {
-      console.error('Error fetching networks:', error);
-    }
-  };
+  const fetchNetworks = fetchBootstrap;
 
   const handleNetworkDeletion = async (ssid) => {
     try {
@@ -264,14 +206,69 @@ function App() {
     try {
       const jsonStr = generateJson();
       console.log('Writing NFC with JSON:', jsonStr);
-      await axios.post('/handle_write', { json_str: jsonStr });
-      alert('Write to NFC tag initiated');
+      const response = await axios.post('/handle_write', { json_str: jsonStr });
+      // Progress arrives through the 'write_job' events on /events
+      setWriteStatus(response.data.job);
     } catch (error) {
       console.error('Error writing to NFC:', error);
       setError(`Error: ${error.response ? error.response.status : ''} ${error.message}`);
     }
   }
 
+  useEffect(() => {
+    // Live device events pushed by the backend
+    const source = new EventSource('/events');
+    const handle = (handler) => (event) => handler(JSON.parse(event.data));
+
+    const addActivity = (event) => {
+      setActivity(previous => [event, ...previous].slice(0, 10));
+    };
+    source.addEventListener('scan', handle(addActivity));
+    source.addEventListener('tag_decoded', handle(addActivity));
+    source.addEventListener('playback', handle(addActivity));
+    source.addEventListener('write_job', handle((event) => {
+      setWriteStatus(previous => (previous && previous.id === event.data.id ? event.data : previous));
+    }));
+    source.addEventListener('provisioning', handle((event) => setProvisioning(event.data)));
+
+    return () => source.close();
+  }, []);
+
+  const describeActivity = (event) => {
+    const time = new Date(event.time * 1000).toLocaleTimeString();
+    switch (event.type) {
+      case 'scan':
+        return `${time} Tag ${event.data.uid} scanned`;
+      case 'tag_decoded':
+        return `${time} Tag data ${event.data.valid ? `decoded (${event.data.schema})` : 'invalid'}`;
+      case 'playback':
+        return `${time} Playback ${event.data.status}${event.data.codec ? ` (${event.data.codec})` : ''}`;
+      default:
+        return `${time} ${event.type}`;
+    }
+  };
+
+  const handleStartProvisioning = async () => {
+    // One JSON payload per line
+    const payloads = batchPayloads.split('\n').map(line => line.trim()).filter(line => line);
+    try {
+      const response = await axios.post('/provisioning', { payloads });
+      setProvisioning(response.data);
+    } catch (error) {
+      console.error('Error starting provisioning:', error);
+      setError(`Error: ${error.response ? error.response.data.error : error.message}`);
+    }
+  };
+
+  const handleStopProvisioning = async () => {
+    try {
+      const response = await axios.delete('/provisioning');
+      setProvisioning(response.data);
+    } catch (error) {
+      console.error('Error stopping provisioning:', error);
+    }
+  };
+
   const handleConfigSubmit = async () => {
     try {
       const config = { ServerName: serverName, ApiToken: apiToken };
@@ -343,6 +340,14 @@ function App() {
       <div>
         <button onClick={performHttpRequest}>Test Audio</button>
         <button onClick={handleWriteNFC}>Write to NFC Tag</button>
+        {writeStatus && (
+          <div className="write-status">
+            Write to NFC tag: {writeStatus.status.replace(/_/g, ' ')}
+            {writeStatus.pages_total > 0 && ` (${writeStatus.pages_written}/${writeStatus.pages_total} pages)`}
+            {writeStatus.status === 'succeeded' && writeStatus.verified && ', verified'}
+            {writeStatus.error && ` - ${writeStatus.error}`}
+          </div>
+        )}
         {error && <div className="error-message">{error}</div>}
         {audio && <div><audio className="audioPlayer" controls src={audio} /></div>}
       </div>
@@ -353,6 +358,40 @@ function App() {
         </div>
       )}
 
+      <h2>Device Activity</h2>
+      {deviceStatus && (
+        <div className="info-box">
+          Server: {deviceStatus.connectedToServer ? 'connected' : 'not connected'}
+          {' | '}Reader: {deviceStatus.readerReady ? 'ready' : 'recovering'}
+          {' | '}Voice: {deviceStatus.ttsVoice || 'loading'}
+        </div>
+      )}
+      <div className="activity-log">
+        {activity.length === 0 && <div>No activity yet</div>}
+        {activity.map(event => <div key={event.id}>{describeActivity(event)}</div>)}
+      </div>
+
+      <h2>Batch Provisioning</h2>
+      <div className="info-box">Paste one JSON payload per line, start the session, then tap each blank tag in turn.</div>
+      <textarea
+        rows={6}
+        value={batchPayloads}
+        onChange={(e) => setBatchPayloads(e.target.value)}
+        placeholder='{"text": "Hello", "language": "en", "translations": ["es"]}'
+      />
+      <div>
+        {provisioning && provisioning.active ?
+          <button onClick={handleStopProvisioning}>Stop Provisioning</button> :
+          <button onClick={handleStartProvisioning}>Start Provisioning</button>}
+      </div>
+      {provisioning && (
+        <div className="provisioning-status">
+          {provisioning.done}/{provisioning.total} tags done
+          ({provisioning.written} written, {provisioning.skipped} already correct, {provisioning.failed} failed),
+          {' '}{provisioning.tags_per_minute.toFixed(1)} tags/min
+        </div>
+      )}
+
       </div>
 
 